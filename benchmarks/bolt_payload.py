@@ -0,0 +1,126 @@
+"""
+Benchmark of the `$batch` encoding of `CypherBatchSink`.
+
+Compares the default encoding (a list of maps, every key repeated for every row) with `columnar_batch=True` (value
+tuples, the keys are part of the rewritten query), see :func:`~etl_lib.core.utils.encode_columnar`.
+
+Measures for rows of increasing width (plus the `_row` column added by the sources):
+
+- the size of the `$batch` parameter as packed by the driver (Bolt PackStream), in bytes per row. The driver has no
+  public API for this, the private packer is used; if it cannot be imported, the sizes are skipped.
+- the client side cost of encoding a batch
+
+If `NEO4J_URI` (and `NEO4J_USERNAME`, `NEO4J_PASSWORD`, optionally `NEO4J_DATABASE`) are set, it also measures the
+latency of a transaction writing the batch. The transactions are rolled back, nothing is left in the database.
+
+Run with::
+
+    python benchmarks/bolt_payload.py
+"""
+import os
+import time
+
+from tabulate import tabulate
+
+try:
+    # private module of the driver, may move in any release
+    from neo4j._codec.packstream.v1 import PackableBuffer, Packer
+except ImportError:
+    PackableBuffer = Packer = None
+
+from etl_lib.core.utils import columnar_unwind_query, encode_columnar
+
+BATCH_SIZE = 5000
+WIDTHS = (4, 16, 64)
+REPEAT = 5
+TX_REPEAT = 5
+
+QUERY = """
+UNWIND $batch AS row
+CREATE (n:BoltPayloadBenchmark)
+SET n = row
+"""
+
+
+def _rows(width: int):
+    return [{**{f"property_{c}": f"value {i}" if c % 2 else i * c for c in range(width)}, "_row": i}
+            for i in range(BATCH_SIZE)]
+
+
+def _packed_size(value) -> int:
+    buffer = PackableBuffer()
+    Packer(buffer).pack(value)
+    return len(buffer.data)
+
+
+def _best(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def _driver():
+    uri = os.getenv("NEO4J_URI")
+    if not uri:
+        return None
+    from neo4j import GraphDatabase
+    return GraphDatabase.driver(uri, auth=(os.getenv("NEO4J_USERNAME"), os.getenv("NEO4J_PASSWORD")))
+
+
+def _tx_ms(driver, query: str, batch) -> float:
+    def write():
+        with driver.session(database=os.getenv("NEO4J_DATABASE")) as session:
+            tx = session.begin_transaction()
+            try:
+                tx.run(query, batch=batch).consume()
+            finally:
+                tx.rollback()
+
+    return _best(write, TX_REPEAT) * 1000.0
+
+
+def main():
+    measure_size = Packer is not None
+    if not measure_size:
+        import neo4j
+        print(f"skipping payload sizes: the PackStream packer of neo4j {neo4j.__version__} could not be imported")
+    driver = _driver()
+    rows = []
+    try:
+        for width in WIDTHS:
+            batch = _rows(width)
+            keys, values = encode_columnar(batch)
+            columnar_query = columnar_unwind_query(QUERY, tuple(keys))
+            encode_ms = _best(lambda: encode_columnar(batch), REPEAT) * 1000.0
+            row = [width + 1]
+            if measure_size:
+                maps_bytes = _packed_size(batch)
+                columnar_bytes = _packed_size(values)
+                row += [
+                    f"{maps_bytes / BATCH_SIZE:.1f}",
+                    f"{columnar_bytes / BATCH_SIZE:.1f}",
+                    f"{maps_bytes / columnar_bytes:.2f}x",
+                ]
+            row.append(f"{encode_ms:.2f}")
+            if driver is not None:
+                row += [f"{_tx_ms(driver, QUERY, batch):.1f}", f"{_tx_ms(driver, columnar_query, values):.1f}"]
+            rows.append(row)
+    finally:
+        if driver is not None:
+            driver.close()
+
+    headers = ["columns"]
+    if measure_size:
+        headers += ["maps bytes/row", "columnar bytes/row", "reduction"]
+    headers.append("encode ms/batch")
+    if driver is not None:
+        headers += ["maps tx ms", "columnar tx ms"]
+    print(f"batch size {BATCH_SIZE}")
+    print(tabulate(rows, headers=headers))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Benchmark for moving batches to worker processes: pickling through the process pool pipe vs.
+:class:`~etl_lib.core.SharedMemoryTransport.SharedMemoryTransport`.
+
+Each batch is sent to a worker of a process pool, which counts its rows and sends a batch of the same size back,
+mirroring a transformation step run by :class:`~etl_lib.core.ProcessPoolBatchProcessor.ProcessPoolBatchProcessor`.
+Needs pyarrow.
+
+Run with::
+
+    python benchmarks/shared_memory_transport.py
+"""
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import pyarrow as pa
+from tabulate import tabulate
+
+from etl_lib.core.SharedMemoryTransport import SharedMemoryTransport
+
+BATCH_SIZE = 50_000
+BATCHES = 20
+WORKERS = 2
+
+
+def _rows(seed: int):
+    rng = random.Random(seed)
+    return [
+        {"_row": i, "start": rng.randrange(10 ** 9), "end": rng.randrange(10 ** 9), "weight": rng.random(),
+         "name": f"node-{rng.randrange(10 ** 6)}"}
+        for i in range(BATCH_SIZE)
+    ]
+
+
+def echo(chunk):
+    return chunk
+
+
+def echo_shared(transport: SharedMemoryTransport, handle):
+    return transport.send(transport.receive(handle))
+
+
+def bench(batches, transport: SharedMemoryTransport | None) -> float:
+    with ProcessPoolExecutor(max_workers=WORKERS) as pool:
+        pool.submit(len, []).result()  # start the workers before measuring
+        t0 = time.perf_counter()
+        if transport is None:
+            futures = [pool.submit(echo, batch) for batch in batches]
+            received = [f.result() for f in futures]
+        else:
+            futures = [pool.submit(echo_shared, transport, transport.send(batch)) for batch in batches]
+            received = [transport.receive(f.result()) for f in futures]
+        elapsed = time.perf_counter() - t0
+    assert sum(len(r) for r in received) == BATCH_SIZE * BATCHES
+    return BATCH_SIZE * BATCHES / elapsed
+
+
+def main():
+    rows = [_rows(i) for i in range(BATCHES)]
+    columnar = [pa.RecordBatch.from_pylist(batch) for batch in rows]
+    results = [
+        ["list of dicts", "pickle through pipe", int(bench(rows, None))],
+        ["list of dicts", "shared memory, pickle", int(bench(rows, SharedMemoryTransport()))],
+        ["list of dicts", "shared memory, arrow", int(bench(rows, SharedMemoryTransport(rows_as_arrow=True)))],
+        ["RecordBatch", "pickle through pipe", int(bench(columnar, None))],
+        ["RecordBatch", "shared memory, arrow IPC", int(bench(columnar, SharedMemoryTransport()))],
+    ]
+    print(f"rows/s for {BATCHES} batches of {BATCH_SIZE} rows sent to {WORKERS} workers and back")
+    print(tabulate(results, headers=["chunk", "transport", "rows/s"], tablefmt="psql"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""
+Microbenchmark for taking a batch from a splitter bucket with a growing backlog.
+
+Compares the chunked bucket storage of :class:`~etl_lib.core.SplittingBatchProcessor.SplittingBatchProcessor`
+against plain list slicing (``q[:take]`` / ``q[take:]``), which copies the remaining backlog on every flush.
+
+Run with::
+
+    python benchmarks/splitter_flush.py
+"""
+import time
+
+from tabulate import tabulate
+
+from etl_lib.core._bucketing import BucketQueue
+
+BATCH_SIZE = 5000
+UPSTREAM_CHUNK = 5000
+FLUSHES = 20
+
+
+def _fill_queue(backlog: int) -> BucketQueue:
+    q = BucketQueue()
+    for start in range(0, backlog, UPSTREAM_CHUNK):
+        q.extend([{"_row": i} for i in range(start, min(start + UPSTREAM_CHUNK, backlog))])
+    return q
+
+
+def bench_bucket_queue(backlog: int) -> float:
+    q = _fill_queue(backlog)
+    t0 = time.perf_counter()
+    for _ in range(FLUSHES):
+        q.take(BATCH_SIZE)
+    return (time.perf_counter() - t0) * 1000.0 / FLUSHES
+
+
+def bench_list_slicing(backlog: int) -> float:
+    q = [{"_row": i} for i in range(backlog)]
+    t0 = time.perf_counter()
+    for _ in range(FLUSHES):
+        _ = q[:BATCH_SIZE]
+        q = q[BATCH_SIZE:]
+    return (time.perf_counter() - t0) * 1000.0 / FLUSHES
+
+
+def main():
+    rows = []
+    for backlog in (25_000, 125_000, 500_000, 1_000_000, 2_500_000):
+        rows.append([backlog, round(bench_bucket_queue(backlog), 3), round(bench_list_slicing(backlog), 3)])
+    print(f"ms per flush of {BATCH_SIZE} rows (average over {FLUSHES} flushes)")
+    print(tabulate(rows, headers=["backlog", "bucket queue", "list slicing"], tablefmt="psql"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Microbenchmark for assigning upstream rows to splitter buckets.
+
+Compares per-row extraction (one `id_extractor(item)` call per row) with the batch protocol (`extract_many(chunk)`)
+of the built-in extractors, as used by :class:`~etl_lib.core.SplittingBatchProcessor.SplittingBatchProcessor`.
+NumPy is used by the batch path if installed.
+
+Run with::
+
+    python benchmarks/splitter_scatter.py
+"""
+import random
+import time
+
+from tabulate import tabulate
+
+from etl_lib.core.SplittingBatchProcessor import (
+    SplittingBatchProcessor,
+    canonical_int_or_str_id_extractor,
+    canonical_integer_id_extractor,
+    dict_id_extractor,
+    np,
+    tuple_id_extractor,
+)
+
+TABLE_SIZE = 10
+CHUNK = 10_000
+CHUNKS = 20
+NODES = 200_000
+
+
+def _rows(string_ids: bool, tuples: bool = False):
+    rng = random.Random(42)
+    ids = [f"Q{i}" for i in range(NODES)] if string_ids else list(range(NODES))
+    if tuples:
+        return [[(rng.choice(ids), rng.choice(ids)) for _ in range(CHUNK)] for _ in range(CHUNKS)]
+    return [
+        [{"start": rng.choice(ids), "end": rng.choice(ids), "weight": 1} for _ in range(CHUNK)]
+        for _ in range(CHUNKS)
+    ]
+
+
+def _splitter(id_extractor) -> SplittingBatchProcessor:
+    return SplittingBatchProcessor(context=None, table_size=TABLE_SIZE, id_extractor=id_extractor)
+
+
+def bench(splitter: SplittingBatchProcessor, chunks, batch: bool) -> float:
+    scatter = splitter._scatter if batch else splitter._scatter_items
+    t0 = time.perf_counter()
+    for chunk in chunks:
+        scatter(chunk)
+    return CHUNK * CHUNKS / (time.perf_counter() - t0)
+
+
+def main():
+    cases = [
+        ("tuple_id_extractor (int)", tuple_id_extractor(TABLE_SIZE), False, True),
+        ("tuple_id_extractor (str)", tuple_id_extractor(TABLE_SIZE), True, True),
+        ("dict_id_extractor (int)", dict_id_extractor(TABLE_SIZE), False, False),
+        ("dict_id_extractor (str)", dict_id_extractor(TABLE_SIZE), True, False),
+        ("canonical_integer_id_extractor", canonical_integer_id_extractor(TABLE_SIZE), False, False),
+        ("canonical_int_or_str_id_extractor (int)", canonical_int_or_str_id_extractor(TABLE_SIZE), False, False),
+        ("canonical_int_or_str_id_extractor (str)", canonical_int_or_str_id_extractor(TABLE_SIZE), True, False),
+    ]
+    rows = []
+    for name, extractor, string_ids, tuples in cases:
+        chunks = _rows(string_ids, tuples)
+        splitter = _splitter(extractor)
+        rows.append([name, int(bench(splitter, chunks, batch=False)), int(bench(splitter, chunks, batch=True))])
+    print(f"rows/s scattered into a {TABLE_SIZE}x{TABLE_SIZE} grid, numpy {'enabled' if np is not None else 'not installed'}")
+    print(tabulate(rows, headers=["extractor", "per row", "extract_many"], tablefmt="psql"))
+
+
+if __name__ == "__main__":
+    main()
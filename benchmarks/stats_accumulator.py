@@ -0,0 +1,101 @@
+"""
+Microbenchmark for summing batch statistics.
+
+Compares the per-batch cost of folding statistics with `merge_summary` (a new dict of all keys per call, as done
+before in `ClosedLoopBatchProcessor`, `ParallelBatchProcessor` and the splitter) with
+:class:`~etl_lib.core.StatsAccumulator.StatsAccumulator`, for the statistics a Cypher load produces per batch: the 11
+Neo4j counters plus a few keys of the source and validation steps.
+
+The number of batches for a fixed number of rows grows as the batch size shrinks, so the per-batch overhead matters
+most for small batches.
+
+A second table measures a one-off merge per batch, as done by `append_result` and the validation step (the statistics
+of the batch plus a few keys of the step): `merge_summary` against a short-lived `StatsAccumulator`.
+
+Run with::
+
+    python benchmarks/stats_accumulator.py
+"""
+import time
+
+from tabulate import tabulate
+
+from etl_lib.core.StatsAccumulator import NEO4J_COUNTERS, StatsAccumulator
+from etl_lib.core.utils import merge_summary
+
+ROWS = 2_000_000
+BATCH_SIZES = (100, 250, 500, 1000)
+REPEAT = 3
+
+
+def _merge_summary_set_union(summary_1: dict, summary_2: dict) -> dict:
+    """`merge_summary` as implemented before `StatsAccumulator` was introduced."""
+    return {i: summary_1.get(i, 0) + summary_2.get(i, 0)
+            for i in set(summary_1).union(summary_2)}
+
+
+def _batch_stats(batch_size: int) -> dict:
+    stats = {name: 0 for name in NEO4J_COUNTERS}
+    stats.update(nodes_created=batch_size, properties_set=3 * batch_size, labels_added=batch_size)
+    stats.update(csv_lines_read=batch_size, valid_rows=batch_size, invalid_rows=0)
+    return stats
+
+
+def bench_merge(batches) -> float:
+    t0 = time.perf_counter()
+    total = {}
+    for stats in batches:
+        total = _merge_summary_set_union(total, stats)
+    return time.perf_counter() - t0
+
+
+def bench_accumulator(batches) -> float:
+    t0 = time.perf_counter()
+    total = StatsAccumulator()
+    for stats in batches:
+        total.add(stats)
+    total.to_dict()
+    return time.perf_counter() - t0
+
+
+def bench_one_off_merge(batches) -> float:
+    t0 = time.perf_counter()
+    for stats in batches:
+        merge_summary(stats, {"valid_rows": 1, "invalid_rows": 0})
+    return time.perf_counter() - t0
+
+
+def bench_one_off_accumulator(batches) -> float:
+    t0 = time.perf_counter()
+    for stats in batches:
+        StatsAccumulator(stats).add({"valid_rows": 1, "invalid_rows": 0}).to_dict()
+    return time.perf_counter() - t0
+
+
+def main():
+    rows = []
+    one_off = []
+    for batch_size in BATCH_SIZES:
+        n = ROWS // batch_size
+        batches = [_batch_stats(batch_size) for _ in range(n)]
+        merge = min(bench_merge(batches) for _ in range(REPEAT))
+        accumulator = min(bench_accumulator(batches) for _ in range(REPEAT))
+        rows.append([
+            batch_size,
+            n,
+            f"{merge / n * 1e6:.2f}",
+            f"{accumulator / n * 1e6:.2f}",
+            f"{merge / accumulator:.1f}x",
+        ])
+        merge = min(bench_one_off_merge(batches) for _ in range(REPEAT))
+        accumulator = min(bench_one_off_accumulator(batches) for _ in range(REPEAT))
+        one_off.append([batch_size, n, f"{merge / n * 1e6:.2f}", f"{accumulator / n * 1e6:.2f}"])
+    print(tabulate(rows, headers=["batch size", "batches", "merge_summary µs/batch", "StatsAccumulator µs/batch",
+                                  "speedup"]))
+    print()
+    print("one-off merge per batch")
+    print(tabulate(one_off, headers=["batch size", "batches", "merge_summary µs/batch", "StatsAccumulator µs/batch"]))
+
+
+if __name__ == "__main__":
+    main()
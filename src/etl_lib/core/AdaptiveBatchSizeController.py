@@ -0,0 +1,103 @@
+import threading
+from typing import Optional
+
+
+class AdaptiveBatchSizeController:
+    """
+    Tunes the number of rows per transaction towards a target transaction latency.
+
+    Uses additive increase / multiplicative decrease (AIMD):
+
+        - A full transaction that finished well below the target (more than `tolerance` below) grows the batch size
+          by `increase_step` rows.
+        - A transaction slower than the target shrinks the batch size by `decrease_factor`.
+        - Anything in between keeps the current size, which keeps the size from oscillating around the target.
+
+    Growing slowly and backing off fast keeps transactions short when the database is under pressure (lock
+    contention, memory, other writers) while still finding larger batches when there is headroom.
+
+    The controller is thread-safe, one instance can be shared by sinks running in parallel.
+    See :class:`~etl_lib.data_sink.CypherBatchSink.CypherBatchSink` for how it is used.
+
+    Args:
+        initial_batch_size: Batch size to start with.
+        target_latency_ms: Transaction latency to aim for, in milliseconds.
+        min_batch_size: Lower bound of the batch size.
+        max_batch_size: Upper bound of the batch size.
+        increase_step: Rows added after a fast transaction, defaults to 10% of `initial_batch_size`.
+        decrease_factor: Factor the batch size is multiplied with after a slow transaction, between 0 and 1.
+        tolerance: Fraction below the target that still counts as on target.
+    """
+
+    def __init__(self,
+                 initial_batch_size: int = 5000,
+                 target_latency_ms: float = 1000.0,
+                 min_batch_size: int = 100,
+                 max_batch_size: int = 100_000,
+                 increase_step: Optional[int] = None,
+                 decrease_factor: float = 0.5,
+                 tolerance: float = 0.2):
+        if min_batch_size < 1 or max_batch_size < min_batch_size:
+            raise ValueError(f"invalid batch size bounds [{min_batch_size}, {max_batch_size}]")
+        if target_latency_ms <= 0:
+            raise ValueError(f"target_latency_ms must be > 0, got {target_latency_ms}")
+        if not 0 < decrease_factor < 1:
+            raise ValueError(f"decrease_factor must be between 0 and 1, got {decrease_factor}")
+        if not 0 <= tolerance < 1:
+            raise ValueError(f"tolerance must be between 0 and 1, got {tolerance}")
+        self.target_latency_ms = target_latency_ms
+        self.min_batch_size = min_batch_size
+        self.max_batch_size = max_batch_size
+        self.increase_step = increase_step or max(1, initial_batch_size // 10)
+        self.decrease_factor = decrease_factor
+        self.tolerance = tolerance
+        self._batch_size = self._clamp(initial_batch_size)
+        self._lock = threading.Lock()
+
+    @property
+    def batch_size(self) -> int:
+        """
+        Number of rows the next transaction should contain.
+        """
+        return self._batch_size
+
+    def _clamp(self, size: int) -> int:
+        return max(self.min_batch_size, min(self.max_batch_size, int(size)))
+
+    def record(self, rows: int, dt_ms: float) -> int:
+        """
+        Update the batch size with the outcome of one transaction.
+
+        Args:
+            rows: Number of rows written by the transaction.
+            dt_ms: Duration of the transaction in milliseconds.
+
+        Returns:
+            The batch size to use from now on.
+        """
+        with self._lock:
+            size = self._batch_size
+            if dt_ms > self.target_latency_ms:
+                size = self._clamp(size * self.decrease_factor)
+            elif dt_ms < self.target_latency_ms * (1.0 - self.tolerance) and rows >= size:
+                # a short transaction says nothing about the latency of a full one
+                size = self._clamp(size + self.increase_step)
+            self._batch_size = size
+            return size
+
+    def limit(self, max_batch_size: int) -> int:
+        """
+        Lower the upper bound of the batch size, for example after a transaction failed because it was too large.
+        The bound is not lowered below `min_batch_size`.
+
+        Returns:
+            The batch size to use from now on.
+        """
+        with self._lock:
+            self.max_batch_size = max(self.min_batch_size, min(self.max_batch_size, int(max_batch_size)))
+            self._batch_size = self._clamp(self._batch_size)
+            return self._batch_size
+
+    def __repr__(self):
+        return (f"{self.__class__.__name__}(batch_size={self._batch_size}, "
+                f"target_latency_ms={self.target_latency_ms})")
@@ -1,8 +1,9 @@
 import abc
+import dataclasses
 import logging
 import sys
 from dataclasses import dataclass, field
-from typing import Any, Generator, List, Optional
+from typing import Any, Generator, List, Mapping, Optional
 
 from etl_lib.core.Task import Task
 from etl_lib.core.utils import merge_summary
@@ -14,20 +15,21 @@ class BatchResults:
     Return object of the :py:func:`~BatchProcessor.get_batch` method, wrapping a batched data together with meta information.
     """
     chunk: List[Any]
-    """The batch of data."""
+    """The batch of data. Usually a list of rows, columnar sources can also provide a `pyarrow.RecordBatch`/`Table`."""
     statistics: dict = field(default_factory=dict)
     """`dict` of statistic information, such as row processed, nodes writen, .."""
     batch_size: int = field(default=sys.maxsize)
     """size of the batch."""
 
 
-def append_result(org: BatchResults, stats: dict) -> BatchResults:
+def append_result(org: BatchResults, stats: Mapping[str, Any]) -> BatchResults:
     """
     Appends the stats dict to the provided `org`.
 
     Args:
         org: The original `BatchResults` object.
-        stats: dict containing statistics to be added to the org object.
+        stats: dict (or :class:`~etl_lib.core.StatsAccumulator.StatsAccumulator`) containing statistics to be added to
+            the org object.
 
     Returns:
         New `BatchResults` object, where the :py:attr:`~BatchResults.statistics` attribute is the merged result of the
@@ -70,6 +72,8 @@ class BatchProcessor(abc.ABC):
         self.logger = logging.getLogger(f"{self.__class__.__module__}.{self.__class__.__name__}")
         self.task = task
         """The :py:class:`etl_lib.core.Task.Task` owning instance."""
+        self.stats_only = False
+        """`True` if the caller only uses statistics and batch sizes, see :py:func:`~request_stats_only`."""
 
     @abc.abstractmethod
     def get_batch(self, max_batch_size: int) -> Generator[BatchResults, None, None]:
@@ -86,6 +90,24 @@ class BatchProcessor(abc.ABC):
         """
         pass
 
+    def request_stats_only(self) -> None:
+        """
+        Tell this processor that its caller only uses the statistics and batch sizes of the returned batches.
+
+        Processors at the end of a chain, such as sinks, then yield empty chunks, so rows already written are not kept
+        alive further downstream. Processors passing chunks through unchanged forward the request to their
+        predecessor. Must be called before :py:func:`~get_batch`.
+        """
+        self.stats_only = True
+
+    def _unless_stats_only(self, result: BatchResults) -> BatchResults:
+        """
+        Return `result`, without its chunk if only statistics were requested, see :py:func:`~request_stats_only`.
+        """
+        if not self.stats_only:
+            return result
+        return dataclasses.replace(result, chunk=[])
+
     def _instrument(self, event_type: str, payload: dict) -> None:
         """
         Emits an instrumentation event via the configured reporter.
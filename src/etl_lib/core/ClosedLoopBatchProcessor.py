@@ -1,7 +1,8 @@
 from typing import Generator
 
-from etl_lib.core.BatchProcessor import BatchProcessor, BatchResults, append_result
+from etl_lib.core.BatchProcessor import BatchProcessor, BatchResults
 from etl_lib.core.ETLContext import ETLContext
+from etl_lib.core.StatsAccumulator import StatsAccumulator
 from etl_lib.core.Task import Task
 
 
@@ -11,6 +12,9 @@ class ClosedLoopBatchProcessor(BatchProcessor):
 
     Meant to be the last entry in the list of :py:class:`etl_lib.core.BatchProcessor` driving the processing and
     reporting updates of the processed batches using the :py:class:`etl_lib.core.ProgressReporter` from the context.
+
+    Only the statistics of the batches are kept. The predecessor is told so via
+    :py:func:`~etl_lib.core.BatchProcessor.BatchProcessor.request_stats_only`, allowing sinks to drop written rows.
     """
 
     def __init__(self,
@@ -26,14 +30,19 @@ class ClosedLoopBatchProcessor(BatchProcessor):
     def get_batch(self, max_batch_size: int) -> Generator[BatchResults, None, None]:
         if self.predecessor is None:
             raise ValueError(f"{self.__class__.__name__} requires a predecessor")
+        request_stats_only = getattr(self.predecessor, "request_stats_only", None)
+        if request_stats_only is not None:
+            request_stats_only()
         batch_cnt = 0
-        result = BatchResults(chunk=[], statistics={}, batch_size=max_batch_size)
+        statistics = StatsAccumulator()
         for batch in self.predecessor.get_batch(max_batch_size):
-            result = append_result(result, batch.statistics)
+            statistics.add(batch.statistics)
             batch_cnt += 1
+            # the accumulator is a read-only mapping, no copy of the statistics per batch
             self.context.reporter.report_progress(self.task, batch_cnt, self._safe_calculate_count(max_batch_size),
-                                                  result.statistics)
+                                                  statistics)
 
+        result = BatchResults(chunk=[], statistics=statistics.to_dict(), batch_size=max_batch_size)
         self.logger.debug(result.statistics)
         yield result
 
@@ -1,3 +1,4 @@
+import asyncio
 import logging
 import time
 import urllib.parse
@@ -16,8 +17,9 @@ except ImportError:
     logging.info("Graph Data Science not installed, skipping")
     GraphDataScience = None
 
-from neo4j import GraphDatabase, Session, WRITE_ACCESS, SummaryCounters, bearer_auth
-from neo4j.auth_management import AuthManagers, AuthManager, ExpiringAuth
+from neo4j import (AsyncDriver, AsyncGraphDatabase, AsyncSession, GraphDatabase, Session, WRITE_ACCESS, SummaryCounters,
+                   bearer_auth)
+from neo4j.auth_management import AsyncAuthManager, AsyncAuthManagers, AuthManagers, ExpiringAuth
 
 try:
     from sqlalchemy import create_engine
@@ -32,6 +34,7 @@ except ImportError:
 
 from etl_lib.core.InstrumentationWriter import create_instrumentation_writer
 from etl_lib.core.ProgressReporter import get_reporter
+from etl_lib.core.StatsAccumulator import StatsAccumulator
 
 
 def _fetch_oauth2_token(token_url: str, client_id: str, client_secret: str,
@@ -134,56 +137,140 @@ class Neo4jContext:
             client_secret = env_vars["NEO4J_CLIENT_SECRET"]
             scope = env_vars.get("NEO4J_SCOPE")
             self.auth = None
-            self._auth_manager = self.__make_token_auth_manager(
-                token_url, client_id, client_secret, scope
-            )
+            self._token_provider = self.__make_token_provider(token_url, client_id, client_secret, scope)
+            self._auth_manager = AuthManagers.bearer(self._token_provider)
         else:
             self.auth = (env_vars["NEO4J_USERNAME"], env_vars["NEO4J_PASSWORD"])
+            self._token_provider = None
             self._auth_manager = None
 
         self.__neo4j_connect()
 
-    def query_database(self, session: Session, query, **kwargs) -> QueryResult:
+    def query_database(self, session: Session, query, fetch_records: bool = True, single_transaction: bool = False,
+                       accumulator: Optional[StatsAccumulator] = None, **kwargs) -> QueryResult:
         """
         Executes Cypher and returns (records, counters) with retryable write semantics.
         Accepts either a single query string or a list of queries.
-        Does not work with CALL {} IN TRANSACTION queries.
+        Does not work with CALL {} IN TRANSACTION queries, use :meth:`query_database_auto_commit` for these.
+
+        If the driver had to retry the transaction (for example after a deadlock or a lock wait timeout), the number
+        of retries is added to the returned summary as `tx_retries`.
+
+        Args:
+            session: Session to run the transaction(s) in.
+            query: Query string or list of query strings.
+            fetch_records: If `False`, records returned by the queries are discarded instead of being turned into a
+                list, for write queries where only the counters are of interest. `data` of the result is then empty.
+            single_transaction: Run a list of queries in one transaction, with one round trip to commit, instead of
+                one transaction per query. The counters of the queries are summed.
+            accumulator: If given, the counters (and `tx_retries`) are added straight to this accumulator instead of
+                being returned as a new dict, the `summary` of the result is then empty.
+            kwargs: Parameters passed to each query.
         """
-        if isinstance(query, list):
+        if isinstance(query, list) and not single_transaction:
             results = None
             for single in query:
-                part = self.query_database(session, single, **kwargs)
+                part = self.query_database(session, single, fetch_records=fetch_records, accumulator=accumulator,
+                                           **kwargs)
                 results = append_results(results, part) if results is not None else part
             return results
 
-        def _tx(tx, q, params):
-            res = tx.run(q, **params)
-            records = list(res)
+        queries = query if isinstance(query, list) else [query]
+        attempts = 0
+
+        def _tx(tx, qs, params):
+            nonlocal attempts
+            attempts += 1
+            records = []
+            counters = []
+            for q in qs:
+                res = tx.run(q, **params)
+                if fetch_records:
+                    records.extend(res)
+                counters.append(res.consume().counters)
+            return records, counters
+
+        try:
+            records, counters = session.execute_write(_tx, queries, kwargs)
+            return QueryResult(data=records, summary=self.__summary(counters, attempts, accumulator))
+        except Neo4jError as e:
+            self.logger.error(e)
+            raise
+
+    def query_database_auto_commit(self, session: Session, query: str, fetch_records: bool = True,
+                                   accumulator: Optional[StatsAccumulator] = None, **kwargs) -> QueryResult:
+        """
+        Executes Cypher in an auto-commit transaction and returns (records, counters).
+
+        Needed for `CALL { } IN TRANSACTIONS` queries, which manage their own transactions on the server, see
+        :func:`~etl_lib.core.utils.in_transactions_query`. The query is not retried by the driver.
+
+        Args:
+            session: Session to run the query in.
+            query: Query string.
+            fetch_records: If `False`, returned records are discarded instead of being turned into a list.
+            accumulator: If given, the counters are added straight to this accumulator instead of being returned as a
+                new dict, the `summary` of the result is then empty.
+            kwargs: Parameters passed to the query.
+        """
+        try:
+            res = session.run(query, **kwargs)
+            records = list(res) if fetch_records else []
             counters = res.consume().counters
+            return QueryResult(data=records, summary=self.__summary([counters], 1, accumulator))
+        except Neo4jError as e:
+            self.logger.error(e)
+            raise
+
+    async def query_database_async(self, session: AsyncSession, query, fetch_records: bool = True,
+                                   single_transaction: bool = False, accumulator: Optional[StatsAccumulator] = None,
+                                   **kwargs) -> QueryResult:
+        """
+        Async variant of :meth:`query_database` for sessions of an :meth:`async_driver`.
+        """
+        if isinstance(query, list) and not single_transaction:
+            results = None
+            for single in query:
+                part = await self.query_database_async(session, single, fetch_records=fetch_records,
+                                                       accumulator=accumulator, **kwargs)
+                results = append_results(results, part) if results is not None else part
+            return results
+
+        queries = query if isinstance(query, list) else [query]
+        attempts = 0
+
+        async def _tx(tx, qs, params):
+            nonlocal attempts
+            attempts += 1
+            records = []
+            counters = []
+            for q in qs:
+                res = await tx.run(q, **params)
+                if fetch_records:
+                    records.extend([record async for record in res])
+                counters.append((await res.consume()).counters)
             return records, counters
 
         try:
-            records, counters = session.execute_write(_tx, query, kwargs)
-            return QueryResult(data=records, summary=self.__counters_2_dict(counters))
+            records, counters = await session.execute_write(_tx, queries, kwargs)
+            return QueryResult(data=records, summary=self.__summary(counters, attempts, accumulator))
         except Neo4jError as e:
             self.logger.error(e)
             raise
 
     @staticmethod
-    def __counters_2_dict(counters: SummaryCounters):
-        return {
-            "constraints_added": counters.constraints_added,
-            "constraints_removed": counters.constraints_removed,
-            "indexes_added": counters.indexes_added,
-            "indexes_removed": counters.indexes_removed,
-            "labels_added": counters.labels_added,
-            "labels_removed": counters.labels_removed,
-            "nodes_created": counters.nodes_created,
-            "nodes_deleted": counters.nodes_deleted,
-            "properties_set": counters.properties_set,
-            "relationships_created": counters.relationships_created,
-            "relationships_deleted": counters.relationships_deleted,
-        }
+    def __summary(counters: List[SummaryCounters], attempts: int,
+                  accumulator: Optional[StatsAccumulator] = None) -> Dict[str, int]:
+        """
+        Sum the counters of the queries of a transaction, adding `tx_retries` if it was attempted more than once.
+        With an `accumulator`, the counters are added to it and an empty dict is returned.
+        """
+        target = accumulator if accumulator is not None else StatsAccumulator()
+        for single in counters:
+            target.add_counters(single)
+        if attempts > 1:
+            target.increment("tx_retries", attempts - 1)
+        return {} if accumulator is not None else target.to_dict()
 
     def session(self, database=None):
         """
@@ -202,16 +289,45 @@ class Neo4jContext:
         else:
             return self.driver.session(database=database, default_access_mode=WRITE_ACCESS)
 
+    def async_driver(self) -> AsyncDriver:
+        """
+        Create a new `neo4j.AsyncDriver` with the same URI, credentials and driver options as :attr:`driver`.
+
+        An async driver is bound to the event loop it is used on. Create it on that loop, caller is responsible to
+        close it there.
+
+        Returns:
+            newly created async driver.
+        """
+        options = dict(self.driver_options)
+        if self._token_provider is not None:
+            return AsyncGraphDatabase.driver(uri=self.uri, auth=self.__make_async_auth_manager(), **options)
+        return AsyncGraphDatabase.driver(uri=self.uri, auth=self.auth, **options)
+
+    def async_session(self, driver: AsyncDriver, database=None) -> AsyncSession:
+        """
+        Create a new async session in write mode on `driver`, see :meth:`session`.
+        """
+        return driver.session(database=database or self.database, default_access_mode=WRITE_ACCESS)
+
     @staticmethod
-    def __make_token_auth_manager(token_url: str, client_id: str, client_secret: str,
-                                  scope: Optional[str]) -> AuthManager:
-        """Build an AuthManagers.bearer that fetches and auto-refreshes tokens."""
+    def __make_token_provider(token_url: str, client_id: str, client_secret: str, scope: Optional[str]):
+        """Build a provider for AuthManagers.bearer that fetches tokens."""
 
         def provider() -> ExpiringAuth:
             expires_in, token = _fetch_oauth2_token(token_url, client_id, client_secret, scope)
             return ExpiringAuth(bearer_auth(token), time.monotonic() + expires_in - 10)
 
-        return AuthManagers.bearer(provider)
+        return provider
+
+    def __make_async_auth_manager(self) -> AsyncAuthManager:
+        """Build an AsyncAuthManagers.bearer that fetches tokens off the event loop."""
+        provider = self._token_provider
+
+        async def async_provider() -> ExpiringAuth:
+            return await asyncio.to_thread(provider)
+
+        return AsyncAuthManagers.bearer(async_provider)
 
     def __neo4j_connect(self):
         options = dict(self.driver_options)
@@ -84,6 +84,34 @@ class CsvInstrumentationWriter(InstrumentationWriter):
             "table_size",
             "emitted_rows",
             "queue_depth",
+            "scheduler",
+            "greedy_buckets",
+            "greedy_rows",
+            "optimal_buckets",
+            "optimal_rows",
+            "in_memory_rows",
+            "memory_budget_rows",
+            "processes",
+            "previous_batch_size",
+            "target_latency_ms",
+            "tx_retries",
+            "stage",
+            "producer_blocked_ms",
+            "consumer_blocked_ms",
+            "in_flight",
+            "inner_transactions",
+            "inner_transactions_failed",
+            "attempt",
+            "backoff_ms",
+            "bucket",
+            "contention",
+            "key",
+            "side",
+            "slot",
+            "count",
+            "rows_seen",
+            "lane_rows",
+            "rows_per_s",
         ]
 
     def write(self, event: dict[str, Any]) -> None:
@@ -1,20 +1,76 @@
 import queue
+import random
 import threading
 import time
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from typing import Any, Callable, Generator, List, cast
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Generator, List, Optional, Set, Tuple, cast
 
 from etl_lib.core.BatchProcessor import BatchProcessor, BatchResults
-from etl_lib.core.utils import merge_summary
+from etl_lib.core.ParallelismTuner import ParallelismTuner
+from etl_lib.core.StatsAccumulator import StatsAccumulator
+from etl_lib.core.utils import is_transient_error
 
 
+@dataclass
 class ParallelBatchResult(BatchResults):
     """
     Represents one *wave* produced by the splitter.
 
     `chunk` is a list of bucket-batches. Each sub-list is processed by one worker instance.
     """
-    pass
+    claims: Optional[List[Tuple[Any, ...]]] = None
+    """
+    Resource claims of each bucket-batch, aligned with `chunk`.
+
+    Two bucket-batches whose claims do not intersect can be processed concurrently, even if they belong to
+    different waves. `None` if unknown, in which case the wave is processed with a barrier before and after it.
+    """
+    coordinates: Optional[List[Tuple[int, int]]] = None
+    """
+    Grid coordinates (row, col) of each bucket-batch, aligned with `chunk`. Lock conflicts of the bucket-batches are
+    reported back to the predecessor under these coordinates, see
+    :meth:`~etl_lib.core.SplittingBatchProcessor.SplittingBatchProcessor.record_contention`. `None` if unknown.
+    """
+
+
+class _BucketJob:
+    """
+    One bucket-batch of an admitted wave, either waiting for a worker or running.
+    """
+    __slots__ = ("wave", "batch", "claims", "coordinate", "requeues")
+
+    def __init__(self, wave: "_WaveState", batch: List[Any], claims: Optional[Tuple[Any, ...]],
+                 coordinate: Optional[Tuple[int, int]] = None):
+        self.wave = wave
+        self.batch = batch
+        self.claims = claims
+        self.coordinate = coordinate
+        self.requeues = 0
+
+
+class _WaveState:
+    """
+    Bookkeeping for one admitted wave until all of its bucket-batches are processed.
+    """
+
+    def __init__(self, seq: int, wave: ParallelBatchResult):
+        self.seq = seq
+        self.buckets = len(wave.chunk)
+        self.remaining = self.buckets
+        self.statistics = StatsAccumulator(wave.statistics)
+        self.chunk: List[Any] = []
+        self.rows = 0
+        self.t0 = time.perf_counter()
+        claims = getattr(wave, "claims", None)
+        if claims is not None and len(claims) != self.buckets:
+            raise ValueError(f"wave has {self.buckets} bucket-batches but {len(claims)} claims")
+        coordinates = getattr(wave, "coordinates", None)
+        self.jobs = [
+            _BucketJob(self, bucket_batch, tuple(claims[i]) if claims is not None else None,
+                       coordinates[i] if coordinates is not None else None)
+            for i, bucket_batch in enumerate(wave.chunk)
+        ]
 
 
 class ParallelBatchProcessor(BatchProcessor):
@@ -28,6 +84,7 @@ class ParallelBatchProcessor(BatchProcessor):
           into one BatchResults.
         - The returned BatchResults will not obey the max_batch_size from get_batch() because
           it represents the full wave.
+        - Waves are yielded in the order they complete, which can differ from the order they were received.
 
     Args:
         context: ETL context.
@@ -37,11 +94,44 @@ class ParallelBatchProcessor(BatchProcessor):
                 :class:`~etl_lib.core.SplittingBatchProcessor.SplittingBatchProcessor`.
         max_workers: number of parallel threads for bucket processing.
         prefetch: number of waves to prefetch.
+        tuner: optional :class:`~etl_lib.core.ParallelismTuner.ParallelismTuner` deciding how many bucket-batches
+            run at the same time, from the throughput and the transaction retries (`tx_retries`) of finished waves.
+            `max_workers` must not be smaller than the largest candidate of the tuner.
+        retry_attempts: number of times a bucket-batch failing with a transient error is retried in place. Off by
+            default, as the whole bucket-batch is written again, see below.
+        max_requeues: number of times a bucket-batch still failing after `retry_attempts` is put back behind the
+            waiting buckets it does not share a claim with, to run later with other buckets than the ones it failed
+            with.
+        retry_backoff_s: base delay before the first retry in place, doubled for each further attempt.
+        retry_max_backoff_s: upper bound of the delay before a retry in place.
+        retry_on: predicate deciding which exceptions are retried, defaults to
+            :func:`~etl_lib.core.utils.is_transient_error`.
 
     Behavior:
-        - For every wave, spins up `max_workers` threads.
-        - Each thread processes one bucket-batch using a fresh worker from `worker_factory()`.
-        - Collects and merges worker results in a fail-fast manner.
+        - One pool of `max_workers` threads is kept for the whole run.
+        - Each thread processes one bucket-batch using a fresh worker from `worker_factory()`. All batches the
+          worker yields for it are merged.
+        - Buckets are dispatched as soon as a worker is free and their claims (see
+          :attr:`ParallelBatchResult.claims`) do not intersect the claims of running buckets or of buckets
+          waiting ahead of them. A slow bucket therefore only delays the buckets it conflicts with, instead
+          of the whole next wave. Buckets sharing a claim keep their relative order.
+        - Waves without claims are processed with a barrier, as no safe overlap can be derived.
+        - A bucket-batch failing with a transient error (for example a deadlock the driver gave up on) is retried
+          in its worker thread up to `retry_attempts` times, with exponential backoff and jitter. If it still fails,
+          it is re-queued behind the waiting buckets it does not conflict with (ahead of those sharing a claim with it),
+          up to `max_requeues` times. Retries are reported as
+          `bucket_retry` events and counted as `bucket_retries`, re-queued buckets as `bucket_requeued` events and
+          `bucket_requeues`. Retried bucket-batches are written again as a whole, including rows a worker already
+          committed in an earlier transaction (the sinks may split a bucket-batch into several transactions). Only
+          enable retries if the worker's writes are idempotent, e.g. use `MERGE`, not `CREATE`.
+        - Other errors, and transient errors beyond the retries, are raised and cancel all pending buckets.
+        - If the waves carry :attr:`ParallelBatchResult.coordinates` and the predecessor has a `record_contention`
+          method (as :class:`~etl_lib.core.SplittingBatchProcessor.SplittingBatchProcessor`), the lock conflicts of
+          each bucket (its `tx_retries`, retries in place and failed attempts before a re-queue) are reported to it.
+          Its `report_contention` method is called once all buckets are written.
+        - After :meth:`request_stats_only` (which :class:`~etl_lib.core.ClosedLoopBatchProcessor.ClosedLoopBatchProcessor`
+          calls), workers are asked to drop their chunks too, and waves are yielded with empty chunks. Memory is then
+          bounded by the bucket-batches in flight instead of growing with the rows written per wave.
     """
 
     def __init__(
@@ -52,56 +142,132 @@ class ParallelBatchProcessor(BatchProcessor):
             predecessor=None,
             max_workers: int = 4,
             prefetch: int = 4,
+            tuner: Optional[ParallelismTuner] = None,
+            retry_attempts: int = 0,
+            max_requeues: int = 0,
+            retry_backoff_s: float = 0.2,
+            retry_max_backoff_s: float = 10.0,
+            retry_on: Callable[[BaseException], bool] = is_transient_error,
     ):
         super().__init__(context, task, predecessor)
+        if tuner is not None and tuner.max_workers > max_workers:
+            raise ValueError(f"tuner may ask for {tuner.max_workers} workers, but max_workers is {max_workers}")
+        if retry_attempts < 0 or max_requeues < 0:
+            raise ValueError(f"retry_attempts and max_requeues must be >= 0, got {retry_attempts}, {max_requeues}")
+        self.retry_attempts = retry_attempts
+        self.max_requeues = max_requeues
+        self.retry_backoff_s = retry_backoff_s
+        self.retry_max_backoff_s = retry_max_backoff_s
+        self.retry_on = retry_on
         self.worker_factory = worker_factory
         self.max_workers = max_workers
         self.prefetch = prefetch
+        self.tuner = tuner
+        self._worker_limit = tuner.workers if tuner is not None else max_workers
 
-    def _process_wave(self, wave: ParallelBatchResult) -> BatchResults:
+    def _finish_wave(self, state: _WaveState) -> BatchResults:
         """
-        Process one wave: run one worker per bucket-batch and merge their BatchResults.
-
-        Statistics:
-            `wave.statistics` is used as the initial merged stats, then merged with each worker's stats.
+        Build the merged BatchResults of a wave whose bucket-batches are all processed.
         """
-        t0 = time.perf_counter()
-        merged_stats = dict(wave.statistics or {})
-        merged_chunk = []
-        total = 0
-
-        self.logger.debug(f"Processing wave with {len(wave.chunk)} buckets")
-
-        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="PBP_worker_") as pool:
-            futures = [pool.submit(self._process_bucket_batch, bucket_batch) for bucket_batch in wave.chunk]
-            try:
-                for f in as_completed(futures):
-                    out = f.result()
-                    merged_stats = merge_summary(merged_stats, out.statistics or {})
-                    total += out.batch_size
-                    merged_chunk.extend(out.chunk if isinstance(out.chunk, list) else [out.chunk])
-            except Exception as e:
-                self.logger.exception("bucket processing failed")
-                for g in futures:
-                    g.cancel()
-                pool.shutdown(cancel_futures=True)
-                raise
-
-        self.logger.debug(f"Finished wave with stats={merged_stats}")
-        dt_ms = (time.perf_counter() - t0) * 1000.0
+        statistics = state.statistics.to_dict()
+        self.logger.debug(f"Finished wave with stats={statistics}")
+        dt_ms = (time.perf_counter() - state.t0) * 1000.0
         self._instrument("parallel_wave_done", {
-            "buckets": len(wave.chunk),
-            "rows": total,
-            "max_workers": self.max_workers,
+            "buckets": state.buckets,
+            "rows": state.rows,
+            "max_workers": self._worker_limit,
             "prefetch": self.prefetch,
             "dt_ms": round(dt_ms, 3),
         })
-        return BatchResults(chunk=merged_chunk, statistics=merged_stats, batch_size=total)
+        if self.tuner is not None and state.buckets:
+            self._tune(state)
+        return BatchResults(chunk=state.chunk, statistics=statistics, batch_size=state.rows)
+
+    def _tune(self, state: _WaveState):
+        """
+        Report a finished wave to the tuner and apply the worker count it asks for.
+        """
+        trial = self.tuner.record(state.rows, state.statistics.get("tx_retries", 0))
+        if trial is not None:
+            self._instrument("autotune_trial", {
+                "max_workers": trial.workers,
+                "rows": trial.rows,
+                "tx_retries": trial.retries,
+                "dt_ms": round(trial.seconds * 1000.0, 3),
+            })
+        if self.tuner.workers != self._worker_limit:
+            self.logger.debug(f"worker limit {self._worker_limit} -> {self.tuner.workers}")
+            self._worker_limit = self.tuner.workers
+
+    @staticmethod
+    def _can_start(job: _BucketJob, blocked: Set[Any], barrier_waves: Set[int], active_waves: Set[int]) -> bool:
+        """
+        Decide if `job` may start, given the jobs running or waiting ahead of it.
+
+        Args:
+            job: Candidate job.
+            blocked: Claims held by jobs running or waiting ahead.
+            barrier_waves: Sequence numbers of waves without claims that are running or waiting ahead.
+            active_waves: Sequence numbers of all waves that are running or waiting ahead.
+        """
+        seq = job.wave.seq
+        if job.claims is None:
+            return active_waves <= {seq}
+        if barrier_waves - {seq}:
+            return False
+        return blocked.isdisjoint(job.claims)
+
+    @staticmethod
+    def _enqueue_ahead(waiting: List[_BucketJob], job: _BucketJob) -> None:
+        """
+        Put the re-queued `job` back into `waiting`, ahead of the first job it conflicts with, so that buckets sharing
+        a claim keep their relative order. Jobs it does not conflict with can still start before it.
+        """
+        for i, other in enumerate(waiting):
+            if job.claims is None or other.claims is None:
+                # waves without claims run behind a barrier, they conflict with every other wave
+                conflict = other.wave is not job.wave
+            else:
+                conflict = not set(job.claims).isdisjoint(other.claims)
+            if conflict:
+                waiting.insert(i, job)
+                return
+        waiting.append(job)
+
+    def _dispatch(self, pool: ThreadPoolExecutor, waiting: List[_BucketJob], running: Dict[Future, _BucketJob]):
+        """
+        Submit every waiting job that can start without conflicting with running jobs or jobs ahead of it.
+        """
+        if len(running) >= self._worker_limit or not waiting:
+            return
+
+        blocked: Set[Any] = set()
+        barrier_waves: Set[int] = set()
+        active_waves: Set[int] = set()
+
+        def block(j: _BucketJob):
+            active_waves.add(j.wave.seq)
+            if j.claims is None:
+                barrier_waves.add(j.wave.seq)
+            else:
+                blocked.update(j.claims)
+
+        for job in running.values():
+            block(job)
+
+        still_waiting: List[_BucketJob] = []
+        for job in waiting:
+            if len(running) < self._worker_limit and self._can_start(job, blocked, barrier_waves, active_waves):
+                running[pool.submit(self._process_bucket_with_retry, job.batch)] = job
+            else:
+                still_waiting.append(job)
+            block(job)
+        waiting[:] = still_waiting
 
     def get_batch(self, max_batch_size: int) -> Generator[BatchResults, None, None]:
         """
-        Pull waves from the predecessor (prefetching up to `prefetch` ahead), process each wave's
-        buckets in parallel, and yield one flattened BatchResults per wave.
+        Pull waves from the predecessor (prefetching up to `prefetch` ahead), process the buckets of
+        all admitted waves in parallel, and yield one flattened BatchResults per wave.
         """
         wave_queue: queue.Queue[ParallelBatchResult | object] = queue.Queue(self.prefetch)
         SENTINEL = object()
@@ -122,14 +288,74 @@ class ParallelBatchProcessor(BatchProcessor):
 
         threading.Thread(target=producer, daemon=True, name="prefetcher").start()
 
-        while True:
-            wave = wave_queue.get()
-            if wave is SENTINEL:
-                if exc is not None:
-                    self.logger.error("Upstream producer failed", exc_info=True)
-                    raise exc
-                break
-            yield self._process_wave(cast(ParallelBatchResult, wave))
+        waiting: List[_BucketJob] = []
+        running: Dict[Future, _BucketJob] = {}
+        open_waves = 0
+        seq = 0
+        upstream_done = False
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="PBP_worker_") as pool:
+            try:
+                while True:
+                    # admit waves while there is room, only block if there is nothing else to do
+                    while not upstream_done and open_waves <= self.prefetch:
+                        try:
+                            wave = wave_queue.get(block=not running and not waiting)
+                        except queue.Empty:
+                            break
+                        if wave is SENTINEL:
+                            upstream_done = True
+                            if exc is not None:
+                                self.logger.error("Upstream producer failed", exc_info=exc)
+                                raise exc
+                            break
+                        state = _WaveState(seq, cast(ParallelBatchResult, wave))
+                        seq += 1
+                        self.logger.debug(f"Admitting wave with {state.buckets} buckets")
+                        if state.remaining == 0:
+                            yield self._finish_wave(state)
+                            continue
+                        open_waves += 1
+                        waiting.extend(state.jobs)
+
+                    self._dispatch(pool, waiting, running)
+
+                    if not running:
+                        if upstream_done:
+                            report_contention = getattr(self.predecessor, "report_contention", None)
+                            if report_contention is not None:
+                                report_contention()
+                            break
+                        continue
+
+                    done, _ = wait(running, return_when=FIRST_COMPLETED)
+                    for f in done:
+                        job = running.pop(f)
+                        try:
+                            out = f.result()
+                        except Exception as e:
+                            if self._requeue(job, e):
+                                self._enqueue_ahead(waiting, job)
+                                continue
+                            self.logger.exception("bucket processing failed")
+                            raise
+                        job.batch = None
+                        self._record_contention(job, out.statistics.get("tx_retries", 0)
+                                                + out.statistics.get("bucket_retries", 0))
+                        state = job.wave
+                        state.statistics.add(out.statistics)
+                        state.rows += out.batch_size
+                        if not self.stats_only:
+                            state.chunk.extend(out.chunk if isinstance(out.chunk, list) else [out.chunk])
+                        state.remaining -= 1
+                        if state.remaining == 0:
+                            open_waves -= 1
+                            yield self._finish_wave(state)
+            except BaseException:
+                for g in running:
+                    g.cancel()
+                pool.shutdown(cancel_futures=True)
+                raise
 
     class SingleBatchWrapper(BatchProcessor):
         """
@@ -148,6 +374,63 @@ class ParallelBatchProcessor(BatchProcessor):
                 batch_size=len(self._batch),
             )
 
+    def _record_contention(self, job: _BucketJob, conflicts: int) -> None:
+        """
+        Report `conflicts` lock conflicts of `job` to the predecessor, if it takes them.
+        """
+        if not conflicts or job.coordinate is None:
+            return
+        record_contention = getattr(self.predecessor, "record_contention", None)
+        if record_contention is not None:
+            record_contention(*job.coordinate, conflicts)
+
+    def _requeue(self, job: _BucketJob, error: Exception) -> bool:
+        """
+        Decide if `job`, which failed with `error` after its retries in place, is put back into the waiting jobs.
+        """
+        if job.requeues >= self.max_requeues or not self.retry_on(error):
+            return False
+        job.requeues += 1
+        job.wave.statistics.increment("bucket_requeues")
+        self._record_contention(job, self.retry_attempts + 1)
+        self.logger.warning(f"re-queueing bucket of {len(job.batch)} rows ({job.requeues}/{self.max_requeues}) "
+                            f"after {error!r}")
+        self._instrument("bucket_requeued", {
+            "rows": len(job.batch),
+            "attempt": job.requeues,
+            "error": _error_name(error),
+        })
+        return True
+
+    def _process_bucket_with_retry(self, bucket_batch):
+        """
+        :meth:`_process_bucket_batch`, retried up to `retry_attempts` times with exponential backoff and jitter if
+        it fails with an error accepted by `retry_on`.
+        """
+        attempt = 0
+        while True:
+            try:
+                result = self._process_bucket_batch(bucket_batch)
+            except Exception as e:
+                if attempt >= self.retry_attempts or not self.retry_on(e):
+                    raise
+                attempt += 1
+                delay = min(self.retry_max_backoff_s, self.retry_backoff_s * 2 ** (attempt - 1))
+                # equal jitter: buckets failing together (e.g. both sides of a deadlock) do not retry together
+                delay = delay / 2 + random.uniform(0, delay / 2)
+                self.logger.info(f"retrying bucket of {len(bucket_batch)} rows in {delay:.3f}s after {e!r}")
+                self._instrument("bucket_retry", {
+                    "rows": len(bucket_batch),
+                    "attempt": attempt,
+                    "backoff_ms": round(delay * 1000.0, 3),
+                    "error": _error_name(e),
+                })
+                time.sleep(delay)
+                continue
+            if attempt:
+                result.statistics = {**result.statistics, "bucket_retries": attempt}
+            return result
+
     def _process_bucket_batch(self, bucket_batch):
         """
         Process one bucket-batch by running a fresh worker over it.
@@ -156,8 +439,22 @@ class ParallelBatchProcessor(BatchProcessor):
         wrapper = self.SingleBatchWrapper(self.context, bucket_batch)
         worker = self.worker_factory()
         worker.predecessor = wrapper
+        if self.stats_only:
+            worker.request_stats_only()
         start = time.perf_counter()
-        result = next(worker.get_batch(len(bucket_batch)))
+        results = list(worker.get_batch(len(bucket_batch)))
+        if len(results) == 1:
+            result = results[0]
+        else:
+            # workers may write a bucket-batch in several steps, e.g. a sink with an adaptive batch size
+            chunk: List[Any] = []
+            statistics = StatsAccumulator()
+            for r in results:
+                if not self.stats_only:
+                    chunk.extend(r.chunk if isinstance(r.chunk, list) else [r.chunk])
+                statistics.add(r.statistics)
+            result = BatchResults(chunk=chunk, statistics=statistics.to_dict(),
+                                  batch_size=sum(r.batch_size for r in results))
         elapsed_ms = (time.perf_counter() - start) * 1000.0
         self._instrument("bucket_done", {
             "rows": result.batch_size,
@@ -165,3 +462,10 @@ class ParallelBatchProcessor(BatchProcessor):
         })
         self.logger.debug(f"Finished bucket batch stats={result.statistics}")
         return result
+
+
+def _error_name(error: BaseException) -> str:
+    """
+    Neo4j status code of `error`, or its class name for other errors.
+    """
+    return getattr(error, "code", None) or type(error).__name__
@@ -0,0 +1,255 @@
+import csv
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+
+class HistoryEntry(NamedTuple):
+    """
+    Best setting of a parallel load found in past instrumentation output.
+    """
+    table_size: int
+    max_workers: int
+    rows_per_s: float
+
+
+@dataclass
+class Trial:
+    """
+    Throughput measured while running with one number of workers.
+    """
+    workers: int
+    rows: int = 0
+    seconds: float = 0.0
+    retries: int = 0
+    waves: int = 0
+
+    @property
+    def rows_per_s(self) -> float:
+        return self.rows / self.seconds if self.seconds > 0 else 0.0
+
+    @property
+    def retries_per_row(self) -> float:
+        return self.retries / self.rows if self.rows else 0.0
+
+
+class ParallelismTuner:
+    """
+    Chooses the number of concurrently processed bucket-batches of a
+    :class:`~etl_lib.core.ParallelBatchProcessor.ParallelBatchProcessor` from measured throughput.
+
+    The processor runs a few calibration waves with each candidate worker count, in ascending order, and reports the
+    rows and transaction retries of every finished wave via :meth:`record`. Once a candidate is clearly slower than
+    the best one so far (more lock waits and deadlock retries than extra parallelism pays for), or all candidates are
+    tried, the tuner settles for the rest of the run.
+
+    Among the candidates within `tolerance` of the best throughput, the one with the fewest retries per row is
+    chosen, then the one with the fewest workers.
+
+    Args:
+        candidates: Worker counts to try.
+        waves_per_trial: Waves to measure per candidate. One more wave is skipped after each switch, while jobs
+            started with the previous worker count are still running.
+        tolerance: Relative throughput difference regarded as noise.
+    """
+
+    def __init__(self, candidates: Sequence[int], waves_per_trial: int = 3, tolerance: float = 0.05):
+        candidates = sorted(set(int(c) for c in candidates))
+        if not candidates or candidates[0] < 1:
+            raise ValueError(f"candidates must be positive worker counts, got {candidates}")
+        if waves_per_trial < 1:
+            raise ValueError(f"waves_per_trial must be >= 1, got {waves_per_trial}")
+        self.candidates = candidates
+        self.waves_per_trial = waves_per_trial
+        self.tolerance = tolerance
+        self.trials: List[Trial] = [Trial(candidates[0])]
+        self._settled: Optional[int] = None if len(candidates) > 1 else candidates[0]
+        self._mark: Optional[float] = None
+        self._skip = 0
+
+    @classmethod
+    def around(cls, table_size: int, max_workers: Optional[int] = None, **kwargs) -> "ParallelismTuner":
+        """
+        Create a tuner with candidates spread over `1..table_size`, or around `max_workers` if given.
+
+        A wave of a `table_size` grid has at most `table_size` bucket-batches, more workers are never useful.
+        """
+        step = max(1, table_size // 4)
+        if max_workers is None:
+            candidates = {step, 2 * step, 3 * step, table_size}
+        else:
+            candidates = {max_workers - step, max_workers, max_workers + step}
+        return cls([c for c in candidates if 1 <= c <= table_size] or [table_size], **kwargs)
+
+    @property
+    def workers(self) -> int:
+        """
+        Number of workers to use now.
+        """
+        return self._settled if self._settled is not None else self.trials[-1].workers
+
+    @property
+    def max_workers(self) -> int:
+        """
+        Largest number of workers the tuner may ask for.
+        """
+        return self.candidates[-1]
+
+    @property
+    def settled(self) -> bool:
+        """
+        True once calibration is over.
+        """
+        return self._settled is not None
+
+    def record(self, rows: int, retries: int = 0, now: Optional[float] = None) -> Optional[Trial]:
+        """
+        Account a finished wave to the current candidate.
+
+        Args:
+            rows: Rows of the wave.
+            retries: Transaction retries while processing the wave.
+            now: Completion time as given by `time.perf_counter()`, defaults to now.
+
+        Returns:
+            The trial that was completed by this wave, if any.
+        """
+        now = time.perf_counter() if now is None else now
+        mark, self._mark = self._mark, now
+        if self.settled:
+            return None
+        if mark is None:
+            # the interval before the first wave includes filling the pipeline
+            return None
+        if self._skip:
+            self._skip -= 1
+            return None
+
+        trial = self.trials[-1]
+        trial.rows += rows
+        trial.retries += retries
+        trial.seconds += now - mark
+        trial.waves += 1
+        if trial.waves < self.waves_per_trial:
+            return None
+
+        best = max(self.trials, key=lambda t: t.rows_per_s)
+        next_index = self.candidates.index(trial.workers) + 1
+        if trial.rows_per_s < best.rows_per_s * (1.0 - self.tolerance) or next_index == len(self.candidates):
+            self._settled = self.best().workers
+        else:
+            self.trials.append(Trial(self.candidates[next_index]))
+            self._skip = 1
+        return trial
+
+    def best(self) -> Trial:
+        """
+        Best trial measured so far.
+        """
+        measured = [t for t in self.trials if t.waves] or self.trials
+        top = max(t.rows_per_s for t in measured)
+        good = [t for t in measured if t.rows_per_s >= top * (1.0 - self.tolerance)]
+        return min(good, key=lambda t: (t.retries_per_row, t.workers))
+
+
+def best_from_instrumentation(path: Path, task_name: str, table_size: Optional[int] = None,
+                              min_waves: int = 3) -> Optional[HistoryEntry]:
+    """
+    Find the fastest `table_size`/`max_workers` setting of past runs of a task in a CSV instrumentation file.
+
+    Throughput of a run is taken from its `parallel_wave_done` events: the rows of all waves but the first, divided by
+    the time between the first and the last wave. Runs with varying worker counts are split into segments of equal
+    worker counts. The grid size comes from the `splitter_flush` events of the same run.
+
+    Args:
+        path: CSV file written by :class:`~etl_lib.core.InstrumentationWriter.CsvInstrumentationWriter`.
+        task_name: Name of the task, as reported by :meth:`~etl_lib.core.Task.Task.task_name`.
+        table_size: Only consider runs with this grid size, if given.
+        min_waves: Minimum number of waves of a segment to be considered.
+
+    Returns:
+        Best setting found, or `None` if the file does not exist or has no usable runs.
+    """
+    if not path.exists():
+        return None
+
+    table_sizes: Dict[str, int] = {}
+    waves: Dict[str, List[Tuple[datetime, int, int]]] = defaultdict(list)
+    with path.open(newline="", encoding="utf-8") as file:
+        for event in csv.DictReader(file):
+            if event.get("task_name") != task_name:
+                continue
+            try:
+                if event.get("event_type") == "splitter_flush" and event.get("table_size"):
+                    table_sizes[event["task_uuid"]] = int(event["table_size"])
+                elif event.get("event_type") == "parallel_wave_done":
+                    waves[event["task_uuid"]].append(
+                        (datetime.fromisoformat(event["ts"]), int(event["rows"]), int(event["max_workers"])))
+            except (KeyError, ValueError):
+                continue
+
+    best: Optional[HistoryEntry] = None
+    for task_uuid, events in waves.items():
+        if task_uuid not in table_sizes or table_size not in (None, table_sizes[task_uuid]):
+            continue
+        for segment in _segments(sorted(events)):
+            if len(segment) < min_waves:
+                continue
+            seconds = (segment[-1][0] - segment[0][0]).total_seconds()
+            if seconds <= 0:
+                continue
+            rate = sum(rows for _, rows, _ in segment[1:]) / seconds
+            if best is None or rate > best.rows_per_s:
+                best = HistoryEntry(table_sizes[task_uuid], segment[0][2], rate)
+    return best
+
+
+def _segments(events: List[Tuple[datetime, int, int]]) -> List[List[Tuple[datetime, int, int]]]:
+    """
+    Split `events` into runs of consecutive events with the same worker count.
+    """
+    segments: List[List[Tuple[datetime, int, int]]] = []
+    for event in events:
+        if segments and segments[-1][-1][2] == event[2]:
+            segments[-1].append(event)
+        else:
+            segments.append([event])
+    return segments
+
+
+def autotune_parallel_load(context, task, table_size: int) -> Tuple[ParallelismTuner, int]:
+    """
+    Create the worker count tuner for a parallel load task and recommend a grid size.
+
+    If CSV instrumentation is configured (or `ETL_LIB_INSTRUMENT_CSV_PATH` points to the output of earlier runs) and
+    holds past runs of `task` with the same grid size, the worker counts
+    around the fastest of them are calibrated, otherwise worker counts over the whole range are.
+
+    The grid is defined by the id extractor of the task and is therefore not changed. If past runs with another grid
+    size were faster, that size is returned (and logged) as recommendation.
+
+    Args:
+        context: :class:`~etl_lib.core.ETLContext.ETLContext` of the task.
+        task: The task to tune.
+        table_size: Grid size of the current run.
+
+    Returns:
+        Tuple of the tuner to pass to the :class:`~etl_lib.core.ParallelBatchProcessor.ParallelBatchProcessor`
+        and the grid size of the fastest known run.
+    """
+    writer = getattr(context, "instrumentation_writer", None)
+    path = getattr(writer, "path", None) or context.env("ETL_LIB_INSTRUMENT_CSV_PATH")
+    if not path:
+        return ParallelismTuner.around(table_size), table_size
+
+    same_grid = best_from_instrumentation(Path(path), task.task_name(), table_size=table_size)
+    any_grid = best_from_instrumentation(Path(path), task.task_name())
+    tuner = ParallelismTuner.around(table_size, same_grid.max_workers if same_grid is not None else None)
+    if any_grid is None or any_grid.table_size == table_size:
+        return tuner, table_size
+    task.logger.warning(f"past runs with table_size={any_grid.table_size} were faster "
+                        f"({any_grid.rows_per_s:.0f} rows/s), this run uses table_size={table_size}")
+    return tuner, any_grid.table_size
@@ -0,0 +1,116 @@
+import queue
+import threading
+import time
+from typing import Generator, Optional
+
+from etl_lib.core.BatchProcessor import BatchProcessor, BatchResults
+
+_PUT_POLL_S = 0.1
+
+
+class PipelinedBatchProcessor(BatchProcessor):
+    """
+    BatchProcessor that runs its predecessor in a separate thread and hands the batches over through a bounded queue.
+
+    The chain of BatchProcessors is a chain of generators, so normally reading, validating and writing a batch happen
+    strictly one after the other. Inserting this processor lets everything upstream of it work on the next batches
+    while everything downstream (for example the Neo4j round trip of a
+    :class:`~etl_lib.data_sink.CypherBatchSink.CypherBatchSink`) is busy. This pays off for I/O-bound steps, which
+    release the GIL while they wait.
+
+    Note:
+        - Batches are passed on unchanged and in order.
+        - The predecessor chain runs entirely in the stage thread, the processors downstream in the calling thread.
+        - Exceptions raised upstream are re-raised in the calling thread.
+        - If the consumer stops early, the stage thread stops after the batch it is working on.
+
+    Each batch handed over emits a `pipeline_batch` instrumentation event with the `queue_depth` found by the consumer,
+    the time the consumer waited for the batch (`consumer_blocked_ms`) and the time the stage thread waited for room in
+    the queue before it could put the batch (`producer_blocked_ms`). A mostly empty queue with high consumer wait time
+    means the upstream side is the bottleneck, a full queue with high producer wait time means the downstream side is.
+
+    Args:
+        context: ETL context.
+        task: optional Task for reporting.
+        predecessor: upstream BatchProcessor to run in the stage thread.
+        queue_size: maximum number of batches prepared ahead.
+        name: name of the stage in instrumentation events and of the thread, defaults to the predecessor class name.
+    """
+
+    def __init__(self, context, task=None, predecessor=None, queue_size: int = 2, name: Optional[str] = None):
+        super().__init__(context, task, predecessor)
+        if queue_size < 1:
+            raise ValueError(f"queue_size must be >= 1, got {queue_size}")
+        self.queue_size = queue_size
+        self.name = name
+
+    def request_stats_only(self) -> None:
+        super().request_stats_only()
+        if self.predecessor is not None:
+            self.predecessor.request_stats_only()
+
+    def get_batch(self, max_batch_size: int) -> Generator[BatchResults, None, None]:
+        if self.predecessor is None:
+            raise ValueError(f"{self.__class__.__name__} requires a predecessor")
+
+        stage = self.name or self.predecessor.__class__.__name__
+        handover: queue.Queue = queue.Queue(self.queue_size)
+        stop = threading.Event()
+        SENTINEL = object()
+        exc: BaseException | None = None
+        producer_blocked_s = 0.0
+
+        def put(item) -> bool:
+            nonlocal producer_blocked_s
+            start = time.perf_counter()
+            try:
+                while not stop.is_set():
+                    try:
+                        handover.put(item, timeout=_PUT_POLL_S)
+                        return True
+                    except queue.Full:
+                        continue
+                return False
+            finally:
+                producer_blocked_s += time.perf_counter() - start
+
+        def producer():
+            nonlocal exc
+            batches = self.predecessor.get_batch(max_batch_size)
+            try:
+                for batch in batches:
+                    if not put(batch):
+                        break
+            except BaseException as e:
+                exc = e
+            finally:
+                batches.close()
+                put(SENTINEL)
+
+        thread = threading.Thread(target=producer, daemon=True, name=f"pipeline-{stage}")
+        thread.start()
+        reported_blocked_s = 0.0
+        try:
+            while True:
+                depth = handover.qsize()
+                start = time.perf_counter()
+                batch = handover.get()
+                consumer_blocked_ms = (time.perf_counter() - start) * 1000.0
+                if batch is SENTINEL:
+                    break
+                # producer wait time accumulated since the previous batch was handed over
+                total_blocked_s = producer_blocked_s
+                blocked_s, reported_blocked_s = total_blocked_s - reported_blocked_s, total_blocked_s
+                self._instrument("pipeline_batch", {
+                    "stage": stage,
+                    "rows": len(batch.chunk),
+                    "queue_depth": depth,
+                    "consumer_blocked_ms": round(consumer_blocked_ms, 3),
+                    "producer_blocked_ms": round(blocked_s * 1000.0, 3),
+                })
+                yield batch
+            if exc is not None:
+                raise exc
+        finally:
+            stop.set()
+            thread.join()
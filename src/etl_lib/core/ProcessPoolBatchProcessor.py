@@ -0,0 +1,166 @@
+import os
+import time
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Any, Callable, Dict, Generator, Iterable, Iterator, Optional, Tuple
+
+from etl_lib.core.BatchProcessor import BatchProcessor, BatchResults
+from etl_lib.core.SharedMemoryTransport import SharedChunk, SharedMemoryTransport
+from etl_lib.core.utils import merge_summary
+
+
+def ordered_map(executor: Executor, fn: Callable[..., Any], items: Iterable[Any], max_in_flight: int,
+                *args, on_discard: Optional[Callable[[Any], None]] = None) -> Iterator[Tuple[Any, Any, float]]:
+    """
+    Submit `fn(*args, item)` for each item to `executor` and yield the results in the order of `items`.
+
+    At most `max_in_flight` calls are pending at any time, so `items` is consumed lazily.
+
+    Args:
+        executor: Executor to run the calls on.
+        fn: Callable to apply. Must be picklable for process pools.
+        items: Items to process.
+        max_in_flight: Maximum number of submitted but not yet yielded calls.
+        args: Leading arguments passed to each call of `fn`.
+        on_discard: Called with the result of each call that completes but is not yielded, because iteration stopped
+            early or failed. Useful to release resources held by results.
+
+    Returns:
+        Iterator of `(item, result, submitted_at)` tuples, `submitted_at` as given by `time.perf_counter()`.
+        The first exception raised by a call is re-raised when its result is reached; pending calls are cancelled.
+    """
+    if max_in_flight < 1:
+        raise ValueError(f"max_in_flight must be >= 1, got {max_in_flight}")
+    in_flight: deque = deque()
+    try:
+        for item in items:
+            in_flight.append((item, executor.submit(fn, *args, item), time.perf_counter()))
+            if len(in_flight) >= max_in_flight:
+                done_item, future, submitted_at = in_flight.popleft()
+                yield done_item, future.result(), submitted_at
+        while in_flight:
+            done_item, future, submitted_at = in_flight.popleft()
+            yield done_item, future.result(), submitted_at
+    finally:
+        for _, future, _ in in_flight:
+            if not future.cancel() and on_discard is not None:
+                future.add_done_callback(lambda f: on_discard(f.result()) if f.exception() is None else None)
+
+
+class ProcessPoolBatchProcessor(BatchProcessor):
+    """
+    BatchProcessor that applies a function to each batch of its predecessor in a pool of worker processes.
+
+    Meant for CPU-bound steps (transformations, parsing) that do not scale with threads because of the GIL.
+
+    Note:
+        - `fn` receives the chunk of a batch and returns a :class:`~etl_lib.core.BatchProcessor.BatchResults`.
+          It must be picklable, i.e. a module level function (use `functools.partial` to bind arguments).
+        - Chunks and results are pickled to and from the worker processes, the function should therefore reduce
+          rather than grow the data where possible.
+        - Batches are yielded in the order they were received from the predecessor.
+        - The statistics returned by `fn` are merged with the statistics of the incoming batch.
+
+    Args:
+        context: ETL context.
+        fn: Function `fn(chunk) -> BatchResults` executed in the worker processes.
+        task: optional Task for reporting.
+        predecessor: upstream BatchProcessor.
+        processes: number of worker processes, defaults to the number of CPUs.
+        max_in_flight: maximum number of batches submitted but not yet yielded, defaults to twice `processes`.
+        mp_context: optional `multiprocessing` context, for example to force the `spawn` start method.
+        transport: optional :class:`~etl_lib.core.SharedMemoryTransport.SharedMemoryTransport` to move chunks to and
+            from the worker processes through shared memory instead of pickling them through a pipe.
+    """
+
+    def __init__(
+            self,
+            context,
+            fn: Callable[[Any], BatchResults],
+            task=None,
+            predecessor=None,
+            processes: Optional[int] = None,
+            max_in_flight: Optional[int] = None,
+            mp_context=None,
+            transport: Optional[SharedMemoryTransport] = None,
+    ):
+        super().__init__(context, task, predecessor)
+        self.fn = fn
+        self.processes = processes or os.cpu_count() or 1
+        self.max_in_flight = max_in_flight or 2 * self.processes
+        self.mp_context = mp_context
+        self.transport = transport
+
+    def get_batch(self, max_batch_size: int) -> Generator[BatchResults, None, None]:
+        if self.predecessor is None:
+            raise ValueError(f"{self.__class__.__name__} requires a predecessor")
+
+        if self.transport is not None:
+            yield from self._get_batch_shared(max_batch_size)
+            return
+
+        with ProcessPoolExecutor(max_workers=self.processes, mp_context=self.mp_context) as pool:
+            batches = self.predecessor.get_batch(max_batch_size)
+            for batch, result, submitted_at in ordered_map(pool, _apply_to_chunk, batches, self.max_in_flight, self.fn):
+                self._instrument("process_batch_done", {
+                    "rows": result.batch_size,
+                    "processes": self.processes,
+                    "dt_ms": round((time.perf_counter() - submitted_at) * 1000.0, 3),
+                })
+                yield BatchResults(
+                    chunk=result.chunk,
+                    statistics=merge_summary(batch.statistics or {}, result.statistics or {}),
+                    batch_size=result.batch_size,
+                )
+
+    def _get_batch_shared(self, max_batch_size: int) -> Generator[BatchResults, None, None]:
+        """
+        :meth:`get_batch` moving chunks through shared memory, only the handles are pickled.
+        """
+        unreceived: Dict[str, SharedChunk] = {}
+
+        def shared_batches():
+            for batch in self.predecessor.get_batch(max_batch_size):
+                handle = self.transport.send(batch.chunk)
+                unreceived[handle.name] = handle
+                yield BatchResults(chunk=handle, statistics=batch.statistics, batch_size=batch.batch_size)
+
+        with ProcessPoolExecutor(max_workers=self.processes, mp_context=self.mp_context) as pool:
+            results = ordered_map(pool, _apply_to_shared_chunk, shared_batches(), self.max_in_flight, self.fn,
+                                  self.transport, on_discard=lambda r: SharedMemoryTransport.discard(r.chunk))
+            try:
+                for batch, result, submitted_at in results:
+                    unreceived.pop(batch.chunk.name, None)
+                    chunk = self.transport.receive(result.chunk)
+                    self._instrument("process_batch_done", {
+                        "rows": result.batch_size,
+                        "processes": self.processes,
+                        "dt_ms": round((time.perf_counter() - submitted_at) * 1000.0, 3),
+                    })
+                    yield BatchResults(
+                        chunk=chunk,
+                        statistics=merge_summary(batch.statistics or {}, result.statistics or {}),
+                        batch_size=result.batch_size,
+                    )
+            finally:
+                # blocks of batches that were cancelled or failed are owned by nobody else
+                results.close()
+                pool.shutdown(wait=True, cancel_futures=True)
+                for handle in unreceived.values():
+                    SharedMemoryTransport.discard(handle)
+
+
+def _apply_to_shared_chunk(fn: Callable[[Any], BatchResults], transport: SharedMemoryTransport,
+                           batch: BatchResults) -> BatchResults:
+    """
+    Run `fn` on a chunk received through shared memory and send the resulting chunk back the same way.
+    """
+    result = fn(transport.receive(batch.chunk))
+    return BatchResults(chunk=transport.send(result.chunk), statistics=result.statistics, batch_size=result.batch_size)
+
+
+def _apply_to_chunk(fn: Callable[[Any], BatchResults], batch: BatchResults) -> BatchResults:
+    """
+    Run `fn` on the chunk of `batch` in a worker process. Only the chunk is used, statistics are merged in the parent.
+    """
+    return fn(batch.chunk)
@@ -1,5 +1,6 @@
 import logging
 from datetime import datetime, timezone
+from typing import Mapping
 
 from tabulate import tabulate
 
@@ -114,7 +115,7 @@ class ProgressReporter:
         self.logger.info(report)
         return task
 
-    def report_progress(self, task: Task, batches: int, expected_batches: int, stats: dict) -> None:
+    def report_progress(self, task: Task, batches: int, expected_batches: int, stats: Mapping) -> None:
         """
         Optionally provide updates during execution of a task, such as batches processed so far.
 
@@ -125,7 +126,8 @@ class ProgressReporter:
             batches: Number of batches processed so far.
             expected_batches: Number of expected batches. Can be `None` if the overall number of
                 batches is not known before execution.
-            stats: dict of statistics so far (such as `nodes_created`).
+            stats: Statistics so far (such as `nodes_created`). Can be a live
+                :class:`~etl_lib.core.StatsAccumulator.StatsAccumulator`, copy it to keep a snapshot.
         """
         pass
 
@@ -224,8 +226,8 @@ class Neo4jProgressReporter(ProgressReporter):
         with self.context.neo4j.session(self.database) as session:
             session.run("CREATE CONSTRAINT etl_task_unique IF NOT EXISTS FOR (n:ETLTask) REQUIRE n.uuid IS UNIQUE;")
 
-    def report_progress(self, task: Task, batches: int, expected_batches: int, stats: dict) -> None:
-        self.logger.debug(f"{batches=}, {expected_batches=}, {stats=}")
+    def report_progress(self, task: Task, batches: int, expected_batches: int, stats: Mapping) -> None:
+        self.logger.debug("batches=%s, expected_batches=%s, stats=%s", batches, expected_batches, stats)
         with self.context.neo4j.session(self.database) as session:
             session.run("MATCH (t:ETLTask {uuid:$id}) SET t.batches =$batches, t.expected_batches =$expected_batches",
                         id=task.uuid, batches=batches, expected_batches=expected_batches)
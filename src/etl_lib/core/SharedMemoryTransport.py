@@ -0,0 +1,179 @@
+import ctypes
+import pickle
+from multiprocessing import resource_tracker, shared_memory
+from typing import Any, NamedTuple
+
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
+
+from etl_lib.core.utils import is_columnar
+
+FORMAT_PICKLE = "pickle"
+FORMAT_ARROW = "arrow"
+FORMAT_ARROW_ROWS = "arrow-rows"
+
+
+class SharedChunk(NamedTuple):
+    """
+    Handle of a chunk stored in a shared memory block.
+
+    The handle is small and cheap to pickle, it is what travels between processes instead of the chunk itself.
+    """
+    name: str
+    """Name of the shared memory block."""
+    size: int
+    """Number of bytes of the serialized chunk."""
+    format: str
+    """Serialization used, one of `pickle`, `arrow` or `arrow-rows`."""
+    rows: int
+    """Number of rows in the chunk."""
+
+
+class _SharedBuffer:
+    """
+    Keeps a shared memory block mapped as long as Arrow buffers reference its memory.
+    """
+
+    def __init__(self, shm: shared_memory.SharedMemory, size: int):
+        self._shm = shm
+        self._anchor = ctypes.c_char.from_buffer(shm.buf)
+        self.buffer = pa.foreign_buffer(ctypes.addressof(self._anchor), size, base=self)
+
+    def __del__(self):
+        self._anchor = None
+        self._shm.close()
+
+
+class SharedMemoryTransport:
+    """
+    Moves batch chunks between processes through `multiprocessing.shared_memory` instead of pipes.
+
+    The sending process serializes a chunk directly into a new shared memory block with :meth:`send` and passes the
+    returned :class:`SharedChunk` handle to the receiving process, for example as an argument of a process pool task.
+    The receiving process calls :meth:`receive` exactly once per handle, which takes ownership of the block and
+    removes it.
+
+    Serialization:
+        - Columnar chunks (`pyarrow.RecordBatch` or `pyarrow.Table`) are written in the Arrow IPC stream format and are
+          received without copying: the returned batch references the shared memory, which stays mapped as long as
+          the batch (or anything sliced from it) is alive.
+        - Lists of rows are pickled by default, which preserves them exactly.
+        - With `rows_as_arrow=True`, lists of dicts are converted to Arrow for the transfer and back to dicts on
+          receive. This is faster and more compact for flat rows with consistent types, but not lossless: keys
+          missing in some rows come back as `None`. Rows that cannot be converted fall back to pickle.
+
+    The transport object holds no state besides its configuration and can be pickled to worker processes.
+    """
+
+    def __init__(self, rows_as_arrow: bool = False):
+        if rows_as_arrow and pa is None:
+            raise ImportError("pyarrow is required for rows_as_arrow. Install with 'pip install .[parquet]'")
+        self.rows_as_arrow = rows_as_arrow
+
+    def send(self, chunk: Any) -> SharedChunk:
+        """
+        Serialize `chunk` into a new shared memory block.
+
+        Args:
+            chunk: List of rows or columnar batch.
+
+        Returns:
+            Handle to pass to the receiving process.
+        """
+        if pa is not None and is_columnar(chunk):
+            return self._send_arrow(chunk, FORMAT_ARROW)
+        if self.rows_as_arrow and chunk:
+            try:
+                batch = pa.RecordBatch.from_pylist(chunk)
+            except (pa.ArrowException, TypeError, AttributeError):
+                batch = None
+            if batch is not None:
+                return self._send_arrow(batch, FORMAT_ARROW_ROWS)
+
+        payload = pickle.dumps(chunk, protocol=pickle.HIGHEST_PROTOCOL)
+        shm = _create(len(payload))
+        try:
+            shm.buf[:len(payload)] = payload
+        finally:
+            shm.close()
+        return SharedChunk(shm.name, len(payload), FORMAT_PICKLE, len(chunk))
+
+    def _send_arrow(self, batch: Any, fmt: str) -> SharedChunk:
+        mock = pa.MockOutputStream()
+        self._write_ipc(mock, batch)
+        size = mock.size()
+        shm = _create(size)
+        try:
+            self._write_ipc(pa.FixedSizeBufferWriter(pa.py_buffer(shm.buf)), batch)
+        finally:
+            shm.close()
+        return SharedChunk(shm.name, size, fmt, len(batch))
+
+    @staticmethod
+    def _write_ipc(sink, batch) -> None:
+        with pa.ipc.new_stream(sink, batch.schema) as writer:
+            writer.write(batch)
+
+    def receive(self, handle: SharedChunk) -> Any:
+        """
+        Deserialize the chunk of `handle` and remove its shared memory block.
+
+        Args:
+            handle: Handle returned by :meth:`send`, possibly in another process.
+
+        Returns:
+            The chunk, as a list of rows or a columnar batch, matching what was sent.
+        """
+        shm = shared_memory.SharedMemory(name=handle.name)
+        # the name is removed right away, the memory stays mapped until the last reference is gone
+        shm.unlink()
+        if handle.format == FORMAT_PICKLE:
+            view = shm.buf[:handle.size]
+            try:
+                return pickle.loads(view)
+            finally:
+                view.release()
+                shm.close()
+
+        shared = _SharedBuffer(shm, handle.size)
+        table = pa.ipc.open_stream(shared.buffer).read_all()
+        del shared
+        if handle.format == FORMAT_ARROW_ROWS:
+            return table.to_pylist()
+        batches = table.to_batches()
+        return batches[0] if len(batches) == 1 else table
+
+    @staticmethod
+    def discard(handle: SharedChunk) -> None:
+        """
+        Remove the shared memory block of a handle that will not be received, for example after an error.
+        """
+        try:
+            shm = shared_memory.SharedMemory(name=handle.name)
+        except FileNotFoundError:
+            return
+        shm.unlink()
+        shm.close()
+
+
+def _create(size: int) -> shared_memory.SharedMemory:
+    """
+    Create a shared memory block owned by whoever receives it, not by the creating process.
+    """
+    shm = shared_memory.SharedMemory(create=True, size=max(1, size))
+    # the resource tracker of the creating process would otherwise remove the block (and warn about a leak)
+    # when that process exits, even though the receiving process took it over
+    _untrack(shm)
+    return shm
+
+
+def _untrack(shm: shared_memory.SharedMemory) -> None:
+    """
+    Unregister `shm` from the resource tracker, which registers every block created or attached to on POSIX systems.
+    """
+    try:
+        resource_tracker.unregister(shm._name, "shared_memory")
+    except Exception:
+        pass
@@ -0,0 +1,87 @@
+import heapq
+from typing import Dict, Hashable, List, Tuple
+
+
+class SpaceSaving:
+    """
+    Streaming heavy-hitter counter over at most `capacity` keys (Space-Saving algorithm, Metwally et al.).
+
+    Every key seen more than `total / capacity` times is guaranteed to be counted. Once all counters are taken, a new
+    key replaces the key with the smallest count and inherits that count as its possible overestimation (`error`).
+    `count - error` is therefore a lower bound of how often a key was seen, `count` an upper bound.
+
+    Used by :class:`~etl_lib.core.SplittingBatchProcessor.SplittingBatchProcessor` to detect supernodes in a stream
+    of relationship rows, using memory independent of the number of distinct nodes.
+
+    Args:
+        capacity: Number of keys counted at the same time.
+    """
+
+    def __init__(self, capacity: int):
+        if capacity < 1:
+            raise ValueError(f"capacity must be >= 1, got {capacity}")
+        self.capacity = capacity
+        self.total = 0
+        self._counts: Dict[Hashable, int] = {}
+        self._errors: Dict[Hashable, int] = {}
+        # (count, seq, key), entries whose count is no longer the count of their key are skipped when popped
+        self._heap: List[Tuple[int, int, Hashable]] = []
+        self._seq = 0
+
+    def __len__(self) -> int:
+        return len(self._counts)
+
+    def add(self, key: Hashable, count: int = 1) -> None:
+        """
+        Count `count` occurrences of `key`.
+        """
+        self.total += count
+        if key in self._counts:
+            self._counts[key] += count
+        elif len(self._counts) < self.capacity:
+            self._counts[key] = count
+            self._errors[key] = 0
+        else:
+            minimum, victim = self._pop_min()
+            del self._counts[victim]
+            del self._errors[victim]
+            self._counts[key] = minimum + count
+            self._errors[key] = minimum
+        self._push(key)
+
+    def estimate(self, key: Hashable) -> Tuple[int, int]:
+        """
+        Return `(count, error)` of `key`, `(0, 0)` if it is not counted.
+        """
+        return self._counts.get(key, 0), self._errors.get(key, 0)
+
+    def guaranteed(self, key: Hashable) -> int:
+        """
+        Return how often `key` was seen at least.
+        """
+        count, error = self.estimate(key)
+        return count - error
+
+    def top(self, n: int | None = None) -> List[Tuple[Hashable, int, int]]:
+        """
+        Return the `n` (default all) counted keys with the largest counts as `(key, count, error)`.
+        """
+        ranked = sorted(self._counts.items(), key=lambda item: item[1], reverse=True)
+        return [(key, count, self._errors[key]) for key, count in ranked[:n]]
+
+    def _push(self, key: Hashable) -> None:
+        self._seq += 1
+        heapq.heappush(self._heap, (self._counts[key], self._seq, key))
+        if len(self._heap) > 4 * self.capacity + 64:
+            self._heap = [(count, self._seq + i, k) for i, (k, count) in enumerate(self._counts.items(), start=1)]
+            self._seq += len(self._heap)
+            heapq.heapify(self._heap)
+
+    def _pop_min(self) -> Tuple[int, Hashable]:
+        while True:
+            count, _, key = heapq.heappop(self._heap)
+            if self._counts.get(key) == count:
+                return count, key
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(capacity={self.capacity}, total={self.total}, keys={len(self._counts)})"
@@ -1,12 +1,84 @@
-import hashlib
+import csv
+import dataclasses
 import logging
+import math
+import os
+import shutil
+import sys
+import tempfile
+import threading
 import time
-from typing import Any, Callable, Dict, Generator, List, Tuple
+from collections import Counter
+from typing import Any, Callable, Dict, Generator, Iterable, List, Set, Tuple
 
 from tabulate import tabulate
 
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
+
+from etl_lib.core._bucketing import (
+    BucketQueue,
+    column_values,
+    integer_column_values,
+    to_u64,
+    to_u64_many,
+    take_positions,
+)
 from etl_lib.core.BatchProcessor import BatchProcessor, BatchResults
-from etl_lib.core.utils import merge_summary
+from etl_lib.core.ParallelBatchProcessor import ParallelBatchResult
+from etl_lib.core.SpaceSaving import SpaceSaving
+from etl_lib.core.StatsAccumulator import StatsAccumulator
+from etl_lib.core.utils import is_columnar
+
+
+def _last_digits(values: Any) -> Any:
+    """
+    Last decimal digit of each value, as used by the `tuple_id_extractor` and `dict_id_extractor`.
+
+    Vectorized with NumPy if installed and the values are all integers or all strings ending in an ASCII digit.
+    """
+    if np is not None:
+        digits = _last_digits_numpy(values)
+        if digits is not None:
+            return digits
+    try:
+        return [int(str(v)[-1]) for v in values]
+    except Exception as e:
+        raise ValueError(f"Failed to extract ID: {e}")
+
+
+def _last_digits_numpy(values: Any) -> Any:
+    """
+    :func:`_last_digits` as a NumPy array, or `None` if the values can not be handled without Python conversions.
+    """
+    try:
+        arr = np.asarray(values)
+    except (OverflowError, ValueError):
+        return None
+    if arr.ndim != 1 or not len(arr):
+        return None
+    if arr.dtype.kind in "iu":
+        # the last digit of str(v) for negative v is the one of -v, % -10 avoids overflowing on the minimum
+        return np.where(arr < 0, -(arr % -10), arr % 10) if arr.dtype.kind == "i" else arr % 10
+    if arr.dtype.kind != "U":
+        return None
+    lengths = np.char.str_len(arr)
+    if not lengths.all():
+        return None
+    # one UCS-4 code point per character, the strings are padded to the same width
+    codes = arr.view(np.uint32).reshape(len(arr), -1)
+    digits = codes[np.arange(len(arr)), lengths - 1].astype(np.int64) - ord("0")
+    if ((digits < 0) | (digits > 9)).any():
+        # empty strings, other characters and non-ASCII digits are left to int()
+        return None
+    return digits
 
 
 def tuple_id_extractor(table_size: int = 10) -> Callable[[Tuple[str | int, str | int]], Tuple[int, int]]:
@@ -34,7 +106,11 @@ def tuple_id_extractor(table_size: int = 10) -> Callable[[Tuple[str | int, str |
             raise ValueError(f"Failed to extract ID from item {item}: {e}")
         return row, col
 
+    def extract_many(chunk: List[Tuple[Any, Any]]) -> Tuple[Any, Any]:
+        return _last_digits([a for a, _ in chunk]), _last_digits([b for _, b in chunk])
+
     extractor.table_size = table_size
+    extractor.extract_many = extract_many
     return extractor
 
 
@@ -67,7 +143,13 @@ def dict_id_extractor(
             raise ValueError(f"Failed to extract ID from item {item}: {e}")
         return row, col
 
+    def extract_many(chunk: Any) -> Tuple[Any, Any]:
+        return _last_digits(integer_column_values(chunk, start_key)), _last_digits(integer_column_values(chunk, end_key))
+
     extractor.table_size = table_size
+    extractor.start_key = start_key
+    extractor.end_key = end_key
+    extractor.extract_many = extract_many
     return extractor
 
 
@@ -85,6 +167,7 @@ def canonical_integer_id_extractor(
       triangle into the upper triangle (row <= col).
 
     The extractor marks itself as mono-partite by setting `extractor.monopartite = True`.
+    `extractor.extract_many(chunk)` computes the coordinates of a whole chunk, vectorized with NumPy if installed.
     """
     MAGIC = 2654435761
 
@@ -105,8 +188,38 @@ def canonical_integer_id_extractor(
         except Exception as e:
             raise ValueError(f"Failed to extract ID: {e}")
 
+    def extract_many_python(values: List[Any]) -> List[int]:
+        try:
+            return [((v * MAGIC) & 0xffffffff) % table_size for v in values]
+        except Exception as e:
+            raise ValueError(f"Failed to extract ID: {e}")
+
+    def extract_many_numpy(values: List[Any]) -> Any:
+        try:
+            arr = np.asarray(values)
+        except OverflowError:
+            return None
+        if arr.dtype.kind not in "iub" or arr.ndim != 1:
+            return None
+        # (v * MAGIC) & 0xffffffff only depends on the low 32 bits of v, which survive the cast to uint64
+        low = arr.astype(np.int64).astype(np.uint64) & np.uint64(0xffffffff)
+        return ((low * np.uint64(MAGIC)) & np.uint64(0xffffffff)) % np.uint64(table_size)
+
+    def extract_many(chunk: Any) -> Tuple[Any, Any]:
+        s_vals = integer_column_values(chunk, start_key)
+        e_vals = integer_column_values(chunk, end_key)
+        if np is not None:
+            rows = extract_many_numpy(s_vals)
+            cols = extract_many_numpy(e_vals)
+            if rows is not None and cols is not None:
+                return rows, cols
+        return extract_many_python(s_vals), extract_many_python(e_vals)
+
     extractor.table_size = table_size
     extractor.monopartite = monopartite
+    extractor.start_key = start_key
+    extractor.end_key = end_key
+    extractor.extract_many = extract_many
     return extractor
 
 
@@ -133,31 +246,106 @@ def canonical_int_or_str_id_extractor(
     - Integers are treated as stable IDs and mixed as 64-bit values.
     - Canonical folding enforces row <= col so that (A,B) and (B,A) map to the same bucket. This is useful
       when the write set is effectively undirected (or when you want symmetric scheduling for pairs).
+
+    Batch extraction
+    - `extractor.extract_many(chunk)` computes the coordinates of a whole chunk. It hashes each distinct string
+      only once (caching up to `2**20` hashes) and mixes the values with NumPy if installed.
     """
     MAGIC = 2654435761
 
-    def _to_u64(v: Any) -> int:
-        if isinstance(v, int):
-            return v & 0xFFFFFFFFFFFFFFFF
-        if isinstance(v, str):
-            digest = hashlib.blake2b(v.encode("utf-8"), digest_size=16).digest()
-            return int.from_bytes(digest[:8], byteorder="big", signed=False)
-        raise TypeError(f"Expected int or str, got {type(v).__name__}")
-
     def extractor(item: Dict[str, Any]) -> Tuple[int, int]:
-        s_u64 = _to_u64(item[start_key])
-        e_u64 = _to_u64(item[end_key])
+        s_u64 = to_u64(item[start_key])
+        e_u64 = to_u64(item[end_key])
 
         row = ((s_u64 * MAGIC) & 0xFFFFFFFFFFFFFFFF) % table_size
         col = ((e_u64 * MAGIC) & 0xFFFFFFFFFFFFFFFF) % table_size
 
         return int(row), int(col)
 
+    # node ids repeat across relationship rows, hash each distinct string only once (bounded)
+    hashed: Dict[str, int] = {}
+
+    def extract_many(chunk: Any) -> Tuple[Any, Any]:
+        s_u64 = to_u64_many(column_values(chunk, start_key), hashed)
+        e_u64 = to_u64_many(column_values(chunk, end_key), hashed)
+        if np is not None:
+            magic = np.uint64(MAGIC)
+            size = np.uint64(table_size)
+            # uint64 multiplication wraps around, same as the & 0xFFFFFFFFFFFFFFFF of the scalar version
+            rows = (np.array(s_u64, dtype=np.uint64) * magic) % size
+            cols = (np.array(e_u64, dtype=np.uint64) * magic) % size
+            return rows, cols
+        return (
+            [((v * MAGIC) & 0xFFFFFFFFFFFFFFFF) % table_size for v in s_u64],
+            [((v * MAGIC) & 0xFFFFFFFFFFFFFFFF) % table_size for v in e_u64],
+        )
+
     extractor.table_size = table_size
     extractor.monopartite = monopartite
+    extractor.start_key = start_key
+    extractor.end_key = end_key
+    extractor.extract_many = extract_many
     return extractor
 
 
+def _max_weight_assignment(weights: List[List[int]]) -> List[int]:
+    """
+    Solve the assignment problem for a rectangular weight matrix with the Hungarian algorithm.
+
+    Args:
+        weights: `n x m` matrix with `n <= m`, where `weights[i][j]` is the gain of assigning row `i` to column `j`.
+
+    Returns:
+        For every row the assigned column, maximizing the total weight. Every row is assigned,
+        callers should ignore assignments with zero weight.
+    """
+    n = len(weights)
+    m = len(weights[0]) if n else 0
+    inf = float("inf")
+    u = [0.0] * (n + 1)
+    v = [0.0] * (m + 1)
+    p = [0] * (m + 1)
+    way = [0] * (m + 1)
+    for i in range(1, n + 1):
+        p[0] = i
+        j0 = 0
+        minv = [inf] * (m + 1)
+        used = [False] * (m + 1)
+        while True:
+            used[j0] = True
+            i0 = p[j0]
+            row = weights[i0 - 1]
+            delta = inf
+            j1 = 0
+            for j in range(1, m + 1):
+                if not used[j]:
+                    cur = -row[j - 1] - u[i0] - v[j]
+                    if cur < minv[j]:
+                        minv[j] = cur
+                        way[j] = j0
+                    if minv[j] < delta:
+                        delta = minv[j]
+                        j1 = j
+            for j in range(m + 1):
+                if used[j]:
+                    u[p[j]] += delta
+                    v[j] -= delta
+                else:
+                    minv[j] -= delta
+            j0 = j1
+            if p[j0] == 0:
+                break
+        while j0:
+            j1 = way[j0]
+            p[j0] = p[j1]
+            j0 = j1
+    assignment = [-1] * n
+    for j in range(1, m + 1):
+        if p[j]:
+            assignment[p[j] - 1] = j - 1
+    return assignment
+
+
 class SplittingBatchProcessor(BatchProcessor):
     """
     Streaming wave scheduler for mix-and-batch style loading.
@@ -172,6 +360,21 @@ class SplittingBatchProcessor(BatchProcessor):
     - Mono-partite: within a wave, no node index is used more than once (row/col indices are the same domain).
       Enable by setting `id_extractor.monopartite = True` (as done by `canonical_integer_id_extractor`).
 
+    Batch extraction
+    ----------------
+    If the id extractor has an `extract_many(chunk) -> (rows, cols)` attribute, each upstream chunk is assigned to
+    buckets with one call instead of one call per item. `rows` and `cols` are sequences (lists or NumPy arrays)
+    aligned with `chunk`. All built-in extractors provide it, using NumPy if installed.
+
+    Wave selection
+    --------------
+    - `greedy` (default): candidates are sorted by size and picked first-fit if they do not conflict.
+    - `matching`: picks the set of non-conflicting buckets that moves the most rows. Bi-partite grids solve a
+      maximum-weight bipartite matching between rows and cols; mono-partite grids pick the best class of an
+      edge-colouring of the grid (classes `(row + col) % table_size`) and fill it greedily. The greedy wave is
+      computed as well and used if it happens to move more rows. Both are reported via the
+      `splitter_schedule` instrumentation event.
+
     Emission strategy
     -----------------
     - During streaming: emit a wave when at least one bucket is full (>= max_batch_size).
@@ -180,10 +383,47 @@ class SplittingBatchProcessor(BatchProcessor):
     - If a bucket backlog grows beyond a burst threshold, emit a burst wave to bound memory.
     - After source exhaustion: flush leftovers in capped waves (max_batch_size per bucket).
 
+    Memory budget
+    -------------
+    - With `memory_budget_rows` and/or `memory_budget_bytes` set, the least recently filled buckets are written to
+      pickle files in a temporary directory (below `spill_dir` if given) once the rows held in memory exceed the budget,
+      until a quarter of the budget is free again. Spilled rows are read back when their bucket is scheduled.
+    - Bucket sizes include spilled rows, so the emitted waves are the same as without a budget.
+    - The byte budget is converted to rows using the estimated in-memory size of sampled rows.
+    - Rows must be picklable when a budget is set.
+
+    Contention feedback
+    -------------------
+    - Waves carry the grid coordinates of their buckets.
+      :class:`~etl_lib.core.ParallelBatchProcessor.ParallelBatchProcessor` reports the lock conflicts (transaction
+      retries, retried and re-queued buckets) of each bucket back via :meth:`record_contention`.
+    - With `contention_threshold` set, a coordinate reaching that many conflicts is serialized from then on: its
+      buckets are emitted as waves of their own, without claims, so that they never run next to another bucket.
+      Each serialized coordinate is reported via the `splitter_serialize` instrumentation event.
+    - Once all buckets are written, :meth:`report_contention` logs the contention heat map, emits a
+      `splitter_contention` event and writes the heat map to `contention_file` (CSV) if given.
+
+    Hot keys
+    --------
+    - With `hot_key_share` set, the start and end keys of all rows are counted with a
+      :class:`~etl_lib.core.SpaceSaving.SpaceSaving` sketch. A key seen in at least that share of the rows (and at least
+      `max_batch_size` times) is a hot key, a supernode: all its rows would otherwise land in one row (or col) of the
+      grid and make its buckets the slowest of every wave.
+    - Rows of hot keys are not buffered in the grid but in serial lanes, one per hot key and grid slot of the other
+      end. Lane batches claim the hot key and the slot of the other end. The batches of one hot key therefore run one
+      after the other, next to the grid buckets of all other slots.
+    - Rows of a hot key buffered or emitted before it was detected are written through the grid. Until those are
+      emitted, lane batches of the key claim its grid slot as well.
+    - The keys are read from the `start_key` and `end_key` attributes of the id extractor (item positions 0 and 1 if
+      absent). Lanes are emitted like buckets, full ones first, and are not spilled to disk.
+    - Detection is reported via the `splitter_hot_key` event (key, grid slot and count), each lane wave via the
+      `splitter_hot_lane` event (rows, total lane rows and lane rows per second). The last emission carries
+      `hot_keys` and `hot_lane_rows` in its statistics.
+
     Statistics policy
     -----------------
     - Every emission except the last carries {}.
-    - The last emission carries the accumulated upstream statistics (unfiltered).
+    - The last emission carries the accumulated upstream statistics (unfiltered), plus the hot key counters.
     """
 
     def __init__(
@@ -195,6 +435,13 @@ class SplittingBatchProcessor(BatchProcessor):
             predecessor=None,
             near_full_ratio: float = 0.85,
             burst_multiplier: int = 25,
+            scheduler: str = "greedy",
+            memory_budget_rows: int | None = None,
+            memory_budget_bytes: int | None = None,
+            spill_dir: str | None = None,
+            contention_threshold: int | None = None,
+            contention_file: str | os.PathLike | None = None,
+            hot_key_share: float | None = None,
     ):
         super().__init__(context, task, predecessor)
 
@@ -213,6 +460,16 @@ class SplittingBatchProcessor(BatchProcessor):
             raise ValueError(f"near_full_ratio must be in (0, 1], got {near_full_ratio}")
         if burst_multiplier < 1:
             raise ValueError(f"burst_multiplier must be >= 1, got {burst_multiplier}")
+        if scheduler not in ("greedy", "matching"):
+            raise ValueError(f"scheduler must be 'greedy' or 'matching', got {scheduler!r}")
+        if memory_budget_rows is not None and memory_budget_rows < 1:
+            raise ValueError(f"memory_budget_rows must be >= 1, got {memory_budget_rows}")
+        if memory_budget_bytes is not None and memory_budget_bytes < 1:
+            raise ValueError(f"memory_budget_bytes must be >= 1, got {memory_budget_bytes}")
+        if contention_threshold is not None and contention_threshold < 1:
+            raise ValueError(f"contention_threshold must be >= 1, got {contention_threshold}")
+        if hot_key_share is not None and not (0 < hot_key_share <= 1.0):
+            raise ValueError(f"hot_key_share must be in (0, 1], got {hot_key_share}")
 
         self.table_size = table_size
         self._id_extractor = id_extractor
@@ -220,11 +477,44 @@ class SplittingBatchProcessor(BatchProcessor):
 
         self.near_full_ratio = float(near_full_ratio)
         self.burst_multiplier = int(burst_multiplier)
-
-        self.buffer: Dict[int, Dict[int, List[Any]]] = {
-            r: {c: [] for c in range(self.table_size)}
+        self.scheduler = scheduler
+        self.memory_budget_rows = memory_budget_rows
+        self.memory_budget_bytes = memory_budget_bytes
+        self.spill_dir = spill_dir
+        self.contention_threshold = contention_threshold
+        self.contention_file = contention_file
+        self.hot_key_share = hot_key_share
+
+        self.buffer: Dict[int, Dict[int, BucketQueue]] = {
+            r: {c: BucketQueue() for c in range(self.table_size)}
             for r in range(self.table_size)
         }
+        # incremental index over the buffer, so that scheduling does not need to scan the whole grid
+        self._buffered = 0
+        self._non_empty: Set[Tuple[int, int]] = set()
+        self._at_least: Dict[int, Set[Tuple[int, int]]] = {}
+        # spilling state, only used with a memory budget
+        self._in_memory = 0
+        self._last_added: Dict[Tuple[int, int], int] = {}
+        self._add_seq = 0
+        self._row_bytes: float | None = None
+        self._spill_path: str | None = None
+        self._spill_seq = 0
+        # contention feedback, written by the consumer thread of the waves
+        self._contention: Dict[Tuple[int, int], int] = {}
+        self._contention_lock = threading.Lock()
+        self._serialized: frozenset = frozenset()
+        # hot key detection and serial lanes, only used with a hot_key_share
+        self._hot_key_columns = (getattr(id_extractor, "start_key", 0), getattr(id_extractor, "end_key", 1))
+        self._hot_sketch = SpaceSaving(max(16, math.ceil(2 / hot_key_share))) if hot_key_share is not None else None
+        self._rows_seen = 0
+        self._hot: Dict[Tuple[Any, ...], Tuple[int, Any]] = {}
+        self._hot_slots: Set[Any] = set()
+        self._hot_rows: Dict[Tuple[Any, ...], int] = {}
+        self._fences: Dict[Tuple[Any, ...], Dict[Tuple[int, int], int]] = {}
+        self._lanes: Dict[Tuple[Any, Any], BucketQueue] = {}
+        self._lane_rows = 0
+        self._lane_t0: float | None = None
         self.logger = logging.getLogger(f"{self.__class__.__module__}.{self.__class__.__name__}")
 
     def _bucket_claims(self, row: int, col: int) -> Tuple[Any, ...]:
@@ -238,30 +528,539 @@ class SplittingBatchProcessor(BatchProcessor):
             return (row,) if row == col else (row, col)
         return ("row", row), ("col", col)
 
+    def record_contention(self, row: int, col: int, count: int = 1) -> None:
+        """
+        Add `count` lock conflicts observed while writing a bucket of coordinate (row, col).
+
+        Thread-safe, called by the consumer of the waves while this processor keeps emitting.
+        """
+        with self._contention_lock:
+            total = self._contention.get((row, col), 0) + count
+            self._contention[(row, col)] = total
+            serialize = (self.contention_threshold is not None and total >= self.contention_threshold
+                         and (row, col) not in self._serialized)
+            if serialize:
+                # replaced, not mutated, so that the emitting thread can read it without the lock
+                self._serialized = self._serialized | {(row, col)}
+        if serialize:
+            self.logger.info(f"serializing bucket {(row, col)} after {total} lock conflicts")
+            self._instrument("splitter_serialize", {
+                "bucket": f"{row},{col}",
+                "contention": total,
+                "table_size": self.table_size,
+            })
+
+    def contention_heat_map(self) -> List[List[int]]:
+        """
+        Return the lock conflicts recorded per coordinate, as a `table_size x table_size` matrix indexed [row][col].
+        """
+        with self._contention_lock:
+            return [[self._contention.get((r, c), 0) for c in range(self.table_size)] for r in range(self.table_size)]
+
+    def report_contention(self) -> None:
+        """
+        Log the contention heat map, emit a `splitter_contention` event and write the map to `contention_file`.
+
+        Called by :class:`~etl_lib.core.ParallelBatchProcessor.ParallelBatchProcessor` once all buckets are written.
+        Does nothing if no contention was recorded.
+        """
+        heat_map = self.contention_heat_map()
+        total = sum(map(sum, heat_map))
+        if not total:
+            return
+        contended = sum(1 for row in heat_map for count in row if count)
+        self._instrument("splitter_contention", {
+            "buckets": contended,
+            "contention": total,
+            "table_size": self.table_size,
+        })
+        pad = max(2, len(str(self.table_size - 1)))
+        table = tabulate(
+            [[f"r{r:0{pad}d}", *row] for r, row in enumerate(heat_map)],
+            headers=["", *(f"c{c:0{pad}d}" for c in range(self.table_size))],
+            tablefmt="psql",
+            stralign="right",
+        )
+        self.logger.info("%d lock conflicts on %d buckets, serialized %s:\n%s",
+                         total, contended, sorted(self._serialized), table)
+        if self.contention_file is not None:
+            with open(self.contention_file, "w", newline="") as f:
+                writer = csv.writer(f)
+                writer.writerow(["row", *range(self.table_size)])
+                for r, row in enumerate(heat_map):
+                    writer.writerow([r, *row])
+
+    def _hot_claim(self, side: str, key: Any) -> Tuple[Any, ...]:
+        """
+        Return the claim of the lanes of `key`, read on `side` (`row` for start keys, `col` for end keys).
+        """
+        return ("hot", key) if self._monopartite else ("hot", side, key)
+
+    def _slot_claim(self, side: str, index: int) -> Any:
+        """
+        Return the claim of grid slot `index` on `side`, as used by :meth:`_bucket_claims`.
+        """
+        return index if self._monopartite else (side, index)
+
+    def _detect_hot_keys(self, chunk: Any, max_batch_size: int) -> None:
+        """
+        Count the start and end keys of an upstream chunk and register the keys that became hot.
+        """
+        if not len(chunk):
+            return
+        self._rows_seen += len(chunk)
+        threshold = max(max_batch_size, self.hot_key_share * self._rows_seen)
+        for side, column in zip(("row", "col"), self._hot_key_columns):
+            keys = column_values(chunk, column)
+            for key, count in Counter(keys).items():
+                claim = self._hot_claim(side, key)
+                self._hot_sketch.add(claim, count)
+                if claim in self._hot or self._hot_sketch.guaranteed(claim) < threshold:
+                    continue
+                position = keys.index(key)
+                item = chunk.slice(position, 1).to_pylist()[0] if is_columnar(chunk) else chunk[position]
+                self._register_hot_key(claim, side, key, self._id_extractor(item)[0 if side == "row" else 1])
+
+    def _register_hot_key(self, claim: Tuple[Any, ...], side: str, key: Any, index: int) -> None:
+        """
+        Route the rows of `key`, whose grid slot is `index` on `side`, to serial lanes from now on.
+        """
+        slot = self._slot_claim(side, index)
+        self._hot[claim] = (index, slot)
+        self._hot_slots.add(slot)
+        self._hot_rows[claim] = 0
+        # rows of the key still buffered in the grid, the lanes claim the slot until they are emitted
+        self._fences[claim] = {
+            (r, c): len(self.buffer[r][c]) for r, c in self._non_empty if slot in self._bucket_claims(r, c)
+        }
+        if self._lane_t0 is None:
+            self._lane_t0 = time.perf_counter()
+        count = self._hot_sketch.guaranteed(claim)
+        self.logger.info(f"hot key {key!r} in {side} {index}: {count} of {self._rows_seen} rows")
+        self._instrument("splitter_hot_key", {
+            "key": str(key),
+            "side": "node" if self._monopartite else side,
+            "slot": index,
+            "count": count,
+            "rows_seen": self._rows_seen,
+            "table_size": self.table_size,
+        })
+
+    def _route_hot_rows(self, row: int, col: int, items: Any) -> Any:
+        """
+        Move the rows of hot keys among the `items` scattered to bucket (row, col) to their lanes, return the others.
+        """
+        if self._slot_claim("row", row) not in self._hot_slots and self._slot_claim("col", col) not in self._hot_slots:
+            return items
+        grid: List[int] = []
+        lanes: Dict[Tuple[Any, Any], List[int]] = {}
+        starts = column_values(items, self._hot_key_columns[0])
+        ends = column_values(items, self._hot_key_columns[1])
+        for i, (start, end) in enumerate(zip(starts, ends)):
+            start_claim = self._hot_claim("row", start)
+            end_claim = self._hot_claim("col", end)
+            start_hot = start_claim in self._hot
+            end_hot = end_claim in self._hot
+            if start_hot and end_hot:
+                lane = (start_claim, end_claim)
+            elif start_hot:
+                lane = (start_claim, row + col - self._hot[start_claim][0] if self._monopartite else ("col", col))
+            elif end_hot:
+                lane = (end_claim, row + col - self._hot[end_claim][0] if self._monopartite else ("row", row))
+            else:
+                grid.append(i)
+                continue
+            lanes.setdefault(lane, []).append(i)
+        if not lanes:
+            return items
+        for lane, positions in lanes.items():
+            self._hot_rows[lane[0]] += len(positions)
+            queue = self._lanes.get(lane)
+            if queue is None:
+                queue = self._lanes[lane] = BucketQueue()
+            queue.extend(take_positions(items, positions))
+        return take_positions(items, grid)
+
+    def _lane_claims(self, lane: Tuple[Any, Any]) -> Tuple[Any, ...]:
+        """
+        Return the claims of a lane: its hot keys, the slot of its other end, and the slots of its hot keys while
+        rows of them buffered before their detection are pending.
+        """
+        claims = (*lane, *(self._hot[claim][1] for claim in lane if claim in self._fences))
+        return tuple(dict.fromkeys(claims))
+
+    def _select_lane_wave(self, min_lane_len: int, near_full_len: int) -> List[Tuple[Any, Any]]:
+        """
+        Select non-conflicting lanes holding at least `near_full_len` rows, largest first, if one of them holds
+        `min_lane_len` rows.
+        """
+        candidates = sorted(
+            (lane for lane, q in self._lanes.items() if len(q) >= near_full_len),
+            key=lambda lane: (len(self._lanes[lane]) < min_lane_len, -len(self._lanes[lane])),
+        )
+        if not candidates or len(self._lanes[candidates[0]]) < min_lane_len:
+            return []
+        used: Set[Any] = set()
+        wave = []
+        for lane in candidates:
+            claims = self._lane_claims(lane)
+            if used.isdisjoint(claims):
+                used.update(claims)
+                wave.append(lane)
+        return wave
+
+    def _flush_lane_wave(self, wave: List[Tuple[Any, Any]], max_batch_size: int) -> ParallelBatchResult:
+        """
+        Extract up to `max_batch_size` rows from each lane in `wave` and return them as a ParallelBatchResult with the
+        claims of the lanes. Lane batches have no grid coordinates.
+        """
+        claims = [self._lane_claims(lane) for lane in wave]
+        bucket_batches = []
+        for lane in wave:
+            bucket_batches.append(self._lanes[lane].take(max_batch_size))
+            if not len(self._lanes[lane]):
+                del self._lanes[lane]
+            # emitted after all grid rows of the key, later lane batches are ordered behind this one
+            for claim in lane:
+                if self._fences.get(claim) == {}:
+                    del self._fences[claim]
+
+        rows = sum(len(b) for b in bucket_batches)
+        self._lane_rows += rows
+        elapsed = time.perf_counter() - self._lane_t0
+        self._instrument("splitter_hot_lane", {
+            "buckets": len(wave),
+            "rows": rows,
+            "lane_rows": self._lane_rows,
+            "rows_per_s": round(self._lane_rows / elapsed, 1) if elapsed > 0 else None,
+            "table_size": self.table_size,
+        })
+        return ParallelBatchResult(chunk=bucket_batches, statistics={}, batch_size=rows, claims=claims)
+
+    def _report_hot_keys(self) -> None:
+        """
+        Log the hot keys with their grid slot, counts and the rows written through their lanes.
+        """
+        table = tabulate(
+            [[claim[-1], "node" if self._monopartite else claim[1], index, *self._hot_sketch.estimate(claim),
+              self._hot_rows[claim]] for claim, (index, _) in self._hot.items()],
+            headers=["key", "side", "slot", "count", "error", "lane rows"],
+            tablefmt="psql",
+        )
+        self.logger.info("%d hot keys, %d of %d rows written through lanes:\n%s",
+                         len(self._hot), self._lane_rows, self._rows_seen, table)
+
+    def _track_thresholds(self, thresholds: Iterable[int]) -> None:
+        """
+        Maintain the set of buckets holding at least `threshold` items for each of the given thresholds.
+
+        Membership is updated whenever a bucket grows or shrinks, so that looking up the buckets above a
+        tracked threshold costs time proportional to the number of such buckets, not to the grid size.
+        """
+        self._at_least = {
+            t: {(r, c) for r, c in self._non_empty if len(self.buffer[r][c]) >= t}
+            for t in thresholds if t > 1
+        }
+
+    def _bucket_resized(self, row: int, col: int, before: int, after: int) -> None:
+        """
+        Update the running total and the threshold index after the bucket (row, col) changed its size.
+        """
+        self._buffered += after - before
+        key = (row, col)
+        if before == 0 and after > 0:
+            self._non_empty.add(key)
+        elif after == 0 and before > 0:
+            self._non_empty.discard(key)
+        for threshold, members in self._at_least.items():
+            if before < threshold <= after:
+                members.add(key)
+            elif after < threshold <= before:
+                members.discard(key)
+
+    def _add_to_bucket(self, row: int, col: int, items: List[Any]) -> None:
+        """
+        Append `items` to the bucket (row, col).
+        """
+        q = self.buffer[row][col]
+        before = len(q)
+        q.extend(items)
+        self._in_memory += len(items)
+        self._add_seq += 1
+        self._last_added[(row, col)] = self._add_seq
+        self._bucket_resized(row, col, before, len(q))
+
+    def _take_from_bucket(self, row: int, col: int, n: int) -> List[Any]:
+        """
+        Remove and return up to `n` items from the front of the bucket (row, col).
+        """
+        q = self.buffer[row][col]
+        before = len(q)
+        in_memory_before = q.in_memory
+        out = q.take(n)
+        self._in_memory += q.in_memory - in_memory_before
+        self._bucket_resized(row, col, before, len(q))
+        for fence in self._fences.values():
+            pending = fence.get((row, col))
+            if pending is not None:
+                if pending <= len(out):
+                    del fence[(row, col)]
+                else:
+                    fence[(row, col)] = pending - len(out)
+        return out
+
+    @staticmethod
+    def _estimate_row_bytes(item: Any) -> int:
+        """
+        Rough in-memory size of one row: the container plus its direct values.
+        """
+        size = sys.getsizeof(item)
+        if isinstance(item, dict):
+            size += sum(sys.getsizeof(v) for v in item.values())
+        elif isinstance(item, (list, tuple)):
+            size += sum(sys.getsizeof(v) for v in item)
+        return size
+
+    def _sample_row_bytes(self, chunk: List[Any]) -> None:
+        """
+        Update the running estimate of bytes per row from a few rows of `chunk`.
+        """
+        if self.memory_budget_bytes is None or not len(chunk):
+            return
+        if is_columnar(chunk):
+            estimate = chunk.nbytes / len(chunk)
+        else:
+            sample = [chunk[0], chunk[len(chunk) // 2], chunk[-1]]
+            estimate = sum(self._estimate_row_bytes(item) for item in sample) / len(sample)
+        self._row_bytes = estimate if self._row_bytes is None else 0.9 * self._row_bytes + 0.1 * estimate
+
+    def _memory_budget(self) -> int | None:
+        """
+        Return the number of rows that may be held in memory, or None if unlimited.
+        """
+        budget = self.memory_budget_rows
+        if self.memory_budget_bytes is not None and self._row_bytes:
+            by_bytes = max(1, int(self.memory_budget_bytes / self._row_bytes))
+            budget = by_bytes if budget is None else min(budget, by_bytes)
+        return budget
+
+    def _enforce_memory_budget(self) -> None:
+        """
+        Spill the least recently filled buckets to disk while the rows held in memory exceed the budget.
+        """
+        budget = self._memory_budget()
+        if budget is None or self._in_memory <= budget:
+            return
+
+        t0 = time.perf_counter()
+        in_memory_before = self._in_memory
+        target = budget * 3 // 4
+        if self._spill_path is None:
+            self._spill_path = tempfile.mkdtemp(prefix="etl_lib_spill_", dir=self.spill_dir)
+
+        spilled_rows = 0
+        spilled_buckets = 0
+        for r, c in sorted(self._non_empty, key=lambda rc: self._last_added.get(rc, 0)):
+            if self._in_memory <= target:
+                break
+            q = self.buffer[r][c]
+            if not q.in_memory:
+                continue
+            self._spill_seq += 1
+            n = q.spill(os.path.join(self._spill_path, f"{r}_{c}_{self._spill_seq}.pkl"))
+            self._in_memory -= n
+            spilled_rows += n
+            spilled_buckets += 1
+
+        dt_ms = (time.perf_counter() - t0) * 1000.0
+        self.logger.debug(f"spilled {spilled_rows} rows of {spilled_buckets} buckets in {dt_ms:.1f} ms")
+        self._instrument("splitter_spill", {
+            "rows": spilled_rows,
+            "buckets": spilled_buckets,
+            "buffered_before": self._buffered,
+            "in_memory_rows": in_memory_before,
+            "memory_budget_rows": budget,
+            "table_size": self.table_size,
+            "dt_ms": round(dt_ms, 3),
+        })
+
+    def _discard_spill(self) -> None:
+        """
+        Remove all spill files.
+        """
+        if self._spill_path is None:
+            return
+        for r, c in self._non_empty:
+            self.buffer[r][c].discard()
+        shutil.rmtree(self._spill_path, ignore_errors=True)
+        self._spill_path = None
+
+    def _buckets_at_least(self, min_bucket_len: int) -> Set[Tuple[int, int]]:
+        """
+        Return the buckets holding at least `min_bucket_len` items.
+        """
+        if min_bucket_len <= 1:
+            return self._non_empty
+        members = self._at_least.get(min_bucket_len)
+        if members is not None:
+            return members
+        return {(r, c) for r, c in self._non_empty if len(self.buffer[r][c]) >= min_bucket_len}
+
     def _all_bucket_sizes(self) -> List[Tuple[int, int, int]]:
         """
         Return all non-empty buckets as (size, row, col).
         """
-        out: List[Tuple[int, int, int]] = []
-        for r in range(self.table_size):
-            for c in range(self.table_size):
-                n = len(self.buffer[r][c])
-                if n > 0:
-                    out.append((n, r, c))
-        return out
+        return [(len(self.buffer[r][c]), r, c) for r, c in self._non_empty]
+
+    def _select_wave(
+            self,
+            *,
+            min_bucket_len: int,
+            seed: List[Tuple[int, int]] | None = None,
+            max_bucket_len: int | None = None,
+    ) -> List[Tuple[int, int]]:
+        """
+        Pick a non-overlapping set of buckets with len >= min_bucket_len, using the configured scheduler.
+
+        If `seed` is provided, it is taken as fixed and the wave is extended.
+        `max_bucket_len` caps the rows a bucket contributes to the wave, it is used to weight buckets
+        when the `matching` scheduler is configured.
+        """
+        greedy = self._select_wave_greedy(min_bucket_len=min_bucket_len, seed=seed)
+        if self.scheduler == "greedy" or not greedy:
+            return greedy
+
+        t0 = time.perf_counter()
+        if self._monopartite:
+            optimal = self._select_wave_colouring(min_bucket_len=min_bucket_len, seed=seed,
+                                                  max_bucket_len=max_bucket_len)
+        else:
+            optimal = self._select_wave_matching(min_bucket_len=min_bucket_len, seed=seed,
+                                                 max_bucket_len=max_bucket_len)
+        dt_ms = (time.perf_counter() - t0) * 1000.0
+
+        greedy_rows = self._wave_rows(greedy, max_bucket_len)
+        optimal_rows = self._wave_rows(optimal, max_bucket_len)
+        self._instrument("splitter_schedule", {
+            "scheduler": self.scheduler,
+            "greedy_buckets": len(greedy),
+            "greedy_rows": greedy_rows,
+            "optimal_buckets": len(optimal),
+            "optimal_rows": optimal_rows,
+            "table_size": self.table_size,
+            "dt_ms": round(dt_ms, 3),
+        })
+        return optimal if optimal_rows >= greedy_rows else greedy
+
+    def _wave_rows(self, wave: List[Tuple[int, int]], max_bucket_len: int | None) -> int:
+        """
+        Number of rows the wave would move.
+        """
+        cap = max_bucket_len or sys.maxsize
+        return sum(min(len(self.buffer[r][c]), cap) for r, c in wave)
+
+    def _select_wave_matching(
+            self,
+            *,
+            min_bucket_len: int,
+            seed: List[Tuple[int, int]] | None,
+            max_bucket_len: int | None,
+    ) -> List[Tuple[int, int]]:
+        """
+        Bi-partite scheduler: maximum-weight matching between rows and cols, weighted by the rows each bucket moves.
+
+        Rows and cols used by `seed` are excluded from the matching and the seed is kept as is.
+        """
+        cap = max_bucket_len or sys.maxsize
+        wave = list(seed or [])
+        used_rows = {r for r, _ in wave}
+        used_cols = {c for _, c in wave}
+
+        weight: Dict[Tuple[int, int], int] = {}
+        for r, c in self._buckets_at_least(min_bucket_len):
+            if r in used_rows or c in used_cols:
+                continue
+            weight[(r, c)] = min(len(self.buffer[r][c]), cap)
+        if not weight:
+            return wave
+
+        rows = sorted({r for r, _ in weight})
+        cols = sorted({c for _, c in weight})
+        transpose = len(rows) > len(cols)
+        if transpose:
+            rows, cols = cols, rows
+        matrix = [
+            [weight.get((c, r) if transpose else (r, c), 0) for c in cols]
+            for r in rows
+        ]
+        picked = []
+        for i, j in enumerate(_max_weight_assignment(matrix)):
+            key = (cols[j], rows[i]) if transpose else (rows[i], cols[j])
+            if j >= 0 and weight.get(key, 0) > 0:
+                picked.append(key)
+        picked.sort(key=lambda rc: (-weight[rc], rc[0], rc[1]))
+        return wave + picked
+
+    def _select_wave_colouring(
+            self,
+            *,
+            min_bucket_len: int,
+            seed: List[Tuple[int, int]] | None,
+            max_bucket_len: int | None,
+    ) -> List[Tuple[int, int]]:
+        """
+        Mono-partite scheduler based on an edge-colouring of the grid.
 
-    def _select_wave(self, *, min_bucket_len: int, seed: List[Tuple[int, int]] | None = None) -> List[Tuple[int, int]]:
+        The buckets `(row, col)` with `(row + col) % table_size == k` never share a node index, so each of the
+        `table_size` classes is a valid wave. The class moving the most rows (besides the seed) is picked and then
+        extended greedily with buckets of other classes.
+        """
+        cap = max_bucket_len or sys.maxsize
+        wave = list(seed or [])
+        used: Set[Any] = set()
+        for r, c in wave:
+            used.update(self._bucket_claims(r, c))
+
+        candidates: List[Tuple[int, int, int]] = []
+        class_rows: Dict[int, int] = {}
+        for r, c in self._buckets_at_least(min_bucket_len):
+            if (r, c) in wave or any(claim in used for claim in self._bucket_claims(r, c)):
+                continue
+            n = min(len(self.buffer[r][c]), cap)
+            candidates.append((n, r, c))
+            k = (r + c) % self.table_size
+            class_rows[k] = class_rows.get(k, 0) + n
+        if not candidates:
+            return wave
+
+        best_class = min(class_rows, key=lambda k: (-class_rows[k], k))
+        candidates.sort(key=lambda x: (-x[0], x[1], x[2]))
+        in_class = [(n, r, c) for n, r, c in candidates if (r + c) % self.table_size == best_class]
+        others = [(n, r, c) for n, r, c in candidates if (r + c) % self.table_size != best_class]
+        for _, r, c in in_class + others:
+            claims = self._bucket_claims(r, c)
+            if any(claim in used for claim in claims):
+                continue
+            wave.append((r, c))
+            used.update(claims)
+            if len(wave) >= self.table_size:
+                break
+        return wave
+
+    def _select_wave_greedy(
+            self,
+            *,
+            min_bucket_len: int,
+            seed: List[Tuple[int, int]] | None = None,
+    ) -> List[Tuple[int, int]]:
         """
         Greedy wave scheduler: pick a non-overlapping set of buckets with len >= min_bucket_len.
 
         If `seed` is provided, it is taken as fixed and the wave is extended greedily.
         """
-        candidates: List[Tuple[int, int, int]] = []
-        for r in range(self.table_size):
-            for c in range(self.table_size):
-                n = len(self.buffer[r][c])
-                if n >= min_bucket_len:
-                    candidates.append((n, r, c))
+        candidates: List[Tuple[int, int, int]] = [
+            (len(self.buffer[r][c]), r, c) for r, c in self._buckets_at_least(min_bucket_len)
+        ]
 
         if not candidates and not seed:
             return []
@@ -296,37 +1095,48 @@ class SplittingBatchProcessor(BatchProcessor):
         Returns (row, col, size) or None.
         """
         best: Tuple[int, int, int] | None = None
-        for r in range(self.table_size):
-            for c in range(self.table_size):
-                n = len(self.buffer[r][c])
-                if n < threshold:
-                    continue
-                if best is None or n > best[2]:
-                    best = (r, c, n)
+        for r, c in self._buckets_at_least(threshold):
+            n = len(self.buffer[r][c])
+            if best is None or n > best[2] or (n == best[2] and (r, c) < best[:2]):
+                best = (r, c, n)
         return best
 
+    def _flush_waves(self, wave: List[Tuple[int, int]], max_batch_size: int) -> List[ParallelBatchResult]:
+        """
+        :meth:`_flush_wave`, emitting the serialized buckets of `wave` as waves of their own, without claims.
+        """
+        serialized = self._serialized
+        if serialized.isdisjoint(wave):
+            return [self._flush_wave(wave, max_batch_size)]
+        shared = [bucket for bucket in wave if bucket not in serialized]
+        waves = [self._flush_wave(shared, max_batch_size)] if shared else []
+        waves.extend(self._flush_wave([bucket], max_batch_size, exclusive=True)
+                     for bucket in wave if bucket in serialized)
+        return waves
+
     def _flush_wave(
             self,
             wave: List[Tuple[int, int]],
             max_batch_size: int,
             statistics: Dict[str, Any] | None = None,
-    ) -> BatchResults:
+            exclusive: bool = False,
+    ) -> ParallelBatchResult:
         """
         Extract up to `max_batch_size` items from each bucket in `wave`, remove them from the buffer,
-        and return a BatchResults whose chunk is a list of per-bucket lists (aligned with `wave`).
+        and return a ParallelBatchResult whose chunk is a list of per-bucket lists (aligned with `wave`).
+        The claims of each bucket are attached, so that the consumer can overlap buckets of different waves.
+        An `exclusive` wave has no claims, so the consumer runs it with a barrier before and after it.
         """
         self._log_buffer_matrix(wave=wave)
 
         t0 = time.perf_counter()
         bucket_batches: List[List[Any]] = []
         sizes = []
-        buffered_before = sum(len(self.buffer[r][c]) for r in range(self.table_size) for c in range(self.table_size))
+        buffered_before = self._buffered
         for r, c in wave:
-            q = self.buffer[r][c]
-            take = min(max_batch_size, len(q))
-            bucket_batches.append(q[:take])
-            self.buffer[r][c] = q[take:]
-            sizes.append(take)
+            batch = self._take_from_bucket(r, c, max_batch_size)
+            bucket_batches.append(batch)
+            sizes.append(len(batch))
 
         dt_ms = (time.perf_counter() - t0) * 1000.0
         self._instrument("splitter_flush", {
@@ -339,12 +1149,122 @@ class SplittingBatchProcessor(BatchProcessor):
             "table_size": self.table_size,
             "dt_ms": round(dt_ms, 3),
         })
-        return BatchResults(
+        return ParallelBatchResult(
             chunk=bucket_batches,
             statistics=statistics or {},
             batch_size=(sum(len(b) for b in bucket_batches)),
+            claims=None if exclusive else [self._bucket_claims(r, c) for r, c in wave],
+            coordinates=list(wave),
         )
 
+    def _scatter(self, chunk: List[Any]) -> Dict[Tuple[int, int], List[Any]]:
+        """
+        Group the items of an upstream chunk by bucket, keeping their order within each bucket.
+
+        Uses the batch protocol of the id extractor (`extract_many`) if available.
+        Columnar chunks (pyarrow batches) are split into one pyarrow batch per bucket.
+        """
+        extract_many = getattr(self._id_extractor, "extract_many", None)
+        if is_columnar(chunk):
+            return self._scatter_columnar(chunk, extract_many)
+        if extract_many is None or not chunk:
+            return self._scatter_items(chunk)
+
+        rows, cols = extract_many(chunk)
+        if np is not None and isinstance(rows, np.ndarray) and isinstance(cols, np.ndarray):
+            return {
+                key: [chunk[i] for i in positions]
+                for key, positions in self._group_positions_numpy(rows, cols).items()
+            }
+
+        scattered: Dict[Tuple[int, int], List[Any]] = {}
+        for item, r, c in zip(chunk, rows, cols):
+            if self._monopartite and r > c:
+                r, c = c, r
+            bucket = scattered.get((r, c))
+            if bucket is None:
+                self._check_bucket_range(r, c)
+                scattered[(r, c)] = [item]
+            else:
+                bucket.append(item)
+        return scattered
+
+    def _scatter_items(self, chunk: List[Any]) -> Dict[Tuple[int, int], List[Any]]:
+        """
+        Group the items of an upstream chunk by bucket, calling the id extractor once per item.
+        """
+        scattered: Dict[Tuple[int, int], List[Any]] = {}
+        for item in chunk:
+            r, c = self._id_extractor(item)
+            if self._monopartite and r > c:
+                r, c = c, r
+            bucket = scattered.get((r, c))
+            if bucket is None:
+                self._check_bucket_range(r, c)
+                scattered[(r, c)] = [item]
+            else:
+                bucket.append(item)
+        return scattered
+
+    def _scatter_columnar(self, chunk: Any, extract_many) -> Dict[Tuple[int, int], Any]:
+        """
+        Group the rows of a pyarrow batch by bucket. Each bucket receives a batch with its rows, taken in order.
+        """
+        if not len(chunk):
+            return {}
+        if extract_many is not None:
+            rows, cols = extract_many(chunk)
+        else:
+            coordinates = [self._id_extractor(item) for item in chunk.to_pylist()]
+            rows, cols = [r for r, _ in coordinates], [c for _, c in coordinates]
+        if np is not None:
+            grouped = self._group_positions_numpy(np.asarray(rows), np.asarray(cols))
+        else:
+            grouped: Dict[Tuple[int, int], List[int]] = {}
+            for i, (r, c) in enumerate(zip(rows, cols)):
+                if self._monopartite and r > c:
+                    r, c = c, r
+                positions = grouped.get((r, c))
+                if positions is None:
+                    self._check_bucket_range(r, c)
+                    grouped[(r, c)] = [i]
+                else:
+                    positions.append(i)
+        return {key: chunk.take(pa.array(positions, pa.int64())) for key, positions in grouped.items()}
+
+    def _group_positions_numpy(self, rows: Any, cols: Any) -> Dict[Tuple[int, int], List[int]]:
+        """
+        Group item positions by bucket, given the bucket coordinates as NumPy arrays.
+        """
+        rows = rows.astype(np.int64, copy=False)
+        cols = cols.astype(np.int64, copy=False)
+        if self._monopartite:
+            rows, cols = np.minimum(rows, cols), np.maximum(rows, cols)
+        out_of_range = (rows < 0) | (rows >= self.table_size) | (cols < 0) | (cols >= self.table_size)
+        if out_of_range.any():
+            i = int(np.argmax(out_of_range))
+            self._check_bucket_range(int(rows[i]), int(cols[i]))
+
+        keys = rows * self.table_size + cols
+        order = np.argsort(keys, kind="stable")
+        sorted_keys = keys[order]
+        bounds = np.flatnonzero(np.diff(sorted_keys)) + 1
+        starts = [0, *bounds.tolist()]
+        ends = [*bounds.tolist(), len(order)]
+        positions = order.tolist()
+        grouped: Dict[Tuple[int, int], List[int]] = {}
+        for start, end in zip(starts, ends):
+            r, c = divmod(int(sorted_keys[start]), self.table_size)
+            grouped[(r, c)] = positions[start:end]
+        return grouped
+
+    def _check_bucket_range(self, row: int, col: int) -> None:
+        """
+        Raise a ValueError if (row, col) is not inside the grid.
+        """
+        if not (0 <= row < self.table_size and 0 <= col < self.table_size):
+            raise ValueError(f"bucket id out of range: {(row, col)} for table_size={self.table_size}")
+
     def _log_buffer_matrix(self, *, wave: List[Tuple[int, int]]) -> None:
         """
         Dumps a compact 2D matrix of per-bucket sizes (len of each buffer) when DEBUG is enabled.
@@ -396,61 +1316,90 @@ class SplittingBatchProcessor(BatchProcessor):
         if self.predecessor is None:
             return
 
-        accumulated_stats: Dict[str, Any] = {}
-        pending: BatchResults | None = None
+        accumulated_stats = StatsAccumulator()
+        pending: ParallelBatchResult | None = None
 
         near_full_threshold = max(1, int(max_batch_size * self.near_full_ratio))
         burst_threshold = self.burst_multiplier * max_batch_size
+        self._track_thresholds((max_batch_size, near_full_threshold, burst_threshold))
 
-        for upstream in self.predecessor.get_batch(max_batch_size):
-            if upstream.statistics:
-                accumulated_stats = merge_summary(accumulated_stats, upstream.statistics)
-
-            for item in upstream.chunk:
-                r, c = self._id_extractor(item)
-                if self._monopartite and r > c:
-                    r, c = c, r
-                if not (0 <= r < self.table_size and 0 <= c < self.table_size):
-                    raise ValueError(f"bucket id out of range: {(r, c)} for table_size={self.table_size}")
-                self.buffer[r][c].append(item)
-
+        try:
+            for upstream in self.predecessor.get_batch(max_batch_size):
+                accumulated_stats.add(upstream.statistics)
+                if self._hot_sketch is not None:
+                    self._detect_hot_keys(upstream.chunk, max_batch_size)
+
+                for (r, c), items in self._scatter(upstream.chunk).items():
+                    if self._hot_slots:
+                        items = self._route_hot_rows(r, c, items)
+                        if not len(items):
+                            continue
+                    self._add_to_bucket(r, c, items)
+                self._sample_row_bytes(upstream.chunk)
+
+                while True:
+                    full_seed = self._select_wave(min_bucket_len=max_batch_size, max_bucket_len=max_batch_size)
+                    if not full_seed:
+                        break
+                    wave = self._select_wave(min_bucket_len=near_full_threshold, seed=full_seed,
+                                             max_bucket_len=max_batch_size)
+                    for br in self._flush_waves(wave, max_batch_size):
+                        if pending is not None:
+                            yield pending
+                        pending = br
+
+                while True:
+                    hot = self._find_hottest_bucket(threshold=burst_threshold)
+                    if hot is None:
+                        break
+                    hot_r, hot_c, hot_n = hot
+                    wave = self._select_wave(min_bucket_len=near_full_threshold, seed=[(hot_r, hot_c)],
+                                             max_bucket_len=max_batch_size)
+                    self.logger.debug(
+                        "burst flush: hottest_bucket=(%d,%d len=%d) threshold=%d near_full_threshold=%d wave_size=%d",
+                        hot_r, hot_c, hot_n, burst_threshold, near_full_threshold, len(wave)
+                    )
+                    for br in self._flush_waves(wave, max_batch_size):
+                        if pending is not None:
+                            yield pending
+                        pending = br
+
+                while True:
+                    lane_wave = self._select_lane_wave(max_batch_size, near_full_threshold)
+                    if not lane_wave:
+                        break
+                    br = self._flush_lane_wave(lane_wave, max_batch_size)
+                    if pending is not None:
+                        yield pending
+                    pending = br
+
+                self._enforce_memory_budget()
+
+            self.logger.debug("start flushing leftovers")
             while True:
-                full_seed = self._select_wave(min_bucket_len=max_batch_size)
-                if not full_seed:
+                wave = self._select_wave(min_bucket_len=1, max_bucket_len=max_batch_size)
+                if not wave:
                     break
-                wave = self._select_wave(min_bucket_len=near_full_threshold, seed=full_seed)
-                br = self._flush_wave(wave, max_batch_size, statistics={})
-                if pending is not None:
-                    yield pending
-                pending = br
-
+                for br in self._flush_waves(wave, max_batch_size):
+                    if pending is not None:
+                        yield pending
+                    pending = br
             while True:
-                hot = self._find_hottest_bucket(threshold=burst_threshold)
-                if hot is None:
+                lane_wave = self._select_lane_wave(1, 1)
+                if not lane_wave:
                     break
-                hot_r, hot_c, hot_n = hot
-                wave = self._select_wave(min_bucket_len=near_full_threshold, seed=[(hot_r, hot_c)])
-                self.logger.debug(
-                    "burst flush: hottest_bucket=(%d,%d len=%d) threshold=%d near_full_threshold=%d wave_size=%d",
-                    hot_r, hot_c, hot_n, burst_threshold, near_full_threshold, len(wave)
-                )
-                br = self._flush_wave(wave, max_batch_size, statistics={})
+                br = self._flush_lane_wave(lane_wave, max_batch_size)
                 if pending is not None:
                     yield pending
                 pending = br
 
-        self.logger.debug("start flushing leftovers")
-        while True:
-            wave = self._select_wave(min_bucket_len=1)
-            if not wave:
-                break
-            br = self._flush_wave(wave, max_batch_size, statistics={})
+            if self._hot:
+                accumulated_stats.add({"hot_keys": len(self._hot), "hot_lane_rows": self._lane_rows})
+                self._report_hot_keys()
             if pending is not None:
-                yield pending
-            pending = br
-
-        if pending is not None:
-            yield BatchResults(chunk=pending.chunk, statistics=accumulated_stats, batch_size=pending.batch_size)
+                yield dataclasses.replace(pending, statistics=accumulated_stats.to_dict())
+        finally:
+            self._discard_spill()
 
     def estimate_wave_count(self, expected_rows: int, max_workers: int, max_batch_size: int) -> int:
         """Estimate number of waves for given row count."""
@@ -0,0 +1,115 @@
+import threading
+from typing import Any, Dict, Iterator, Mapping, Optional
+
+NEO4J_COUNTERS = (
+    "constraints_added",
+    "constraints_removed",
+    "indexes_added",
+    "indexes_removed",
+    "labels_added",
+    "labels_removed",
+    "nodes_created",
+    "nodes_deleted",
+    "properties_set",
+    "relationships_created",
+    "relationships_deleted",
+)
+"""Names of the Neo4j summary counters, as reported by :func:`~etl_lib.core.ETLContext.Neo4jContext.query_database`."""
+
+
+class StatsAccumulator(Mapping):
+    """
+    Mutable, thread-safe running sum of statistics dicts.
+
+    Replaces repeated :func:`~etl_lib.core.utils.merge_summary` calls in loops: adding a dict only touches the keys of
+    that dict, instead of building a new dict of all keys seen so far on every call. For a single merge of two dicts,
+    such as adding the counters of a step to the statistics of a batch, `merge_summary` is cheaper.
+    Neo4j counters can be added straight from a `neo4j.SummaryCounters` with :meth:`add_counters`.
+
+    :meth:`to_dict` returns the same result as merging all added dicts with `merge_summary`. The accumulator itself is
+    a read-only mapping of the current sums, so it can be handed to readers (such as progress reporters) without
+    copying it.
+    """
+    __slots__ = ("_values", "_lock")
+
+    def __init__(self, statistics: Optional[Mapping[str, Any]] = None):
+        self._values: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+        if statistics:
+            self.add(statistics)
+
+    def add(self, statistics: Optional[Mapping[str, Any]]) -> "StatsAccumulator":
+        """
+        Add the values of `statistics`, summing values of keys already present.
+
+        Args:
+            statistics: dict (or another accumulator) to add. `None` is ignored.
+
+        Returns:
+            This accumulator.
+        """
+        if not statistics:
+            return self
+        if isinstance(statistics, StatsAccumulator):
+            statistics = statistics.to_dict()
+        with self._lock:
+            values = self._values
+            get = values.get
+            for key, value in statistics.items():
+                values[key] = get(key, 0) + value
+        return self
+
+    def add_counters(self, counters: Any) -> "StatsAccumulator":
+        """
+        Add the counters of a `neo4j.SummaryCounters` (or any object with the :data:`NEO4J_COUNTERS` attributes)
+        without building an intermediate dict.
+
+        Returns:
+            This accumulator.
+        """
+        with self._lock:
+            values = self._values
+            get = values.get
+            for name in NEO4J_COUNTERS:
+                values[name] = get(name, 0) + getattr(counters, name)
+        return self
+
+    def increment(self, key: str, value: Any = 1) -> "StatsAccumulator":
+        """
+        Add `value` to the single entry `key`.
+
+        Returns:
+            This accumulator.
+        """
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + value
+        return self
+
+    def get(self, key: str, default: Any = 0) -> Any:
+        """
+        Return the current value of `key`, or `default` if nothing was added for it.
+        """
+        return self._values.get(key, default)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Return a snapshot of the sums as a new dict.
+        """
+        with self._lock:
+            return dict(self._values)
+
+    def __getitem__(self, key: str) -> Any:
+        return self._values[key]
+
+    def __iter__(self) -> Iterator[str]:
+        with self._lock:
+            return iter(list(self._values))
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def __bool__(self) -> bool:
+        return bool(self._values)
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({self.to_dict()})"
@@ -0,0 +1,76 @@
+import threading
+from typing import Optional
+
+# parts of the Neo4j status codes of errors caused by the size (memory or duration) of a transaction
+_SIZE_ERROR_CODES = (
+    "MemoryPoolOutOfMemoryError",
+    "TransactionMemoryLimit",
+    "TransactionOutOfMemoryError",
+    "TransactionTimedOut",
+)
+
+
+def is_transaction_size_error(error: BaseException) -> bool:
+    """
+    Return `True` if `error` is a Neo4j error raised because a transaction used too much memory or took too long,
+    for example `Neo.TransientError.General.MemoryPoolOutOfMemoryError` or
+    `Neo.ClientError.Transaction.TransactionTimedOut`. A smaller transaction can succeed where such a transaction
+    failed.
+    """
+    code = getattr(error, "code", None)
+    return isinstance(code, str) and any(part in code for part in _SIZE_ERROR_CODES)
+
+
+class TransactionSizeLimit:
+    """
+    Ceiling of the number of rows per transaction, lowered each time a transaction fails because it was too large.
+
+    :class:`~etl_lib.data_sink.CypherBatchSink.CypherBatchSink` splits a batch failing with a
+    :func:`is_transaction_size_error` in halves and retries each half, recursively down to `min_rows`. The size of the
+    halves becomes the new ceiling, later batches are written in transactions of at most that many rows instead of
+    failing (and being split) again.
+
+    The limit is thread-safe. One instance can be shared by the sinks of a task, so that the ceiling learned by one
+    bucket of a :class:`~etl_lib.core.ParallelBatchProcessor.ParallelBatchProcessor` applies to all others.
+
+    Memory errors such as `MemoryPoolOutOfMemoryError` are transient errors. The driver retries them for up to
+    `max_transaction_retry_time` (30 seconds by default, see `NEO4J_DRIVER_MAX_TRANSACTION_RETRY_TIME`) before the
+    sink sees the error and splits the batch. Lower that time to split sooner.
+
+    Args:
+        min_rows: Batches of this size or smaller are not split, their error is raised.
+    """
+
+    def __init__(self, min_rows: int = 1):
+        if min_rows < 1:
+            raise ValueError(f"min_rows must be >= 1, got {min_rows}")
+        self.min_rows = min_rows
+        self._rows: Optional[int] = None
+        self._lock = threading.Lock()
+
+    @property
+    def rows(self) -> Optional[int]:
+        """
+        Maximum number of rows per transaction, `None` while no transaction failed.
+        """
+        return self._rows
+
+    def split(self, rows: int) -> Optional[int]:
+        """
+        Register that a transaction of `rows` rows was too large.
+
+        Returns:
+            The number of rows of the first part to retry with: half of `rows`, or the ceiling if another transaction
+            already lowered it further. `None` if `rows` is not larger than `min_rows` and the batch must not be
+            split.
+        """
+        if rows <= self.min_rows:
+            return None
+        half = max(self.min_rows, (rows + 1) // 2)
+        with self._lock:
+            if self._rows is None or half < self._rows:
+                self._rows = half
+            return self._rows
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(rows={self._rows}, min_rows={self.min_rows})"
@@ -1,13 +1,15 @@
 import json
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import Type, Generator
+from typing import Any, Generator, List, Optional, Tuple, Type
 
 from pydantic import BaseModel, ValidationError
 
 from etl_lib.core.BatchProcessor import BatchProcessor, BatchResults
 from etl_lib.core.ETLContext import ETLContext
+from etl_lib.core.ProcessPoolBatchProcessor import ordered_map
 from etl_lib.core.Task import Task
-from etl_lib.core.utils import merge_summary
+from etl_lib.core.utils import chunk_to_rows, merge_summary
 
 
 class ValidationBatchProcessor(BatchProcessor):
@@ -20,7 +22,9 @@ class ValidationBatchProcessor(BatchProcessor):
                  task: Task,
                  predecessor,
                  model: Type[BaseModel] | None,
-                 error_file: Path | None):
+                 error_file: Path | None,
+                 processes: Optional[int] = None,
+                 mp_context=None):
         """
         Constructs a new ValidationBatchProcessor.
 
@@ -30,6 +34,9 @@ class ValidationBatchProcessor(BatchProcessor):
         - `valid_rows`: Number of valid rows.
         - `invalid_rows`: Number of invalid rows.
 
+        Columnar chunks are passed through unchanged if no `model` is given. Otherwise, they are converted to rows for
+        validation and the valid rows are returned as a list of dicts.
+
         Args:
             context: :py:class:`etl_lib.core.ETLContext.ETLContext` instance.
             task: :py:class:`etl_lib.core.Task.Task` instance owning this batchProcessor.
@@ -37,12 +44,21 @@ class ValidationBatchProcessor(BatchProcessor):
             model: Pydantic model class used to validate each row in the batch. Optional.
             error_file: Path to the file that will receive each row that did not pass validation.
                 Required if `model` is provided.
+            processes: If set, rows are validated in a pool of this many worker processes, so that validation is
+                not limited to one core by the GIL. Batches are still returned, and invalid rows written to
+                `error_file`, in the order they are received. `model` must be importable by the worker processes,
+                i.e. defined at module level.
+            mp_context: optional `multiprocessing` context for the worker processes.
         """
         super().__init__(context, task, predecessor)
         if model is not None and error_file is None:
             raise ValueError('you must provide error file if the model is specified')
+        if processes is not None and processes < 1:
+            raise ValueError(f"processes must be >= 1, got {processes}")
         self.error_file = error_file
         self.model = model
+        self.processes = processes
+        self.mp_context = mp_context
 
     def get_batch(self, max_batch_size: int) -> Generator[BatchResults, None, None]:
         if self.predecessor is None:
@@ -60,35 +76,66 @@ class ValidationBatchProcessor(BatchProcessor):
                 )
             return
 
-        for batch in self.predecessor.get_batch(max_batch_size):
-            valid_rows = []
-            invalid_rows = []
-
-            for row in batch.chunk:
-                try:
-                    # Validate and transform the row
-                    validated_row = json.loads(self.model(**row).model_dump_json())
-                    valid_rows.append(validated_row)
-                except ValidationError as e:
-                    # Collect invalid rows with errors
-                    invalid_rows.append({"row": row, "errors": e.errors()})
-
-            # Write invalid rows to the error file
-            if invalid_rows:
-                with open(self.error_file, "a") as f:
-                    for invalid in invalid_rows:
-                        # the following is needed as ValueError (contained in 'ctx') is not json serializable
-                        serializable = {"row": invalid["row"],
-                                        "errors": [{k: v for k, v in e.items() if k != "ctx"} for e in
-                                                   invalid["errors"]]}
-                        f.write(f"{json.dumps(serializable)}\n")
-
-            # Yield BatchResults with statistics
-            yield BatchResults(
-                chunk=valid_rows,
-                statistics=merge_summary(batch.statistics, {
-                    "valid_rows": len(valid_rows),
-                    "invalid_rows": len(invalid_rows)
-                }),
-                batch_size=len(batch.chunk)
-            )
+        if self.processes is None:
+            for batch in self.predecessor.get_batch(max_batch_size):
+                valid_rows, invalid_rows = validate_rows(self.model, batch.chunk)
+                yield self._batch_result(batch, valid_rows, invalid_rows)
+            return
+
+        with ProcessPoolExecutor(max_workers=self.processes, mp_context=self.mp_context) as pool:
+            batches = self.predecessor.get_batch(max_batch_size)
+            for batch, (valid_rows, invalid_rows), _ in ordered_map(pool, _validate_batch, batches,
+                                                                    2 * self.processes, self.model):
+                yield self._batch_result(batch, valid_rows, invalid_rows)
+
+    def _batch_result(self, batch: BatchResults, valid_rows: List[dict], invalid_rows: List[dict]) -> BatchResults:
+        """
+        Write the invalid rows of `batch` to the error file and return the BatchResults with the valid rows.
+        """
+        if invalid_rows:
+            with open(self.error_file, "a") as f:
+                for invalid in invalid_rows:
+                    f.write(f"{json.dumps(invalid)}\n")
+
+        return BatchResults(
+            chunk=valid_rows,
+            statistics=merge_summary(batch.statistics, {
+                "valid_rows": len(valid_rows),
+                "invalid_rows": len(invalid_rows)
+            }),
+            batch_size=len(batch.chunk)
+        )
+
+
+def validate_rows(model: Type[BaseModel], chunk: Any) -> Tuple[List[dict], List[dict]]:
+    """
+    Validate the rows of `chunk` against `model`.
+
+    Module level function, so that it can be run in worker processes.
+
+    Args:
+        model: Pydantic model class used to validate each row.
+        chunk: List of rows or columnar batch.
+
+    Returns:
+        Tuple of the validated (and transformed) rows and one JSON serializable entry per invalid row,
+        containing the `row` and its validation `errors`.
+    """
+    valid_rows = []
+    invalid_rows = []
+    for row in chunk_to_rows(chunk):
+        try:
+            # Validate and transform the row
+            valid_rows.append(json.loads(model(**row).model_dump_json()))
+        except ValidationError as e:
+            # the following is needed as ValueError (contained in 'ctx') is not json serializable
+            invalid_rows.append({"row": row,
+                                 "errors": [{k: v for k, v in err.items() if k != "ctx"} for err in e.errors()]})
+    return valid_rows, invalid_rows
+
+
+def _validate_batch(model: Type[BaseModel], batch: BatchResults) -> Tuple[List[dict], List[dict]]:
+    """
+    :func:`validate_rows` for the chunk of `batch`, run in a worker process.
+    """
+    return validate_rows(model, batch.chunk)
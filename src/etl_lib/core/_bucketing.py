@@ -0,0 +1,339 @@
+"""
+Helpers shared by :class:`~etl_lib.core.SplittingBatchProcessor.SplittingBatchProcessor` and
+:class:`~etl_lib.core.KeySplittingBatchProcessor.KeySplittingBatchProcessor` to read key columns, hash ids and buffer
+the rows of each bucket.
+"""
+import hashlib
+import os
+import pickle
+from collections import deque
+from typing import Any, Dict, Iterable, List
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
+
+from etl_lib.core.utils import chunk_to_rows, is_columnar
+
+
+HASH_CACHE_SIZE = 1 << 20
+"""Maximum number of string ids whose hash is cached by :func:`to_u64_many`."""
+
+
+def column_values(chunk: Any, key: str | int) -> List[Any]:
+    """
+    Return the values of `key` for all items of `chunk`, a list of rows or a pyarrow RecordBatch/Table.
+    """
+    if is_columnar(chunk):
+        return chunk.column(key).to_pylist()
+    try:
+        return [item[key] for item in chunk]
+    except KeyError:
+        missing = next(item for item in chunk if key not in item)
+        raise KeyError(f"Item missing required keys: {key} in item {missing}")
+
+
+def integer_column_values(chunk: Any, key: str) -> Any:
+    """
+    Like :func:`column_values`, but returns a NumPy array for integer columns of pyarrow batches without nulls.
+    """
+    if np is not None and pa is not None and is_columnar(chunk):
+        column = chunk.column(key)
+        if pa.types.is_integer(column.type) and column.null_count == 0:
+            return column.to_numpy()
+    return column_values(chunk, key)
+
+
+def concat_columnar(parts: List[Any]) -> Any:
+    """
+    Concatenate pyarrow batches of the same schema, returns a Table if more than one part is given.
+    """
+    if len(parts) == 1:
+        return parts[0]
+    return pa.Table.from_batches([b for p in parts for b in (p.to_batches() if hasattr(p, "to_batches") else [p])])
+
+
+def take_positions(chunk: Any, positions: List[int]) -> Any:
+    """
+    Return the items of `chunk` at `positions`, as a list or, for pyarrow batches, as a pyarrow batch.
+    """
+    if is_columnar(chunk):
+        return chunk.take(pa.array(positions, pa.int64()))
+    return [chunk[i] for i in positions]
+
+
+def to_u64(v: Any) -> int:
+    """
+    Map an integer id to its low 64 bits and a string id to the first 64 bits of its blake2b hash.
+    """
+    if isinstance(v, int):
+        return v & 0xFFFFFFFFFFFFFFFF
+    if isinstance(v, str):
+        digest = hashlib.blake2b(v.encode("utf-8"), digest_size=16).digest()
+        return int.from_bytes(digest[:8], byteorder="big", signed=False)
+    raise TypeError(f"Expected int or str, got {type(v).__name__}")
+
+
+def to_u64_many(values: List[Any], hashed: Dict[str, int]) -> List[int]:
+    """
+    :func:`to_u64` of all `values`, caching the hashes of up to `HASH_CACHE_SIZE` strings in `hashed`.
+    """
+    out = []
+    append = out.append
+    blake2b = hashlib.blake2b
+    from_bytes = int.from_bytes
+    for v in values:
+        if type(v) is int:
+            append(v & 0xFFFFFFFFFFFFFFFF)
+        elif type(v) is str:
+            u64 = hashed.get(v)
+            if u64 is None:
+                u64 = from_bytes(blake2b(v.encode("utf-8"), digest_size=16).digest()[:8], "big")
+                if len(hashed) >= HASH_CACHE_SIZE:
+                    hashed.clear()
+                hashed[v] = u64
+            append(u64)
+        else:
+            append(to_u64(v))
+    return out
+
+
+_SPILL_RECORD_ROWS = 8192
+"""Maximum number of items per pickle record in a spill segment, bounds the memory needed to read a segment back."""
+
+
+class _SpillSegment:
+    """
+    Items of one bucket written to a local file as a sequence of pickle records.
+
+    Records are read back one at a time, the file is removed once the last record was read.
+    """
+    __slots__ = ("path", "_offset", "_records", "_len")
+
+    def __init__(self, path: str, chunks: Iterable[List[Any]]):
+        self.path = path
+        self._offset = 0
+        self._records: deque = deque()
+        self._len = 0
+        record: List[Any] = []
+        with open(path, "wb") as file:
+            for chunk in chunks:
+                if is_columnar(chunk):
+                    # columnar batches are compact already, keep them as they are
+                    if record:
+                        self._write_record(file, record)
+                        record = []
+                    self._write_record(file, chunk)
+                    continue
+                record.extend(chunk)
+                while len(record) >= _SPILL_RECORD_ROWS:
+                    self._write_record(file, record[:_SPILL_RECORD_ROWS])
+                    record = record[_SPILL_RECORD_ROWS:]
+            if record:
+                self._write_record(file, record)
+
+    def _write_record(self, file, record: Any) -> None:
+        pickle.dump(record, file, protocol=pickle.HIGHEST_PROTOCOL)
+        self._records.append(len(record))
+        self._len += len(record)
+
+    def __len__(self) -> int:
+        return self._len
+
+    def __iter__(self):
+        with open(self.path, "rb") as file:
+            file.seek(self._offset)
+            for _ in self._records:
+                yield from chunk_to_rows(pickle.load(file))
+
+    def read_record(self) -> Any:
+        """
+        Remove and return the next record.
+        """
+        with open(self.path, "rb") as file:
+            file.seek(self._offset)
+            record = pickle.load(file)
+            self._offset = file.tell()
+        self._len -= self._records.popleft()
+        if not self._records:
+            self.discard()
+        return record
+
+    def discard(self) -> None:
+        """
+        Remove the backing file.
+        """
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+
+class BucketQueue:
+    """
+    FIFO of the items buffered for one bucket.
+
+    Items are kept in the chunks they were added with, either lists of rows or pyarrow batches. Taking items only slices
+    the head chunk(s), so the cost of :meth:`take` depends on the number of items taken, not on the backlog left behind.
+
+    The queue can move its in-memory items to disk with :meth:`spill`. Spilled items keep their position in the FIFO:
+    the queue is then made of in-memory head chunks, spilled segments and in-memory tail chunks (items added after the
+    spill). Segments are read back record by record as :meth:`take` reaches them.
+    """
+    __slots__ = ("_chunks", "_offset", "_len", "_segments", "_tail", "_tail_len")
+
+    def __init__(self):
+        self._chunks: deque = deque()
+        self._offset = 0
+        self._len = 0
+        self._segments: deque | None = None
+        self._tail: deque | None = None
+        self._tail_len = 0
+
+    def __len__(self) -> int:
+        return self._len
+
+    @property
+    def in_memory(self) -> int:
+        """
+        Number of items held in memory, i.e. not spilled to disk.
+        """
+        if not self._segments:
+            return self._len
+        return self._len - sum(len(segment) for segment in self._segments)
+
+    def __iter__(self):
+        for i, chunk in enumerate(self._chunks):
+            yield from chunk_to_rows(chunk[self._offset:] if i == 0 and self._offset else chunk)
+        if self._segments:
+            for segment in self._segments:
+                yield from segment
+            for chunk in self._tail:
+                yield from chunk_to_rows(chunk)
+
+    def extend(self, items: List[Any]) -> None:
+        """
+        Append `items` at the end. The list is stored as is and must not be modified by the caller afterwards.
+        """
+        if len(items):
+            if self._segments:
+                self._tail.append(items)
+                self._tail_len += len(items)
+            else:
+                self._chunks.append(items)
+            self._len += len(items)
+
+    def take(self, n: int) -> Any:
+        """
+        Remove and return up to `n` items from the front.
+
+        Returns a list, or a pyarrow batch if the items were added as pyarrow batches.
+        """
+        if self._len and not self._chunks:
+            self._restore()
+        if self._chunks and is_columnar(self._chunks[0]):
+            return self._take_columnar(n)
+        out: List[Any] = []
+        while n > 0 and self._len:
+            if not self._chunks:
+                self._restore()
+            head = self._chunks[0]
+            available = len(head) - self._offset
+            if n >= available:
+                self._chunks.popleft()
+                if not out and self._offset == 0:
+                    out = head
+                else:
+                    out.extend(head[self._offset:])
+                self._offset = 0
+                taken = available
+            else:
+                out.extend(head[self._offset:self._offset + n])
+                self._offset += n
+                taken = n
+            n -= taken
+            self._len -= taken
+        return out
+
+    def _take_columnar(self, n: int) -> Any:
+        """
+        :meth:`take` for buckets holding pyarrow batches, slices are zero-copy.
+        """
+        parts = []
+        while n > 0 and self._len:
+            if not self._chunks:
+                self._restore()
+            head = self._chunks[0]
+            available = len(head) - self._offset
+            taken = min(n, available)
+            parts.append(head.slice(self._offset, taken) if self._offset or taken < available else head)
+            if taken == available:
+                self._chunks.popleft()
+                self._offset = 0
+            else:
+                self._offset += taken
+            n -= taken
+            self._len -= taken
+        return concat_columnar(parts)
+
+    def _restore(self) -> None:
+        """
+        Refill the empty head with the next spilled record, or with the tail once all segments are consumed.
+        """
+        if self._segments:
+            segment = self._segments[0]
+            self._chunks.append(segment.read_record())
+            if not len(segment):
+                self._segments.popleft()
+            if self._segments:
+                return
+        self._chunks.extend(self._tail or ())
+        self._segments = None
+        self._tail = None
+        self._tail_len = 0
+
+    def spill(self, path: str) -> int:
+        """
+        Write all in-memory items to a new segment file at `path` and return the number of items written.
+
+        Items of the head (older than existing segments) and of the tail are written to separate files to keep
+        the FIFO order; the head file name gets the suffix `.head`.
+        """
+        spilled = 0
+        if self._segments is None:
+            self._segments = deque()
+            self._tail = deque()
+        if self._chunks:
+            head = [
+                (chunk.slice(self._offset) if is_columnar(chunk) else chunk[self._offset:]) if i == 0 and self._offset
+                else chunk
+                for i, chunk in enumerate(self._chunks)
+            ]
+            segment = _SpillSegment(path + ".head", head)
+            self._segments.appendleft(segment)
+            self._chunks.clear()
+            self._offset = 0
+            spilled += len(segment)
+        if self._tail:
+            segment = _SpillSegment(path, self._tail)
+            self._segments.append(segment)
+            self._tail.clear()
+            self._tail_len = 0
+            spilled += len(segment)
+        if not self._segments:
+            self._segments = None
+            self._tail = None
+        return spilled
+
+    def discard(self) -> None:
+        """
+        Remove all spill files of this queue.
+        """
+        for segment in self._segments or ():
+            segment.discard()
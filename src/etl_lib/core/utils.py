@@ -1,17 +1,280 @@
+import functools
 import io
 import logging
 import os
+import re
 import signal
 import sys
+from operator import itemgetter
+from typing import List, Optional, Sequence, Tuple
+
+from neo4j.exceptions import DriverError, Neo4jError
 
 
 def merge_summary(summary_1: dict, summary_2: dict) -> dict:
     """
     Helper function to merge dicts. Assuming that values are numbers.
     If a key exists in both dicts, then the result will contain a key with the added values.
+
+    To sum many dicts, for example in a loop over batches, use :class:`~etl_lib.core.StatsAccumulator.StatsAccumulator`.
+    """
+    merged = dict(summary_1)
+    for key, value in summary_2.items():
+        merged[key] = merged.get(key, 0) + value
+    return merged
+
+
+def is_transient_error(error: BaseException) -> bool:
+    """
+    Return True if `error` is a Neo4j or driver error that can succeed when retried, for example a deadlock, a lock
+    wait timeout or a lost connection.
+    """
+    return isinstance(error, (Neo4jError, DriverError)) and error.is_retryable()
+
+
+# status codes of errors caused by the values of single rows, the same statement can succeed for other rows
+_ROW_DATA_ERROR_CODES = (
+    "Neo.ClientError.Schema.ConstraintValidationFailed",
+    "Neo.ClientError.Statement.ArgumentError",
+    "Neo.ClientError.Statement.ArithmeticError",
+    "Neo.ClientError.Statement.TypeError",
+)
+
+
+def is_row_data_error(error: BaseException) -> bool:
+    """
+    Return True if `error` is a Neo4j error caused by the data of some rows, for example a constraint violation or a
+    property of the wrong type. Errors of the statement itself, such as syntax, security or missing parameter errors,
+    fail for every row and return False.
+    """
+    return isinstance(error, Neo4jError) and error.code in _ROW_DATA_ERROR_CODES
+
+
+def is_columnar(chunk) -> bool:
+    """
+    Return True if `chunk` is a columnar batch (a `pyarrow.RecordBatch` or `pyarrow.Table`) instead of a list of rows.
+    """
+    return hasattr(chunk, "schema") and hasattr(chunk, "to_pylist")
+
+
+def chunk_to_rows(chunk) -> list:
+    """
+    Return the rows of `chunk` as a list, converting columnar batches to a list of dicts.
+    """
+    if is_columnar(chunk):
+        return chunk.to_pylist()
+    return chunk
+
+
+def slice_chunk(chunk, start: int, stop: int):
+    """
+    Return the rows `start` to `stop` (exclusive) of `chunk`, keeping columnar batches columnar (without copying).
+    """
+    if is_columnar(chunk):
+        return chunk.slice(start, stop - start)
+    return chunk[start:stop]
+
+
+def encode_columnar(chunk) -> Tuple[List[str], list]:
+    """
+    Split the rows of `chunk` into the column names and one tuple of values per row.
+
+    Sent to Neo4j as query parameter, the column names are not repeated for every row.
+    Use :func:`columnar_unwind_query` to rewrite the query for this encoding.
+
+    Args:
+        chunk: list of dicts or columnar batch (see :func:`is_columnar`). For dicts, the columns are the keys of all
+            rows in the order first seen, values of keys missing in a row are `None`.
+
+    Returns:
+        Tuple of the column names and the list of value tuples.
+    """
+    if is_columnar(chunk):
+        return list(chunk.schema.names), list(zip(*(column.to_pylist() for column in chunk.columns)))
+    if not chunk:
+        return [], []
+
+    keys = list(chunk[0])
+    width = len(keys)
+    if all(len(row) == width for row in chunk):
+        # rows of the same width that all have the keys of the first row have exactly these keys
+        try:
+            if width > 1:
+                return keys, list(map(itemgetter(*keys), chunk))
+            return keys, [tuple(row[key] for key in keys) for row in chunk]
+        except KeyError:
+            pass
+
+    columns = dict.fromkeys(keys)
+    for row in chunk:
+        columns.update(dict.fromkeys(row))
+    keys = list(columns)
+    return keys, [tuple(row.get(key) for key in keys) for row in chunk]
+
+
+_UNWIND_BATCH = re.compile(r"UNWIND\s+\$batch\s+AS\s+(\w+|`[^`]+`)", re.IGNORECASE)
+_PLAIN_NAME = re.compile(r"[A-Za-z_][A-Za-z0-9_]*")
+
+
+@functools.lru_cache(maxsize=128)
+def columnar_unwind_query(query: str, keys: Tuple[str, ...]) -> str:
+    """
+    Rewrite `UNWIND $batch AS row` in `query` for a `$batch` parameter encoded with :func:`encode_columnar`.
+
+    The map of each row is rebuilt on the server from the value tuples, so the rest of the query is unchanged::
+
+        UNWIND $batch AS __values WITH *, {id: __values[0], name: __values[1]} AS row
+
+    Note:
+        For rows with missing keys, the rebuilt map holds `null` for these keys. `SET n += row` then removes the
+        property instead of leaving it untouched.
+
+    Args:
+        query: Cypher query containing `UNWIND $batch AS <variable>`.
+        keys: column names as returned by :func:`encode_columnar`.
+
+    Returns:
+        The rewritten query. Results are cached, the query only changes if the columns do.
+    """
+    match = _UNWIND_BATCH.search(query)
+    if match is None:
+        raise ValueError("query must contain `UNWIND $batch AS <variable>` to use the columnar encoding")
+    if _uses_batch_elsewhere(query):
+        raise ValueError("query uses `$batch` outside of `UNWIND $batch AS <variable>`, which the columnar encoding "
+                         "does not support")
+    fields = ", ".join(f"{_quote_name(key)}: __values[{i}]" for i, key in enumerate(keys))
+    unwind = f"UNWIND $batch AS __values WITH *, {{{fields}}} AS {match.group(1)}"
+    return query[:match.start()] + unwind + query[match.end():]
+
+
+_STRING_OR_COMMENT = re.compile(r"'(?:[^'\\]|\\.)*'|\"(?:[^\"\\]|\\.)*\"|//[^\n]*|/\*.*?\*/", re.DOTALL)
+_PROPERTY_ACCESS = re.compile(r"\s*\.\s*(\w+|`(?:[^`]|``)+`)")
+_BATCH_PARAMETER = re.compile(r"\$\s*(?:batch\b|`batch`)")
+
+
+def _uses_batch_elsewhere(query: str) -> bool:
+    """
+    Return True if `$batch` is used in `query` outside of its first `UNWIND $batch AS <variable>`, for example in a
+    second `UNWIND`, `size($batch)` or `$batch[0]`. Strings and comments are ignored.
+    """
+    return len(_BATCH_PARAMETER.findall(_STRING_OR_COMMENT.sub(" ", query))) > 1
+
+
+def referenced_columns(query: str) -> Optional[List[str]]:
+    """
+    Find the columns of `$batch` used by `query`, i.e. the properties `row.<name>` read from the variable of
+    `UNWIND $batch AS row`.
+
+    The analysis is conservative. If the variable is used in any other way than property access, for example in
+    `SET n += row`, `row[key]`, `keys(row)` or `WITH row AS r`, or is referenced in backticks (`` `row` ``), all columns
+    may be used and `None` is returned. The same holds if `$batch` is used anywhere else, such as in `size($batch)`.
+    Variables are case-sensitive, `ROW.id` is not a use of `row`.
+
+    Args:
+        query: Cypher query containing `UNWIND $batch AS <variable>`.
+
+    Returns:
+        Names of the columns in order of first use, or `None` if they can not be determined.
+    """
+    code = _STRING_OR_COMMENT.sub(" ", query)
+    match = _UNWIND_BATCH.search(code)
+    if match is None or _uses_batch_elsewhere(code):
+        return None
+    variable = match.group(1)
+    name = variable[1:-1].replace("``", "`") if variable.startswith("`") else variable
+    rest = code[match.end():]
+    if f"`{name.replace('`', '``')}`" in rest:
+        return None
+    usage = re.compile(rf"(?<![\w`$.]){re.escape(name)}(?![\w`])")
+
+    columns = {}
+    for use in usage.finditer(rest):
+        access = _PROPERTY_ACCESS.match(rest, use.end())
+        if access is None:
+            return None
+        name = access.group(1)
+        if name.startswith("`"):
+            name = name[1:-1].replace("``", "`")
+        columns[name] = None
+    return list(columns)
+
+
+def project_columns(chunk, columns: Sequence[str]):
+    """
+    Return `chunk` reduced to `columns`. Columns not present in `chunk` are skipped.
+
+    Args:
+        chunk: list of dicts or columnar batch (see :func:`is_columnar`).
+        columns: names of the columns to keep.
     """
-    return {i: summary_1.get(i, 0) + summary_2.get(i, 0)
-            for i in set(summary_1).union(summary_2)}
+    if is_columnar(chunk):
+        names = set(chunk.schema.names)
+        return chunk.select([column for column in columns if column in names])
+    return [{column: row[column] for column in columns if column in row} for row in chunk]
+
+
+@functools.lru_cache(maxsize=128)
+def in_transactions_query(query: str, rows_per_transaction: int, concurrency: Optional[int] = None,
+                          on_error: str = "CONTINUE") -> str:
+    """
+    Wrap the part of `query` after `UNWIND $batch AS row` into `CALL { ... } IN TRANSACTIONS`, so that the server
+    splits one large `$batch` into transactions of `rows_per_transaction` rows::
+
+        UNWIND $batch AS row
+        CALL {
+          WITH row
+          <rest of the query>
+        } IN 4 CONCURRENT TRANSACTIONS OF 1000 ROWS
+        ON ERROR CONTINUE
+        REPORT STATUS AS __status
+        RETURN __status.transactionId AS transactionId, __status.started AS started,
+               __status.committed AS committed, __status.errorMessage AS errorMessage, count(*) AS rows
+
+    The result has one record per inner transaction, unless `on_error` is `FAIL`, which returns nothing and fails
+    the query with the first failed inner transaction. Such queries must run in an auto-commit transaction, see
+    :meth:`~etl_lib.core.ETLContext.Neo4jContext.query_database_auto_commit`.
+
+    Args:
+        query: Cypher query starting with `UNWIND $batch AS <variable>`. The rest must not return anything.
+        rows_per_transaction: Rows of `$batch` per inner transaction.
+        concurrency: Number of inner transactions the server runs concurrently. Needs Neo4j 5.21 or later.
+        on_error: `CONTINUE`, `BREAK` or `FAIL`, see the Neo4j documentation of `CALL { } IN TRANSACTIONS`.
+
+    Returns:
+        The rewritten query.
+    """
+    match = _UNWIND_BATCH.search(query)
+    if match is None or _STRING_OR_COMMENT.sub("", query[:match.start()]).strip():
+        raise ValueError("query must start with `UNWIND $batch AS <variable>` to run in transactions")
+    if rows_per_transaction < 1:
+        raise ValueError(f"rows_per_transaction must be >= 1, got {rows_per_transaction}")
+    on_error = on_error.upper()
+    if on_error not in ("CONTINUE", "BREAK", "FAIL"):
+        raise ValueError(f"on_error must be CONTINUE, BREAK or FAIL, got {on_error}")
+
+    variable = match.group(1)
+    concurrent = f"{concurrency} CONCURRENT " if concurrency else ""
+    lines = [
+        f"UNWIND $batch AS {variable}",
+        "CALL {",
+        f"  WITH {variable}",
+        query[match.end():].strip(),
+        f"}} IN {concurrent}TRANSACTIONS OF {rows_per_transaction} ROWS",
+        f"ON ERROR {on_error}",
+    ]
+    if on_error != "FAIL":
+        lines += [
+            "REPORT STATUS AS __status",
+            "RETURN __status.transactionId AS transactionId, __status.started AS started, "
+            "__status.committed AS committed, __status.errorMessage AS errorMessage, count(*) AS rows",
+        ]
+    return "\n".join(lines)
+
+
+def _quote_name(name: str) -> str:
+    if _PLAIN_NAME.fullmatch(name):
+        return name
+    return "`" + name.replace("`", "``") + "`"
 
 
 def setup_logging(log_file=None):
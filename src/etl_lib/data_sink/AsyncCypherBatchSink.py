@@ -0,0 +1,161 @@
+import asyncio
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from typing import Any, Coroutine, Generator, List, Optional, Sequence, Tuple, Union
+
+from etl_lib.core.BatchProcessor import BatchProcessor, BatchResults, append_result
+from etl_lib.core.ETLContext import ETLContext
+from etl_lib.core.Task import Task
+from etl_lib.data_sink.CypherBatchSink import CypherBatchEncoder
+
+
+class _EventLoopThread:
+    """
+    Runs an asyncio event loop in a daemon thread, so that generator based (synchronous) BatchProcessors can submit
+    coroutines to it and wait for their results.
+    """
+
+    def __init__(self, name: str):
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, daemon=True, name=name)
+
+    def __enter__(self) -> "_EventLoopThread":
+        self.thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+        self.loop.close()
+        return False
+
+    def submit(self, coro: Coroutine) -> Future:
+        """
+        Schedule `coro` on the loop and return a `concurrent.futures.Future` of its result.
+        """
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def run(self, coro: Coroutine) -> Any:
+        """
+        Run `coro` on the loop and wait for its result.
+        """
+        return self.submit(coro).result()
+
+
+class AsyncCypherBatchSink(BatchProcessor):
+    """
+    BatchProcessor to write batches of data to a Neo4j database, keeping several transactions in flight.
+
+    :class:`~etl_lib.data_sink.CypherBatchSink.CypherBatchSink` waits for each transaction to commit before it asks
+    the predecessor for the next batch. This sink sends each batch in its own transaction, on its own session of a
+    `neo4j.AsyncDriver`, and only waits once `max_in_flight` transactions are pending. The network round trips and
+    commits of consecutive batches therefore overlap, without a
+    :class:`~etl_lib.core.SplittingBatchProcessor.SplittingBatchProcessor`.
+
+    The async driver runs on an event loop in a separate thread, created for each call of :meth:`get_batch`.
+    Upstream processors and downstream processors keep running in the calling thread.
+
+    Note:
+        - Results are yielded in the order the batches were received, with the statistics of the incoming batch
+          merged with the counters of its transaction.
+        - Transactions run concurrently. Only use this sink if the batches do not write to the same nodes or
+          relationships, otherwise they wait for each other's locks or deadlock (and are retried by the driver).
+        - If a transaction fails, the exception is re-raised when its result is reached and pending transactions are
+          cancelled.
+
+    Each transaction emits a `cypher_tx_done` instrumentation event with the number of transactions `in_flight`
+    when it was sent.
+
+    `columnar_batch`, `columns`, `prune_columns` and `single_transaction` work as for
+    :class:`~etl_lib.data_sink.CypherBatchSink.CypherBatchSink`.
+    """
+
+    def __init__(self, context: ETLContext, task: Task, predecessor: BatchProcessor, query: Union[str, List[str]],
+                 max_in_flight: int = 4, columnar_batch: bool = False, columns: Optional[Sequence[str]] = None,
+                 prune_columns: bool = False, single_transaction: bool = False, **kwargs):
+        """
+        Constructs a new AsyncCypherBatchSink.
+
+        Args:
+            context: :class:`etl_lib.core.ETLContext.ETLContext` instance.
+            task: :class:`etl_lib.core.Task.Task` instance owning this batchProcessor.
+            predecessor: BatchProcessor which :func:`~get_batch` function will be called to receive batches to process.
+            query: Cypher to write the query to Neo4j.
+                Data will be passed as `batch` parameter.
+                Therefore, the query should start with a `UNWIND $batch AS row`.
+                Can be a list of queries, each receiving the same parameters.
+            max_in_flight: Maximum number of transactions sent but not yet yielded.
+            columnar_batch: Send `$batch` as column names (in the query) and value tuples, instead of a list of maps.
+            columns: Columns to send. Other columns are dropped before sending.
+            prune_columns: Without `columns`, send only the columns the query reads as `row.<column>`.
+            single_transaction: Run a list of queries in one transaction per batch.
+            kwargs: Additional parameters passed to the query.
+        """
+        super().__init__(context, task, predecessor)
+        if max_in_flight < 1:
+            raise ValueError(f"max_in_flight must be >= 1, got {max_in_flight}")
+        self.query = query
+        self.neo4j = context.neo4j
+        self.max_in_flight = max_in_flight
+        self.encoder = CypherBatchEncoder(query, columns, prune_columns, columnar_batch)
+        self.single_transaction = single_transaction
+        self.kwargs = kwargs
+
+    def get_batch(self, max_batch_size: int) -> Generator[BatchResults, None, None]:
+        """
+        Run the Cypher query for each incoming batch, up to `max_in_flight` at a time.
+        :param max_batch_size: The maximum batch size to use when requesting from predecessor.
+        :return: Generator[BatchResults, None, None]
+        """
+        if self.predecessor is None:
+            raise ValueError(f"{self.__class__.__name__} requires a predecessor")
+
+        with _EventLoopThread(name=f"{self.__class__.__name__}-loop") as loop:
+            driver = loop.run(self._open_driver())
+            in_flight: deque = deque()
+            try:
+                for batch_result in self.predecessor.get_batch(max_batch_size):
+                    query, batch = self.encoder.encode(batch_result.chunk)
+                    in_flight.append((batch_result, len(in_flight) + 1, loop.submit(self._write(driver, query, batch))))
+                    if len(in_flight) >= self.max_in_flight:
+                        yield self._result(*in_flight.popleft())
+                while in_flight:
+                    yield self._result(*in_flight.popleft())
+            finally:
+                loop.run(self._close_driver(driver, [future for _, _, future in in_flight]))
+
+    async def _open_driver(self):
+        return self.neo4j.async_driver()
+
+    async def _close_driver(self, driver, pending: List[Future]) -> None:
+        """
+        Cancel the transactions not yet yielded, wait for them to finish, and close the driver.
+        """
+        for future in pending:
+            future.cancel()
+        tasks = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await driver.close()
+
+    async def _write(self, driver, query: Union[str, List[str]], batch: List[Any]) -> Tuple[dict, float]:
+        """
+        Write `batch` in one transaction on a new session and return the summary counters and the duration in
+        milliseconds.
+        """
+        start = time.perf_counter()
+        async with self.neo4j.async_session(driver) as session:
+            result = await self.neo4j.query_database_async(session, query, fetch_records=False,
+                                                           single_transaction=self.single_transaction, batch=batch,
+                                                           **self.kwargs)
+        return result.summary, (time.perf_counter() - start) * 1000.0
+
+    def _result(self, batch_result: BatchResults, in_flight: int, future: Future) -> BatchResults:
+        summary, elapsed_ms = future.result()
+        self._instrument("cypher_tx_done", {
+            "rows": batch_result.batch_size,
+            "dt_ms": round(elapsed_ms, 3),
+            "in_flight": in_flight,
+        })
+        return self._unless_stats_only(append_result(batch_result, summary))
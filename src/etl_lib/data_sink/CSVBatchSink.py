@@ -41,7 +41,7 @@ class CSVBatchSink(BatchProcessor):
                 "rows": len(batch_result.chunk),
                 "dt_ms": round((time.perf_counter() - t0) * 1000.0, 3),
             })
-            yield append_result(batch_result, {"rows_written": len(batch_result.chunk)})
+            yield self._unless_stats_only(append_result(batch_result, {"rows_written": len(batch_result.chunk)}))
 
     def _write_to_csv(self, data: list[dict]):
         """
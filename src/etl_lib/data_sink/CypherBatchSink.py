@@ -1,17 +1,113 @@
+import json
+import logging
+import threading
 import time
-from typing import Generator
+from pathlib import Path
+from typing import Any, Generator, List, Optional, Sequence, Tuple, Union
 
-from etl_lib.core.BatchProcessor import (BatchProcessor, BatchResults, append_result)
+from neo4j.exceptions import Neo4jError
+
+from etl_lib.core.AdaptiveBatchSizeController import AdaptiveBatchSizeController
+from etl_lib.core.BatchProcessor import BatchProcessor, BatchResults
 from etl_lib.core.ETLContext import ETLContext
+from etl_lib.core.StatsAccumulator import StatsAccumulator
 from etl_lib.core.Task import Task
+from etl_lib.core.TransactionSizeLimit import TransactionSizeLimit, is_transaction_size_error
+from etl_lib.core.utils import (chunk_to_rows, columnar_unwind_query, encode_columnar, is_row_data_error,
+                                project_columns, referenced_columns, slice_chunk)
+
+# serializes appends of sinks sharing a dead letter file
+_DEAD_LETTER_LOCK = threading.Lock()
+
+
+class CypherBatchEncoder:
+    """
+    Turns the chunks of incoming batches into the query and the `$batch` parameter the Cypher sinks send.
+
+    Args:
+        query: Cypher query starting with `UNWIND $batch AS row`, or a list of such queries.
+        columns: Columns to send, other columns are dropped before the batch is serialized.
+        prune_columns: Without `columns`, send only the columns the queries read, see
+            :func:`~etl_lib.core.utils.referenced_columns`. If they can not be determined, all columns are sent.
+        columnar_batch: Send value tuples instead of maps, see :func:`~etl_lib.core.utils.columnar_unwind_query`.
+    """
+
+    def __init__(self, query: Union[str, List[str]], columns: Optional[Sequence[str]] = None,
+                 prune_columns: bool = False, columnar_batch: bool = False):
+        self.logger = logging.getLogger(f"{self.__class__.__module__}.{self.__class__.__name__}")
+        self.query = query
+        if columns is None and prune_columns:
+            columns = self.__referenced_columns(query if isinstance(query, list) else [query])
+            if columns is None:
+                self.logger.info("columns used by the query can not be determined, sending all columns")
+            else:
+                self.logger.debug(f"sending columns {columns}")
+        self.columns = list(columns) if columns is not None else None
+        self.columnar_batch = columnar_batch
+
+    def encode(self, chunk) -> Tuple[Union[str, List[str]], list]:
+        """
+        Return the query (or queries) and the `$batch` parameter to send for `chunk`.
+        """
+        if self.columns is not None:
+            chunk = project_columns(chunk, self.columns)
+        if not self.columnar_batch:
+            return self.query, chunk_to_rows(chunk)
+        keys, values = encode_columnar(chunk)
+        if isinstance(self.query, list):
+            return [columnar_unwind_query(query, tuple(keys)) for query in self.query], values
+        return columnar_unwind_query(self.query, tuple(keys)), values
+
+    @staticmethod
+    def __referenced_columns(queries: List[str]) -> Optional[List[str]]:
+        columns = {}
+        for query in queries:
+            used = referenced_columns(query)
+            if used is None:
+                return None
+            columns.update(dict.fromkeys(used))
+        return list(columns)
 
 
 class CypherBatchSink(BatchProcessor):
     """
     BatchProcessor to write batches of data to a Neo4j database.
+
+    Columnar chunks (`pyarrow.RecordBatch` or `pyarrow.Table`) are converted to a list of dicts right before the
+    query is sent.
+
+    With a `batch_size_controller`, the incoming batches are re-sliced into transactions of the size the controller
+    asks for, see :class:`~etl_lib.core.AdaptiveBatchSizeController.AdaptiveBatchSizeController`.
+
+    With `columnar_batch=True`, `$batch` is sent as a list of value tuples and the query is rewritten to rebuild the
+    row maps on the server, see :func:`~etl_lib.core.utils.columnar_unwind_query`. This saves sending every key once
+    per row.
+
+    With `columns` or `prune_columns=True`, columns the query does not read are dropped before sending. The batches
+    yielded downstream keep all columns.
+
+    Records returned by the query are discarded, only the counters are reported. With a list of queries, for example
+    one creating nodes and one creating relationships from the same rows, `single_transaction=True` runs all of
+    them in one transaction per batch instead of one transaction per query.
+
+    A transaction failing because it used too much memory or took too long (see
+    :func:`~etl_lib.core.TransactionSizeLimit.is_transaction_size_error`) is retried in halves, recursively down to
+    `size_limit.min_rows` rows. The size of the halves becomes a ceiling for all later transactions, see
+    :class:`~etl_lib.core.TransactionSizeLimit.TransactionSizeLimit`. Each split is counted as `tx_splits` in the
+    statistics and reported as a `batch_split` instrumentation event.
+
+    With a `dead_letter_file`, a transaction failing with an error caused by the data of some rows (a constraint
+    violation or a property of the wrong type, see :func:`~etl_lib.core.utils.is_row_data_error`) is bisected as well,
+    until the failing rows are found. Each of them is appended to the file as a JSON line with the `row` and the Neo4j
+    `error`, all other rows are written. Dead-lettered rows are counted as `dead_lettered_rows` in the statistics and
+    reported as `dead_lettered` instrumentation events. Other errors, such as syntax errors, are raised.
     """
 
-    def __init__(self, context: ETLContext, task: Task, predecessor: BatchProcessor, query: str, **kwargs):
+    def __init__(self, context: ETLContext, task: Task, predecessor: BatchProcessor, query: Union[str, List[str]],
+                 batch_size_controller: Optional[AdaptiveBatchSizeController] = None, columnar_batch: bool = False,
+                 columns: Optional[Sequence[str]] = None, prune_columns: bool = False,
+                 single_transaction: bool = False, size_limit: Optional[TransactionSizeLimit] = None,
+                 dead_letter_file: Optional[Path] = None, **kwargs):
         """
         Constructs a new CypherBatchSink.
 
@@ -22,10 +118,27 @@ class CypherBatchSink(BatchProcessor):
             query: Cypher to write the query to Neo4j.
                 Data will be passed as `batch` parameter.
                 Therefore, the query should start with a `UNWIND $batch AS row`.
+                Can be a list of queries, each receiving the same parameters.
+            batch_size_controller: Optional controller deciding the number of rows per transaction from the measured
+                transaction latency. Without it, each incoming batch is written in one transaction.
+            columnar_batch: Send `$batch` as column names (in the query) and value tuples, instead of a list of maps.
+            columns: Columns to send. Other columns are dropped before sending.
+            prune_columns: Without `columns`, send only the columns the query reads as `row.<column>`.
+            single_transaction: Run a list of queries in one transaction per batch.
+            size_limit: Ceiling of the rows per transaction, lowered when transactions are too large. Pass the same
+                instance to sinks that should share it, by default each sink has its own.
+            dead_letter_file: Path to the file that will receive each row failing with a row data error. Without it,
+                such errors are raised.
+            kwargs: Additional parameters passed to the query.
         """
         super().__init__(context, task, predecessor)
         self.query = query
         self.neo4j = context.neo4j
+        self.batch_size_controller = batch_size_controller
+        self.size_limit = size_limit if size_limit is not None else TransactionSizeLimit()
+        self.dead_letter_file = dead_letter_file
+        self.encoder = CypherBatchEncoder(query, columns, prune_columns, columnar_batch)
+        self.single_transaction = single_transaction
         self.kwargs = kwargs
 
     def get_batch(self, max_batch_size: int) -> Generator[BatchResults, None, None]:
@@ -38,15 +151,165 @@ class CypherBatchSink(BatchProcessor):
             raise ValueError(f"{self.__class__.__name__} requires a predecessor")
 
         with self.neo4j.session() as session:
+            if self.batch_size_controller is not None:
+                yield from self._get_batch_adaptive(session, max_batch_size)
+                return
+
             for batch_result in self.predecessor.get_batch(max_batch_size):
-                start = time.perf_counter()
+                statistics = StatsAccumulator(batch_result.statistics)
+                self._write_batch(session, batch_result.chunk, statistics)
+                yield self._unless_stats_only(BatchResults(chunk=batch_result.chunk, statistics=statistics.to_dict(),
+                                                           batch_size=batch_result.batch_size))
+
+    def _get_batch_adaptive(self, session, max_batch_size: int) -> Generator[BatchResults, None, None]:
+        """
+        :meth:`get_batch` writing transactions of the size chosen by the batch size controller.
 
-                result = self.neo4j.query_database(session=session, query=self.query, batch=batch_result.chunk,
-                                                   **self.kwargs)
+        Rows are carried over between incoming batches. The statistics of an incoming batch are reported with the
+        first transaction written after it was received.
+        """
+        pending: List[Any] = []
+        statistics = StatsAccumulator()
+        for batch_result in self.predecessor.get_batch(max_batch_size):
+            pending.extend(chunk_to_rows(batch_result.chunk))
+            statistics.add(batch_result.statistics)
+            start = 0
+            while len(pending) - start >= self.batch_size_controller.batch_size:
+                end = start + self.batch_size_controller.batch_size
+                yield self._write_adaptive(session, pending[start:end], statistics)
+                statistics = StatsAccumulator()
+                start = end
+            del pending[:start]
+
+        if pending:
+            yield self._write_adaptive(session, pending, statistics)
+        elif statistics:
+            yield BatchResults(chunk=[], statistics=statistics.to_dict(), batch_size=0)
+
+    def _write_adaptive(self, session, rows: List[Any], statistics: StatsAccumulator) -> BatchResults:
+        """
+        Write `rows` in one transaction and feed its latency back to the batch size controller.
+        """
+        controller = self.batch_size_controller
+        dt_ms = self._write_batch(session, rows, statistics)
+        previous = controller.batch_size
+        current = controller.record(len(rows), dt_ms)
+        if current != previous:
+            self.logger.debug(f"batch size {previous} -> {current} after {len(rows)} rows in {dt_ms:.1f} ms")
+            self._instrument("batch_size_adjusted", {
+                "rows": len(rows),
+                "dt_ms": round(dt_ms, 3),
+                "batch_size": current,
+                "previous_batch_size": previous,
+                "target_latency_ms": controller.target_latency_ms,
+            })
+        return self._unless_stats_only(BatchResults(chunk=rows, statistics=statistics.to_dict(), batch_size=len(rows)))
+
+    def _write_batch(self, session, chunk, statistics: StatsAccumulator) -> float:
+        """
+        Write the rows of an incoming batch (see :meth:`_write_bounded`) and append the rows failing with a row data
+        error to the dead letter file.
+        """
+        dead_letters: List[Tuple[Any, Neo4jError]] = []
+        elapsed_ms = self._write_bounded(session, chunk, statistics, dead_letters)
+        if dead_letters:
+            self._dead_letter(dead_letters, statistics)
+        return elapsed_ms
+
+    def _write_bounded(self, session, chunk, statistics: StatsAccumulator,
+                       dead_letters: List[Tuple[Any, Neo4jError]]) -> float:
+        """
+        Write the rows of `chunk` in transactions of at most `size_limit.rows` rows, splitting transactions that are
+        too large. Adds the counters to `statistics` and returns the summed durations.
+        """
+        ceiling = self.size_limit.rows
+        if ceiling is None or len(chunk) <= ceiling:
+            return self._write_splitting(session, chunk, statistics, dead_letters)
+        elapsed_ms = 0.0
+        start = 0
+        while start < len(chunk):
+            # the ceiling can be lowered while the chunk is written
+            stop = start + self.size_limit.rows
+            elapsed_ms += self._write_splitting(session, slice_chunk(chunk, start, stop), statistics, dead_letters)
+            start = stop
+        return elapsed_ms
 
-                elapsed_ms = (time.perf_counter() - start) * 1000.0
-                self._instrument("cypher_tx_done", {
-                    "rows": len(batch_result.chunk),
-                    "dt_ms": round(elapsed_ms, 3),
-                })
-                yield append_result(batch_result, result.summary)
+    def _write_splitting(self, session, chunk, statistics: StatsAccumulator,
+                         dead_letters: List[Tuple[Any, Neo4jError]]) -> float:
+        """
+        Write the rows of `chunk` in one transaction, retrying in halves if it fails because it is too large, or to
+        find the rows failing with a row data error if a dead letter file is configured.
+        """
+        try:
+            return self._write(session, chunk, statistics)
+        except Neo4jError as e:
+            if not is_transaction_size_error(e):
+                if self.dead_letter_file is None or not is_row_data_error(e):
+                    raise
+                return self._isolate_failing_rows(session, chunk, e, statistics, dead_letters)
+            rows = len(chunk)
+            half = self.size_limit.split(rows)
+            if half is None:
+                raise
+            if self.batch_size_controller is not None:
+                self.batch_size_controller.limit(self.size_limit.rows)
+            self.logger.warning(f"transaction of {rows} rows failed with {e.code}, retrying in parts of {half} rows")
+            self._instrument("batch_split", {
+                "rows": rows,
+                "batch_size": half,
+                "error": e.code,
+            })
+            statistics.increment("tx_splits")
+            first_ms = self._write_splitting(session, slice_chunk(chunk, 0, half), statistics, dead_letters)
+            # the rest can be larger than the ceiling, if another transaction lowered it below the half
+            return first_ms + self._write_bounded(session, slice_chunk(chunk, half, rows), statistics, dead_letters)
+
+    def _isolate_failing_rows(self, session, chunk, error: Neo4jError, statistics: StatsAccumulator,
+                              dead_letters: List[Tuple[Any, Neo4jError]]) -> float:
+        """
+        Bisect `chunk`, which failed with `error`, until the failing rows are found. These are added to
+        `dead_letters`, all others are written to Neo4j.
+        """
+        rows = len(chunk)
+        if rows == 0:
+            raise error
+        if rows > 1:
+            half = (rows + 1) // 2
+            first_ms = self._write_splitting(session, slice_chunk(chunk, 0, half), statistics, dead_letters)
+            return first_ms + self._write_splitting(session, slice_chunk(chunk, half, rows), statistics, dead_letters)
+
+        dead_letters.append((chunk_to_rows(chunk)[0], error))
+        return 0.0
+
+    def _dead_letter(self, dead_letters: List[Tuple[Any, Neo4jError]], statistics: StatsAccumulator) -> None:
+        """
+        Append the failing rows with their error to the dead letter file.
+        """
+        with _DEAD_LETTER_LOCK, open(self.dead_letter_file, "a") as f:
+            for row, error in dead_letters:
+                entry = {"row": row, "error": {"code": error.code, "message": error.message}}
+                f.write(f"{json.dumps(entry, default=str)}\n")
+        for _, error in dead_letters:
+            self.logger.warning(f"row written to {self.dead_letter_file} after {error.code}")
+            self._instrument("dead_lettered", {
+                "rows": 1,
+                "error": error.code,
+            })
+        statistics.increment("dead_lettered_rows", len(dead_letters))
+
+    def _write(self, session, chunk, statistics: StatsAccumulator) -> float:
+        """
+        Write the rows of `chunk` in one transaction, add the summary counters to `statistics` and return the duration
+        in milliseconds.
+        """
+        query, batch = self.encoder.encode(chunk)
+        start = time.perf_counter()
+        self.neo4j.query_database(session=session, query=query, fetch_records=False,
+                                  single_transaction=self.single_transaction, accumulator=statistics, batch=batch,
+                                  **self.kwargs)
+        elapsed_ms = (time.perf_counter() - start) * 1000.0
+        self._instrument("cypher_tx_done", {
+            "rows": len(batch),
+            "dt_ms": round(elapsed_ms, 3),
+        })
+        return elapsed_ms
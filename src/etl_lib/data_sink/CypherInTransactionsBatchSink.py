@@ -0,0 +1,122 @@
+import time
+from typing import Generator, Iterable, Optional, Sequence
+
+from etl_lib.core.BatchProcessor import BatchProcessor, BatchResults, append_result
+from etl_lib.core.ETLContext import ETLContext
+from etl_lib.core.Task import Task
+from etl_lib.core.utils import in_transactions_query
+from etl_lib.data_sink.CypherBatchSink import CypherBatchEncoder
+
+
+class CypherInTransactionsBatchSink(BatchProcessor):
+    """
+    BatchProcessor to write large batches of data to a Neo4j database, letting the server split them into
+    transactions.
+
+    Each incoming batch is sent in one request, with the query wrapped into
+    `CALL { ... } IN [n CONCURRENT] TRANSACTIONS OF m ROWS` (see :func:`~etl_lib.core.utils.in_transactions_query`)
+    and run as auto-commit transaction. Compared to :class:`~etl_lib.data_sink.CypherBatchSink.CypherBatchSink` with
+    batches of `rows_per_transaction` rows, this saves a client round trip per transaction, and locks are only held
+    for the rows of one inner transaction.
+
+    The statistics of each batch hold the Neo4j counters of all inner transactions and, unless `on_error` is `FAIL`:
+
+        - `inner_transactions`: number of inner transactions started.
+        - `inner_transactions_failed`: number of inner transactions rolled back because of an error.
+        - `rows_failed`: rows of the failed inner transactions.
+        - `rows_skipped`: rows not attempted, because an earlier inner transaction failed with `on_error="BREAK"`.
+
+    Each failed inner transaction is logged and emits an `in_transactions_error` instrumentation event with its
+    `rows` and `error`.
+
+    Note:
+        - Inner transactions commit independently. A failed batch is therefore not rolled back as a whole.
+        - Auto-commit transactions are not retried by the driver.
+        - `columnar_batch`, `columns` and `prune_columns` work as for
+          :class:`~etl_lib.data_sink.CypherBatchSink.CypherBatchSink`.
+    """
+
+    def __init__(self, context: ETLContext, task: Task, predecessor: BatchProcessor, query: str,
+                 rows_per_transaction: int = 1000, concurrency: Optional[int] = None, on_error: str = "CONTINUE",
+                 columnar_batch: bool = False, columns: Optional[Sequence[str]] = None, prune_columns: bool = False,
+                 **kwargs):
+        """
+        Constructs a new CypherInTransactionsBatchSink.
+
+        Args:
+            context: :class:`etl_lib.core.ETLContext.ETLContext` instance.
+            task: :class:`etl_lib.core.Task.Task` instance owning this batchProcessor.
+            predecessor: BatchProcessor which :func:`~get_batch` function will be called to receive batches to process.
+            query: Cypher to write the query to Neo4j.
+                Data will be passed as `batch` parameter.
+                Therefore, the query must start with a `UNWIND $batch AS row`. The rest must not return anything.
+            rows_per_transaction: Rows per inner transaction.
+            concurrency: Number of inner transactions the server runs concurrently, needs Neo4j 5.21 or later.
+            on_error: What the server does if an inner transaction fails: `CONTINUE` with the next one, `BREAK` off
+                or `FAIL` the request (raising the error).
+            columnar_batch: Send `$batch` as column names (in the query) and value tuples, instead of a list of maps.
+            columns: Columns to send. Other columns are dropped before sending.
+            prune_columns: Without `columns`, send only the columns the query reads as `row.<column>`.
+            kwargs: Additional parameters passed to the query.
+        """
+        super().__init__(context, task, predecessor)
+        if not isinstance(query, str):
+            raise ValueError(f"{self.__class__.__name__} takes a single query")
+        # fail early on queries that can not be wrapped
+        in_transactions_query(query, rows_per_transaction, concurrency, on_error)
+        self.query = query
+        self.neo4j = context.neo4j
+        self.rows_per_transaction = rows_per_transaction
+        self.concurrency = concurrency
+        self.on_error = on_error.upper()
+        self.encoder = CypherBatchEncoder(query, columns, prune_columns, columnar_batch)
+        self.kwargs = kwargs
+
+    def get_batch(self, max_batch_size: int) -> Generator[BatchResults, None, None]:
+        """
+        Run the wrapped Cypher query for each incoming batch.
+        :param max_batch_size: The maximum batch size to use when requesting from predecessor.
+        :return: Generator[BatchResults, None, None]
+        """
+        if self.predecessor is None:
+            raise ValueError(f"{self.__class__.__name__} requires a predecessor")
+
+        with self.neo4j.session() as session:
+            for batch_result in self.predecessor.get_batch(max_batch_size):
+                query, batch = self.encoder.encode(batch_result.chunk)
+                query = in_transactions_query(query, self.rows_per_transaction, self.concurrency, self.on_error)
+                start = time.perf_counter()
+                result = self.neo4j.query_database_auto_commit(session, query, batch=batch, **self.kwargs)
+                elapsed_ms = (time.perf_counter() - start) * 1000.0
+
+                summary = dict(result.summary)
+                if self.on_error != "FAIL":
+                    summary.update(self._status_statistics(result.data))
+                self._instrument("cypher_tx_done", {
+                    "rows": len(batch),
+                    "dt_ms": round(elapsed_ms, 3),
+                    "inner_transactions": summary.get("inner_transactions"),
+                    "inner_transactions_failed": summary.get("inner_transactions_failed"),
+                })
+                yield self._unless_stats_only(append_result(batch_result, summary))
+
+    def _status_statistics(self, records: Iterable) -> dict:
+        """
+        Count the inner transactions and rows from the `REPORT STATUS` records, one per inner transaction.
+        """
+        statistics = {"inner_transactions": 0, "inner_transactions_failed": 0, "rows_failed": 0, "rows_skipped": 0}
+        for record in records:
+            if not record["started"]:
+                statistics["rows_skipped"] += record["rows"]
+                continue
+            statistics["inner_transactions"] += 1
+            if not record["committed"]:
+                statistics["inner_transactions_failed"] += 1
+                statistics["rows_failed"] += record["rows"]
+                self.logger.error(f"inner transaction {record['transactionId']} with {record['rows']} rows failed: "
+                                  f"{record['errorMessage']}")
+                self._instrument("in_transactions_error", {
+                    "rows": record["rows"],
+                    "error": record["errorMessage"],
+                })
+        return statistics
@@ -0,0 +1,60 @@
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+from etl_lib.core.AdaptiveBatchSizeController import AdaptiveBatchSizeController
+from etl_lib.core.BatchProcessor import BatchProcessor
+from etl_lib.core.ETLContext import ETLContext
+from etl_lib.core.Task import Task
+from etl_lib.data_sink.AsyncCypherBatchSink import AsyncCypherBatchSink
+from etl_lib.data_sink.CypherBatchSink import CypherBatchSink
+from etl_lib.data_sink.CypherInTransactionsBatchSink import CypherInTransactionsBatchSink
+
+
+@dataclass(frozen=True)
+class Neo4jSinkOptions:
+    """
+    Options of the sequential load tasks that select and configure the Cypher sink writing to Neo4j.
+
+    All combinations are checked when the options are created, so a task holding them is never half-configured.
+    """
+    batch_size_controller: Optional[AdaptiveBatchSizeController] = None
+    """Tunes the rows per transaction, only supported by :class:`~etl_lib.data_sink.CypherBatchSink.CypherBatchSink`."""
+    max_in_flight: int = 1
+    """With more than 1, :class:`~etl_lib.data_sink.AsyncCypherBatchSink.AsyncCypherBatchSink` is used."""
+    prune_columns: bool = False
+    """Send only the columns the query reads, see :func:`~etl_lib.core.utils.referenced_columns`."""
+    rows_per_transaction: Optional[int] = None
+    """
+    If set, :class:`~etl_lib.data_sink.CypherInTransactionsBatchSink.CypherInTransactionsBatchSink` is used, running
+    `concurrent_transactions` transactions at a time.
+    """
+    concurrent_transactions: Optional[int] = None
+    dead_letter_file: Optional[Path] = None
+    """File for rows failing in Neo4j, only supported by :class:`~etl_lib.data_sink.CypherBatchSink.CypherBatchSink`."""
+
+    def __post_init__(self):
+        if self.max_in_flight > 1 and self.batch_size_controller is not None:
+            raise ValueError("batch_size_controller can not be combined with max_in_flight > 1")
+        if self.rows_per_transaction is not None and (self.max_in_flight > 1 or self.batch_size_controller is not None):
+            raise ValueError("rows_per_transaction can not be combined with max_in_flight > 1 or batch_size_controller")
+        if self.dead_letter_file is not None and (self.max_in_flight > 1 or self.rows_per_transaction is not None):
+            raise ValueError("dead_letter_file can not be combined with max_in_flight > 1 or rows_per_transaction")
+
+    def sink(self, context: ETLContext, task: Task, predecessor: BatchProcessor, query: str) -> BatchProcessor:
+        """
+        Create the sink writing the batches of `predecessor` with `query`.
+        """
+        if self.rows_per_transaction is not None:
+            return CypherInTransactionsBatchSink(context, task, predecessor, query,
+                                                 rows_per_transaction=self.rows_per_transaction,
+                                                 concurrency=self.concurrent_transactions,
+                                                 prune_columns=self.prune_columns)
+        if self.max_in_flight > 1:
+            return AsyncCypherBatchSink(context, task, predecessor, query,
+                                        max_in_flight=self.max_in_flight,
+                                        prune_columns=self.prune_columns)
+        return CypherBatchSink(context, task, predecessor, query,
+                               batch_size_controller=self.batch_size_controller,
+                               prune_columns=self.prune_columns,
+                               dead_letter_file=self.dead_letter_file)
@@ -42,4 +42,5 @@ class SQLBatchSink(BatchProcessor):
                         "rows": len(batch_result.chunk),
                         "dt_ms": round((time.perf_counter() - t0) * 1000.0, 3),
                     })
-                    yield append_result(batch_result, {"sql_rows_written": len(batch_result.chunk)})
+                    yield self._unless_stats_only(
+                        append_result(batch_result, {"sql_rows_written": len(batch_result.chunk)}))
@@ -2,7 +2,7 @@ import csv
 import gzip
 import time
 from pathlib import Path
-from typing import Generator
+from typing import Generator, Optional, Sequence
 
 from etl_lib.core.BatchProcessor import BatchProcessor, BatchResults
 from etl_lib.core.Task import Task
@@ -15,9 +15,13 @@ class CSVBatchSource(BatchProcessor):
     File can optionally be gzipped.
     The returned batch of rows will have an additional `_row` column, containing the source row of the data,
     starting with 0.
+
+    With `columns`, rows only hold these columns, the other values of a line are never turned into dict entries.
+    `_row` is only added if listed, columns not in the file are ignored.
     """
 
-    def __init__(self, context, task: Task | None = None, csv_file: Path = None, **kwargs):
+    def __init__(self, context, task: Task | None = None, csv_file: Path = None,
+                 columns: Optional[Sequence[str]] = None, **kwargs):
         """
         Constructs a new CSVBatchSource.
 
@@ -25,11 +29,13 @@ class CSVBatchSource(BatchProcessor):
             context: :class:`etl_lib.core.ETLContext.ETLContext` instance.
             task: :class:`etl_lib.core.Task.Task` instance owning this processor.
             csv_file: Path to the CSV file.
+            columns: Columns to read, defaults to all columns and `_row`.
             kwargs: Will be passed on to the `csv.DictReader` providing a way to customise the reading to different
                 csv formats.
         """
         super().__init__(context, task)
         self.csv_file = csv_file
+        self.columns = list(columns) if columns is not None else None
         self.kwargs = kwargs
 
     def get_batch(self, max_batch_size: int) -> Generator[BatchResults, None, None]:
@@ -53,6 +59,9 @@ class CSVBatchSource(BatchProcessor):
     def __parse_csv(self, batch_size, file, **kwargs):
         """Read CSV in batches without loading the entire file at once."""
         csv_reader = csv.DictReader(file, **kwargs)
+        if self.columns is not None:
+            yield from self.__parse_csv_columns(batch_size, csv_reader)
+            return
 
         cnt = 0
         batch_ = []
@@ -70,6 +79,36 @@ class CSVBatchSource(BatchProcessor):
         if batch_:
             yield len(batch_), batch_
 
+    def __parse_csv_columns(self, batch_size, csv_reader: csv.DictReader):
+        """Read only the values of `self.columns` from the lines of `csv_reader`."""
+        positions = {name: index for index, name in enumerate(csv_reader.fieldnames or [])}
+        indexes = [(name, positions[name]) for name in self.columns if name in positions]
+        with_row = "_row" in self.columns
+        restval = csv_reader.restval
+
+        cnt = 0
+        batch_ = []
+
+        # the underlying csv.reader, positioned after the header, yields the values of a line as list
+        for values in csv_reader.reader:
+            if not values:
+                continue
+            row = {}
+            for name, index in indexes:
+                value = values[index] if index < len(values) else restval
+                row[name] = None if isinstance(value, str) and value.strip() == "" else value
+            if with_row:
+                row["_row"] = cnt
+            cnt += 1
+            batch_.append(row)
+
+            if len(batch_) == batch_size:
+                yield len(batch_), batch_
+                batch_ = []
+
+        if batch_:
+            yield len(batch_), batch_
+
     def __clean_dict(self, input_dict):
         """
         Needed in Python versions < 3.13
@@ -1,11 +1,13 @@
 import logging
 import time
 from pathlib import Path
-from typing import Generator, Optional
+from typing import Generator, Optional, Sequence
 
 try:
+    import pyarrow as pa
     import pyarrow.parquet as pq
 except ImportError:
+    pa = None
     pq = None
 
 from etl_lib.core.BatchProcessor import BatchProcessor, BatchResults
@@ -19,9 +21,17 @@ class ParquetBatchSource(BatchProcessor):
 
     The returned batch of rows will have an additional `_row` column, containing the source row of the data,
     starting with 0.
+
+    With `columnar=True`, the chunks of the returned BatchResults are `pyarrow.RecordBatch` instances instead of lists
+    of dicts. Values are then only converted to Python objects where needed, for example by
+    :class:`~etl_lib.data_sink.CypherBatchSink.CypherBatchSink` right before sending them to Neo4j.
+
+    With `columns`, only these columns are read from the file. `_row` is only added if listed, columns not in the file
+    are ignored.
     """
 
-    def __init__(self, context: ETLContext, task: Optional[Task] = None, file: Path = None, **kwargs):
+    def __init__(self, context: ETLContext, task: Optional[Task] = None, file: Path = None, columnar: bool = False,
+                 columns: Optional[Sequence[str]] = None, **kwargs):
         """
         Constructs a new ParquetBatchSource.
 
@@ -29,12 +39,16 @@ class ParquetBatchSource(BatchProcessor):
             context: :class:`etl_lib.core.ETLContext.ETLContext` instance.
             task: :class:`etl_lib.core.Task.Task` instance owning this processor.
             file: Path to the Parquet file.
+            columnar: Yield `pyarrow.RecordBatch` chunks instead of lists of dicts.
+            columns: Columns to read, defaults to all columns and `_row`.
             kwargs: Will be passed on to the `pyarrow.parquet.ParquetFile.iter_batches` method.
         """
         super().__init__(context, task)
         if pq is None:
             raise ImportError("pyarrow is required for ParquetBatchSource. Install with 'pip install .[parquet]'")
         self.file = file
+        self.columnar = columnar
+        self.columns = list(columns) if columns is not None else None
         self.kwargs = kwargs
         self.logger = logging.getLogger(f"{self.__class__.__module__}.{self.__class__.__name__}")
 
@@ -47,18 +61,29 @@ class ParquetBatchSource(BatchProcessor):
     def get_batch(self, max_batch_size: int) -> Generator[BatchResults, None, None]:
         parquet_file = pq.ParquetFile(self.file)
 
-        batch_iter = parquet_file.iter_batches(batch_size=max_batch_size, **self.kwargs)
+        kwargs = dict(self.kwargs)
+        with_row = self.columns is None or "_row" in self.columns
+        if self.columns is not None:
+            names = set(parquet_file.schema_arrow.names)
+            kwargs["columns"] = [column for column in self.columns if column in names]
+        batch_iter = parquet_file.iter_batches(batch_size=max_batch_size, **kwargs)
 
         row_counter = 0
         t0 = time.perf_counter()
 
         for batch in batch_iter:
-            rows = batch.to_pylist()
-
-            for i, row in enumerate(rows):
-                row["_row"] = row_counter + i
+            if self.columnar:
+                batch_len = batch.num_rows
+                rows = batch
+                if with_row:
+                    rows = rows.append_column("_row", pa.array(range(row_counter, row_counter + batch_len), pa.int64()))
+            else:
+                rows = batch.to_pylist()
+                if with_row:
+                    for i, row in enumerate(rows):
+                        row["_row"] = row_counter + i
+                batch_len = len(rows)
 
-            batch_len = len(rows)
             row_counter += batch_len
 
             self._instrument("parquet_read_batch", {
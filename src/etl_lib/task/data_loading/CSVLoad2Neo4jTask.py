@@ -1,15 +1,18 @@
 import abc
 import logging
 from pathlib import Path
-from typing import Type
+from typing import Optional, Type
 
 from pydantic import BaseModel
 
+from etl_lib.core.AdaptiveBatchSizeController import AdaptiveBatchSizeController
 from etl_lib.core.ETLContext import ETLContext
 from etl_lib.core.ClosedLoopBatchProcessor import ClosedLoopBatchProcessor
+from etl_lib.core.PipelinedBatchProcessor import PipelinedBatchProcessor
 from etl_lib.core.Task import Task, TaskReturn
+from etl_lib.core.utils import referenced_columns
 from etl_lib.core.ValidationBatchProcessor import ValidationBatchProcessor
-from etl_lib.data_sink.CypherBatchSink import CypherBatchSink
+from etl_lib.data_sink.Neo4jSinkOptions import Neo4jSinkOptions
 from etl_lib.data_source.CSVBatchSource import CSVBatchSource
 
 
@@ -27,6 +30,23 @@ class CSVLoad2Neo4jTask(Task):
 
     If `ETL_ERROR_PATH` is not set, the file will be placed in the same directory as the CSV file.
 
+    With a `batch_size_controller`, `batch_size` only sets how many rows are read at once, the number of rows per
+    transaction is tuned by the controller.
+
+    With `prefetch` > 0, reading and validation run in a separate thread, up to `prefetch` batches ahead of the
+    writes to Neo4j, see :class:`~etl_lib.core.PipelinedBatchProcessor.PipelinedBatchProcessor`.
+
+    With `max_in_flight` > 1, up to `max_in_flight` write transactions run concurrently, see
+    :class:`~etl_lib.data_sink.AsyncCypherBatchSink.AsyncCypherBatchSink`.
+    With `rows_per_transaction`, each batch is sent in one request and split into transactions of
+    `rows_per_transaction` rows by the server, `concurrent_transactions` of them at a time, see
+    :class:`~etl_lib.data_sink.CypherInTransactionsBatchSink.CypherInTransactionsBatchSink`.
+    With a `dead_letter_file`, rows failing in Neo4j (for example on a constraint) are written to that file instead of
+    failing the task, see :class:`~etl_lib.data_sink.CypherBatchSink.CypherBatchSink`.
+
+    With `prune_columns=True`, only the columns the query reads as `row.<column>` are sent to Neo4j, see
+    :func:`~etl_lib.core.utils.referenced_columns`. Without a model, the other columns are not even read from the file.
+
     Example usage: (from the gtfs demo)
 
     .. code-block:: python
@@ -67,15 +87,30 @@ class CSVLoad2Neo4jTask(Task):
                  context: ETLContext,
                  file: Path,
                  model: Type[BaseModel] | None = None,
-                 batch_size: int = 5000):
+                 batch_size: int = 5000,
+                 batch_size_controller: Optional[AdaptiveBatchSizeController] = None,
+                 prefetch: int = 0,
+                 max_in_flight: int = 1,
+                 prune_columns: bool = False,
+                 rows_per_transaction: Optional[int] = None,
+                 concurrent_transactions: Optional[int] = None,
+                 dead_letter_file: Optional[Path] = None):
+        sink_options = Neo4jSinkOptions(batch_size_controller=batch_size_controller, max_in_flight=max_in_flight,
+                                        prune_columns=prune_columns, rows_per_transaction=rows_per_transaction,
+                                        concurrent_transactions=concurrent_transactions,
+                                        dead_letter_file=dead_letter_file)
         super().__init__(context)
         self.batch_size = batch_size
+        self.prefetch = prefetch
+        self.sink_options = sink_options
         self.model = model
         self.logger = logging.getLogger(f"{self.__class__.__module__}.{self.__class__.__name__}")
         self.file = file
 
     def run_internal(self, **kwargs) -> TaskReturn:
-        csv = CSVBatchSource(self.context, self, self.file, **kwargs)
+        # rows are validated against the model, which needs all its fields
+        columns = referenced_columns(self._query()) if self.sink_options.prune_columns and self.model is None else None
+        csv = CSVBatchSource(self.context, self, self.file, columns=columns, **kwargs)
         predecessor = csv
 
         if self.model is not None:
@@ -87,7 +122,10 @@ class CSVLoad2Neo4jTask(Task):
 
             predecessor = ValidationBatchProcessor(self.context, self, csv, self.model, error_file)
 
-        cypher = CypherBatchSink(self.context, self, predecessor, self._query())
+        if self.prefetch:
+            predecessor = PipelinedBatchProcessor(self.context, self, predecessor, queue_size=self.prefetch)
+
+        cypher = self.sink_options.sink(self.context, self, predecessor, self._query())
         end = ClosedLoopBatchProcessor(self.context, self, cypher)
         result = next(end.get_batch(self.batch_size))
 
@@ -1,13 +1,15 @@
 import abc
 from pathlib import Path
-from typing import Type
-
+from typing import Type, cast
 
+from etl_lib.core.BatchProcessor import BatchProcessor
 from etl_lib.core.ClosedLoopBatchProcessor import ClosedLoopBatchProcessor
 from etl_lib.core.ETLContext import ETLContext
 from etl_lib.core.ParallelBatchProcessor import ParallelBatchProcessor
+from etl_lib.core.ParallelismTuner import autotune_parallel_load
 from etl_lib.core.SplittingBatchProcessor import SplittingBatchProcessor, dict_id_extractor
 from etl_lib.core.Task import Task, TaskReturn
+from etl_lib.core.TransactionSizeLimit import TransactionSizeLimit
 from etl_lib.core.ValidationBatchProcessor import ValidationBatchProcessor
 from etl_lib.data_sink.CypherBatchSink import CypherBatchSink
 from etl_lib.data_source.CSVBatchSource import CSVBatchSource
@@ -30,6 +32,7 @@ class ParallelCSVLoad2Neo4jTask(Task):
         batch_size: Per-cell target batch size from the splitter.
         max_workers: Worker threads per wave.
         prefetch: Number of waves to prefetch from the splitter.
+        autotune: Calibrate the number of workers on the first waves, see :ref:`autotune`.
         **csv_reader_kwargs: Forwarded to :py:class:`etl_lib.data_source.CSVBatchSource.CSVBatchSource`.
 
     Returns:
@@ -39,6 +42,9 @@ class ParallelCSVLoad2Neo4jTask(Task):
         - `_query()` must return Cypher that starts with ``UNWIND $batch AS row``.
         - Override `_id_extractor()` if your CSV schema doesn’t expose ``start``/``end``; the default uses
           :py:func:`etl_lib.core.SplittingBatchProcessor.dict_id_extractor`.
+        - Override `_splitter()` to split the rows differently, as
+          :py:class:`~etl_lib.task.data_loading.ParallelCSVNodeLoad2Neo4jTask.ParallelCSVNodeLoad2Neo4jTask` does for
+          node loads.
         - See the nyc-taxi example for a working subclass.
     """
     def __init__(self,
@@ -50,6 +56,7 @@ class ParallelCSVLoad2Neo4jTask(Task):
                  batch_size: int = 5000,
                  max_workers: int | None = None,
                  prefetch: int = 4,
+                 autotune: bool = False,
                  **csv_reader_kwargs):
         super().__init__(context)
         self.file = file
@@ -61,38 +68,57 @@ class ParallelCSVLoad2Neo4jTask(Task):
         self.batch_size = batch_size
         self.max_workers = max_workers or table_size
         self.prefetch = prefetch
+        self.autotune = autotune
         self.csv_reader_kwargs = csv_reader_kwargs
 
     def run_internal(self, **kwargs) -> TaskReturn:
+        tuner, best_table_size = None, self.table_size
+        if self.autotune:
+            tuner, best_table_size = autotune_parallel_load(self.context, self, self.table_size)
+
         csv = CSVBatchSource(self.context, self, self.file, **self.csv_reader_kwargs)
         predecessor = csv
         if self.model is not None:
             predecessor = ValidationBatchProcessor(self.context, self, csv, self.model, self.error_file)
 
-        splitter = SplittingBatchProcessor(
-            context=self.context,
-            task=self,
-            predecessor=predecessor,
-            table_size=self.table_size,
-            id_extractor=self._id_extractor()
-        )
+        splitter = self._splitter(predecessor)
 
+        # one ceiling of the rows per transaction for all buckets
+        size_limit = TransactionSizeLimit()
         parallel = ParallelBatchProcessor(
             context=self.context,
             task=self,
             predecessor=splitter,
-            worker_factory=lambda: CypherBatchSink(self.context, self, cast(BatchProcessor, None), self._query()),
-            max_workers=self.max_workers,
-            prefetch=self.prefetch
+            worker_factory=lambda: CypherBatchSink(self.context, self, cast(BatchProcessor, None), self._query(),
+                                                   size_limit=size_limit),
+            max_workers=tuner.max_workers if tuner is not None else self.max_workers,
+            prefetch=self.prefetch,
+            tuner=tuner
         )
 
         closing = ClosedLoopBatchProcessor(self.context, self, parallel)
         result = next(closing.get_batch(self.batch_size))
-        return TaskReturn(True, result.statistics)
+        statistics = result.statistics
+        if tuner is not None:
+            statistics = {**statistics, "autotune_max_workers": tuner.workers, "autotune_table_size": best_table_size}
+        return TaskReturn(True, statistics)
 
     def _id_extractor(self):
         return dict_id_extractor()
 
+    def _splitter(self, predecessor: BatchProcessor) -> BatchProcessor:
+        """
+        Return the processor splitting the rows into the batches written in parallel.
+        The default partitions them on the grid of `_id_extractor()`.
+        """
+        return SplittingBatchProcessor(
+            context=self.context,
+            task=self,
+            predecessor=predecessor,
+            table_size=self.table_size,
+            id_extractor=self._id_extractor()
+        )
+
     @abc.abstractmethod
     def _query(self) -> str:
         pass
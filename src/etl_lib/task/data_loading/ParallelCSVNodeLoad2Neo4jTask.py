@@ -0,0 +1,46 @@
+from pathlib import Path
+
+from etl_lib.core.BatchProcessor import BatchProcessor
+from etl_lib.core.ETLContext import ETLContext
+from etl_lib.core.KeySplittingBatchProcessor import KeySplittingBatchProcessor, key_hash_extractor
+from etl_lib.task.data_loading.ParallelCSVLoad2Neo4jTask import ParallelCSVLoad2Neo4jTask
+
+
+class ParallelCSVNodeLoad2Neo4jTask(ParallelCSVLoad2Neo4jTask):
+    """
+    Parallel CSV → Neo4j load of nodes.
+
+    Like :py:class:`~etl_lib.task.data_loading.ParallelCSVLoad2Neo4jTask.ParallelCSVLoad2Neo4jTask`,
+    but for rows that each merge one node. Instead of a grid, rows are split into `lanes` by a hash of their node key
+    (:py:class:`~etl_lib.core.KeySplittingBatchProcessor.KeySplittingBatchProcessor`). Rows of a key always share a
+    lane, so concurrent batches never lock the same node or unique constraint entry, and all lanes are written in
+    parallel without waves.
+
+    Args:
+        context: Shared ETL context.
+        file: CSV file to load.
+        lanes: Number of lanes, also the default number of worker threads.
+        **kwargs: Forwarded to the parent task (`model`, `error_file`, `batch_size`, `max_workers`, `prefetch`,
+            `autotune`, the CSV reader options).
+
+    Notes:
+        - `_query()` must return Cypher that starts with ``UNWIND $batch AS row`` and merges one node per row.
+        - Override `_key_extractor()` if the node key is not in the ``id`` column; the default uses
+          :py:func:`etl_lib.core.KeySplittingBatchProcessor.key_hash_extractor`.
+    """
+
+    def __init__(self, context: ETLContext, file: Path, lanes: int = 10, **kwargs):
+        super().__init__(context, file, table_size=lanes, **kwargs)
+        self.lanes = lanes
+
+    def _key_extractor(self):
+        return key_hash_extractor(lanes=self.lanes)
+
+    def _splitter(self, predecessor: BatchProcessor) -> BatchProcessor:
+        return KeySplittingBatchProcessor(
+            context=self.context,
+            task=self,
+            predecessor=predecessor,
+            lanes=self.lanes,
+            key_extractor=self._key_extractor()
+        )
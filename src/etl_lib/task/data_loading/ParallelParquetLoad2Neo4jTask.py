@@ -4,12 +4,15 @@ from typing import Optional, Type, Any, cast
 
 from pydantic import BaseModel
 
+from etl_lib.core.BatchProcessor import BatchProcessor
 from etl_lib.core.ClosedLoopBatchProcessor import ClosedLoopBatchProcessor
 from etl_lib.core.ETLContext import ETLContext
 from etl_lib.core.ParallelBatchProcessor import ParallelBatchProcessor
+from etl_lib.core.ParallelismTuner import autotune_parallel_load
 from etl_lib.core.SplittingBatchProcessor import (SplittingBatchProcessor,
                                                   dict_id_extractor)
 from etl_lib.core.Task import Task, TaskReturn
+from etl_lib.core.TransactionSizeLimit import TransactionSizeLimit
 from etl_lib.core.ValidationBatchProcessor import ValidationBatchProcessor
 from etl_lib.data_sink.CypherBatchSink import CypherBatchSink
 from etl_lib.data_source.ParquetBatchSource import ParquetBatchSource
@@ -18,6 +21,11 @@ from etl_lib.data_source.ParquetBatchSource import ParquetBatchSource
 class ParallelParquetLoad2Neo4jTask(Task):
     """
     Parallel Parquet → Neo4j load using the mix-and-batch strategy.
+
+    With `columnar=True`, batches are kept as `pyarrow.RecordBatch` through splitting and are only converted to
+    Python objects when they are sent to Neo4j.
+
+    With `autotune=True`, the number of workers is calibrated on the first waves, see :ref:`autotune`.
     """
     def __init__(self,
                  context: ETLContext,
@@ -28,6 +36,8 @@ class ParallelParquetLoad2Neo4jTask(Task):
                  batch_size: int = 5000,
                  max_workers: Optional[int] = None,
                  prefetch: int = 4,
+                 columnar: bool = False,
+                 autotune: bool = False,
                  **parquet_reader_kwargs):
         super().__init__(context)
         self.file = file
@@ -39,41 +49,61 @@ class ParallelParquetLoad2Neo4jTask(Task):
         self.batch_size = batch_size
         self.max_workers = max_workers or table_size
         self.prefetch = prefetch
+        self.columnar = columnar
+        self.autotune = autotune
         self.parquet_reader_kwargs = parquet_reader_kwargs
 
     def run_internal(self, **kwargs) -> TaskReturn:
+        tuner, best_table_size = None, self.table_size
+        if self.autotune:
+            tuner, best_table_size = autotune_parallel_load(self.context, self, self.table_size)
+
         total_count = ParquetBatchSource.get_total_rows(self.file)
 
-        source = ParquetBatchSource(self.context, self, self.file, **self.parquet_reader_kwargs)
+        source = ParquetBatchSource(self.context, self, self.file, columnar=self.columnar,
+                                    **self.parquet_reader_kwargs)
         
         predecessor = source
         if self.model is not None:
             predecessor = ValidationBatchProcessor(self.context, self, source, self.model, self.error_file)
 
-        splitter = SplittingBatchProcessor(
-            context=self.context,
-            task=self,
-            predecessor=predecessor,
-            table_size=self.table_size,
-            id_extractor=self._id_extractor()
-        )
+        splitter = self._splitter(predecessor)
 
+        # one ceiling of the rows per transaction for all buckets
+        size_limit = TransactionSizeLimit()
         parallel = ParallelBatchProcessor(
             context=self.context,
             task=self,
             predecessor=splitter,
-            worker_factory=lambda: CypherBatchSink(self.context, self, None, self._query()),
-            max_workers=self.max_workers,
-            prefetch=self.prefetch
+            worker_factory=lambda: CypherBatchSink(self.context, self, None, self._query(), size_limit=size_limit),
+            max_workers=tuner.max_workers if tuner is not None else self.max_workers,
+            prefetch=self.prefetch,
+            tuner=tuner
         )
 
         closing = ClosedLoopBatchProcessor(self.context, self, parallel, expected_rows=total_count)
         result = next(closing.get_batch(self.batch_size))
-        return TaskReturn(True, result.statistics)
+        statistics = result.statistics
+        if tuner is not None:
+            statistics = {**statistics, "autotune_max_workers": tuner.workers, "autotune_table_size": best_table_size}
+        return TaskReturn(True, statistics)
 
     def _id_extractor(self):
         return dict_id_extractor()
 
+    def _splitter(self, predecessor: BatchProcessor) -> BatchProcessor:
+        """
+        Return the processor splitting the rows into the batches written in parallel.
+        The default partitions them on the grid of `_id_extractor()`.
+        """
+        return SplittingBatchProcessor(
+            context=self.context,
+            task=self,
+            predecessor=predecessor,
+            table_size=self.table_size,
+            id_extractor=self._id_extractor()
+        )
+
     @abc.abstractmethod
     def _query(self) -> str:
         pass
@@ -1,11 +1,14 @@
 from abc import ABC, abstractmethod
 from typing import Callable, Union, Optional, Any, cast
 
+from etl_lib.core.BatchProcessor import BatchProcessor
 from etl_lib.core.ClosedLoopBatchProcessor import ClosedLoopBatchProcessor
 from etl_lib.core.ETLContext import ETLContext
 from etl_lib.core.ParallelBatchProcessor import ParallelBatchProcessor
+from etl_lib.core.ParallelismTuner import autotune_parallel_load
 from etl_lib.core.SplittingBatchProcessor import SplittingBatchProcessor, dict_id_extractor
 from etl_lib.core.Task import Task, TaskReturn
+from etl_lib.core.TransactionSizeLimit import TransactionSizeLimit
 from etl_lib.data_sink.CypherBatchSink import CypherBatchSink
 from etl_lib.data_source.SQLBatchSource import SQLBatchSource
 from sqlalchemy import text
@@ -20,13 +23,14 @@ class ParallelSQLLoad2Neo4jTask(Task, ABC):
     Subclasses must implement:
         - _sql_query()
         - _cypher_query()
-        - optionally override _count_query() and _id_extractor().
+        - optionally override _count_query(), _id_extractor() and _splitter().
 
     Control parameters:
         batch_size: max items per partition batch
         table_size: dimension of the splitting grid
         max_workers: parallel threads per partition group (defaults to table_size)
         prefetch: number of partition-groups to prefetch
+        autotune: calibrate the number of workers on the first waves, see :ref:`autotune`
     """
 
     def __init__(
@@ -35,7 +39,8 @@ class ParallelSQLLoad2Neo4jTask(Task, ABC):
             batch_size: int = 5000,
             table_size: int = 10,
             max_workers: Optional[int] = None,
-            prefetch: int = 4
+            prefetch: int = 4,
+            autotune: bool = False
     ):
         super().__init__(context)
         self.context = context
@@ -44,6 +49,7 @@ class ParallelSQLLoad2Neo4jTask(Task, ABC):
         # default max_workers to table_size for full parallelism
         self.max_workers = max_workers or table_size
         self.prefetch = prefetch
+        self.autotune = autotune
 
     @abstractmethod
     def _sql_query(self) -> str:
@@ -73,30 +79,45 @@ class ParallelSQLLoad2Neo4jTask(Task, ABC):
         """
         return dict_id_extractor()
 
+    def _splitter(self, predecessor: BatchProcessor) -> BatchProcessor:
+        """
+        Return the processor splitting the rows into the batches written in parallel.
+        The default partitions them on the grid of `_id_extractor()`.
+        """
+        return SplittingBatchProcessor(
+            context=self.context,
+            task=self,
+            predecessor=predecessor,
+            table_size=self.table_size,
+            id_extractor=self._id_extractor()
+        )
+
     def run_internal(self, **kwargs) -> TaskReturn:
+        tuner, best_table_size = None, self.table_size
+        if self.autotune:
+            tuner, best_table_size = autotune_parallel_load(self.context, self, self.table_size)
+
         # total count for ClosedLoopBatchProcessor
         total_count = self.__get_source_count()
         # source of raw rows
         source = SQLBatchSource(self.context, self, self._sql_query())
 
-        # splitter: non-overlapping partitions as defined by the id_extractor
-        splitter = SplittingBatchProcessor(
-            context=self.context,
-            task=self,
-            predecessor=source,
-            table_size=self.table_size,
-            id_extractor=self._id_extractor()
-        )
+        # splitter: non-overlapping partitions as defined by _splitter()
+        splitter = self._splitter(source)
+
+        # one ceiling of the rows per transaction for all buckets
+        size_limit = TransactionSizeLimit()
 
         # parallel processor: runs CypherBatchSink on each partition concurrently
         parallel = ParallelBatchProcessor(
             context=self.context,
             task=self,
             worker_factory=lambda: CypherBatchSink(context=self.context, task=self, predecessor=None,
-                                                   query=self._cypher_query()),
+                                                   query=self._cypher_query(), size_limit=size_limit),
             predecessor=splitter,
-            max_workers=self.max_workers,
-            prefetch=self.prefetch
+            max_workers=tuner.max_workers if tuner is not None else self.max_workers,
+            prefetch=self.prefetch,
+            tuner=tuner
         )
 
         # close loop: drives the pipeline and reports progress
@@ -109,7 +130,10 @@ class ParallelSQLLoad2Neo4jTask(Task, ABC):
 
         # run once to completion and return aggregated stats
         result = next(closing.get_batch(self.batch_size))
-        return TaskReturn(True, result.statistics)
+        statistics = result.statistics
+        if tuner is not None:
+            statistics = {**statistics, "autotune_max_workers": tuner.workers, "autotune_table_size": best_table_size}
+        return TaskReturn(True, statistics)
 
     def __get_source_count(self) -> Optional[int]:
         count_query = self._count_query()
@@ -0,0 +1,46 @@
+from abc import ABC
+from typing import Callable
+
+from etl_lib.core.BatchProcessor import BatchProcessor
+from etl_lib.core.ETLContext import ETLContext
+from etl_lib.core.KeySplittingBatchProcessor import KeySplittingBatchProcessor, key_hash_extractor
+from etl_lib.task.data_loading.ParallelSQLLoad2Neo4jTask import ParallelSQLLoad2Neo4jTask
+
+
+class ParallelSQLNodeLoad2Neo4jTask(ParallelSQLLoad2Neo4jTask, ABC):
+    """
+    Parallel SQL → Neo4j load of nodes: reads via SQLBatchSource, splits the rows into lanes by a hash of their node
+    key (KeySplittingBatchProcessor), and writes all lanes in parallel through a CypherBatchSink, without waves.
+
+    Rows of a key always share a lane, so concurrent batches never lock the same node or unique constraint entry.
+
+    Subclasses must implement:
+        - _sql_query()
+        - _cypher_query(), merging one node per row.
+        - optionally override _count_query() and _key_extractor() (default: hash of the 'id' column).
+
+    Control parameters:
+        lanes: number of lanes, also the default number of worker threads
+        other parameters as for ParallelSQLLoad2Neo4jTask (batch_size, max_workers, prefetch, autotune)
+    """
+
+    def __init__(self, context: ETLContext, lanes: int = 10, **kwargs):
+        super().__init__(context, table_size=lanes, **kwargs)
+        self.lanes = lanes
+
+    def _key_extractor(self) -> Callable:
+        """
+        Extractor mapping each row item to a lane.
+        Default hashes the 'id' key of dict rows.
+        Override to customize.
+        """
+        return key_hash_extractor(lanes=self.lanes)
+
+    def _splitter(self, predecessor: BatchProcessor) -> BatchProcessor:
+        return KeySplittingBatchProcessor(
+            context=self.context,
+            task=self,
+            predecessor=predecessor,
+            lanes=self.lanes,
+            key_extractor=self._key_extractor()
+        )
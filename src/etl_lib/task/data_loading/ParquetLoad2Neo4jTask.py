@@ -4,11 +4,14 @@ from typing import Optional, Type
 
 from pydantic import BaseModel
 
+from etl_lib.core.AdaptiveBatchSizeController import AdaptiveBatchSizeController
 from etl_lib.core.ClosedLoopBatchProcessor import ClosedLoopBatchProcessor
 from etl_lib.core.ETLContext import ETLContext
+from etl_lib.core.PipelinedBatchProcessor import PipelinedBatchProcessor
 from etl_lib.core.Task import Task, TaskReturn
+from etl_lib.core.utils import referenced_columns
 from etl_lib.core.ValidationBatchProcessor import ValidationBatchProcessor
-from etl_lib.data_sink.CypherBatchSink import CypherBatchSink
+from etl_lib.data_sink.Neo4jSinkOptions import Neo4jSinkOptions
 from etl_lib.data_source.ParquetBatchSource import ParquetBatchSource
 
 
@@ -17,6 +20,25 @@ class ParquetLoad2Neo4jTask(Task):
     Load the output of a Parquet file to Neo4j sequentially.
 
     Uses BatchProcessors to read and write data.
+
+    With `columnar=True`, batches are kept as `pyarrow.RecordBatch` until they are sent to Neo4j,
+    see :class:`~etl_lib.data_source.ParquetBatchSource.ParquetBatchSource`.
+
+    With a `batch_size_controller`, the number of rows per transaction is tuned from the measured transaction latency.
+
+    With `prefetch` > 0, reading and validation run in a separate thread, up to `prefetch` batches ahead of the
+    writes to Neo4j.
+
+    With `max_in_flight` > 1, up to `max_in_flight` write transactions run concurrently, see
+    :class:`~etl_lib.data_sink.AsyncCypherBatchSink.AsyncCypherBatchSink`.
+    With `rows_per_transaction`, each batch is sent in one request and split into transactions of
+    `rows_per_transaction` rows by the server, `concurrent_transactions` of them at a time, see
+    :class:`~etl_lib.data_sink.CypherInTransactionsBatchSink.CypherInTransactionsBatchSink`.
+    With a `dead_letter_file`, rows failing in Neo4j (for example on a constraint) are written to that file instead of
+    failing the task, see :class:`~etl_lib.data_sink.CypherBatchSink.CypherBatchSink`.
+
+    With `prune_columns=True`, only the columns the query reads as `row.<column>` are sent to Neo4j, see
+    :func:`~etl_lib.core.utils.referenced_columns`. Without a model, the other columns are not even read from the file.
     """
 
     def __init__(self, 
@@ -24,14 +46,29 @@ class ParquetLoad2Neo4jTask(Task):
                  file: Path, 
                  model: Optional[Type[BaseModel]] = None,
                  error_file: Optional[Path] = None,
-                 batch_size: int = 5000):
+                 batch_size: int = 5000,
+                 columnar: bool = False,
+                 batch_size_controller: Optional[AdaptiveBatchSizeController] = None,
+                 prefetch: int = 0,
+                 max_in_flight: int = 1,
+                 prune_columns: bool = False,
+                 rows_per_transaction: Optional[int] = None,
+                 concurrent_transactions: Optional[int] = None,
+                 dead_letter_file: Optional[Path] = None):
+        if model is not None and error_file is None:
+            raise ValueError('you must provide error file if the model is specified')
+        sink_options = Neo4jSinkOptions(batch_size_controller=batch_size_controller, max_in_flight=max_in_flight,
+                                        prune_columns=prune_columns, rows_per_transaction=rows_per_transaction,
+                                        concurrent_transactions=concurrent_transactions,
+                                        dead_letter_file=dead_letter_file)
         super().__init__(context)
         self.file = file
         self.model = model
-        if model is not None and error_file is None:
-            raise ValueError('you must provide error file if the model is specified')
         self.error_file = error_file
         self.batch_size = batch_size
+        self.columnar = columnar
+        self.prefetch = prefetch
+        self.sink_options = sink_options
 
     @abstractmethod
     def _cypher_query(self) -> str:
@@ -44,13 +81,18 @@ class ParquetLoad2Neo4jTask(Task):
     def run_internal(self, **kwargs) -> TaskReturn:
         total_count = ParquetBatchSource.get_total_rows(self.file)
 
-        source = ParquetBatchSource(self.context, self, self.file)
+        # rows are validated against the model, which needs all its fields
+        prune = self.sink_options.prune_columns and self.model is None
+        columns = referenced_columns(self._cypher_query()) if prune else None
+        source = ParquetBatchSource(self.context, self, self.file, columnar=self.columnar, columns=columns)
         
         predecessor = source
         if self.model:
             predecessor = ValidationBatchProcessor(self.context, self, source, self.model, self.error_file)
+        if self.prefetch:
+            predecessor = PipelinedBatchProcessor(self.context, self, predecessor, queue_size=self.prefetch)
 
-        sink = CypherBatchSink(self.context, self, predecessor, self._cypher_query())
+        sink = self.sink_options.sink(self.context, self, predecessor, self._cypher_query())
 
         end = ClosedLoopBatchProcessor(self.context, self, sink, total_count)
 
@@ -1,12 +1,15 @@
 from abc import abstractmethod
+from pathlib import Path
 from typing import Optional
 
 from sqlalchemy import text
 
+from etl_lib.core.AdaptiveBatchSizeController import AdaptiveBatchSizeController
 from etl_lib.core.ClosedLoopBatchProcessor import ClosedLoopBatchProcessor
 from etl_lib.core.ETLContext import ETLContext
+from etl_lib.core.PipelinedBatchProcessor import PipelinedBatchProcessor
 from etl_lib.core.Task import Task, TaskReturn
-from etl_lib.data_sink.CypherBatchSink import CypherBatchSink
+from etl_lib.data_sink.Neo4jSinkOptions import Neo4jSinkOptions
 from etl_lib.data_source.SQLBatchSource import SQLBatchSource
 
 
@@ -16,6 +19,17 @@ class SQLLoad2Neo4jTask(Task):
 
     Uses BatchProcessors to read and write data.
     Subclasses must implement the methods returning the SQL and Cypher queries.
+    With a `batch_size_controller`, the number of rows per transaction is tuned from the measured transaction latency.
+    With `prefetch` > 0, the SQL source is read in a separate thread, up to `prefetch` batches ahead of the writes.
+    With `max_in_flight` > 1, up to `max_in_flight` write transactions run concurrently, see
+    :class:`~etl_lib.data_sink.AsyncCypherBatchSink.AsyncCypherBatchSink`.
+    With `rows_per_transaction`, each batch is sent in one request and split into transactions of
+    `rows_per_transaction` rows by the server, `concurrent_transactions` of them at a time, see
+    :class:`~etl_lib.data_sink.CypherInTransactionsBatchSink.CypherInTransactionsBatchSink`.
+    With a `dead_letter_file`, rows failing in Neo4j (for example on a constraint) are written to that file instead of
+    failing the task, see :class:`~etl_lib.data_sink.CypherBatchSink.CypherBatchSink`.
+    With `prune_columns=True`, only the columns the Cypher query reads as `row.<column>` are sent to Neo4j. The SQL
+    query is not changed, select only the columns needed to save reading the others.
 
     Example usage: (from the MusicBrainz example)
 
@@ -41,10 +55,20 @@ class SQLLoad2Neo4jTask(Task):
 
     '''
 
-    def __init__(self, context: ETLContext, batch_size: int = 5000):
+    def __init__(self, context: ETLContext, batch_size: int = 5000,
+                 batch_size_controller: Optional[AdaptiveBatchSizeController] = None, prefetch: int = 0,
+                 max_in_flight: int = 1, prune_columns: bool = False,
+                 rows_per_transaction: Optional[int] = None, concurrent_transactions: Optional[int] = None,
+                 dead_letter_file: Optional[Path] = None):
+        sink_options = Neo4jSinkOptions(batch_size_controller=batch_size_controller, max_in_flight=max_in_flight,
+                                        prune_columns=prune_columns, rows_per_transaction=rows_per_transaction,
+                                        concurrent_transactions=concurrent_transactions,
+                                        dead_letter_file=dead_letter_file)
         super().__init__(context)
         self.context = context
         self.batch_size = batch_size
+        self.prefetch = prefetch
+        self.sink_options = sink_options
 
     @abstractmethod
     def _sql_query(self) -> str:
@@ -72,7 +96,9 @@ class SQLLoad2Neo4jTask(Task):
     def run_internal(self, **kwargs) -> TaskReturn:
         total_count = self.__get_source_count()
         source = SQLBatchSource(self.context, self, self._sql_query())
-        sink = CypherBatchSink(self.context, self, source, self._cypher_query())
+        if self.prefetch:
+            source = PipelinedBatchProcessor(self.context, self, source, queue_size=self.prefetch)
+        sink = self.sink_options.sink(self.context, self, source, self._cypher_query())
 
         end = ClosedLoopBatchProcessor(self.context, self, sink, total_count)
 
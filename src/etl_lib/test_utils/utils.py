@@ -158,6 +158,23 @@ class DummyReporter:
         pass
 
 
+class RecordingReporter(DummyReporter):
+    """
+    Reporter test double storing each instrumentation event as a dict with `task`, `event_type` and `payload`.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.events = []
+
+    def instrument(self, task: Task, event_type: str, payload: dict | None = None) -> None:
+        self.events.append({
+            "task": task,
+            "event_type": event_type,
+            "payload": payload,
+        })
+
+
 class DummyNeo4jContext:
 
     def query_database(self, session, query, **kwargs) -> QueryResult:
@@ -167,6 +184,24 @@ class DummyNeo4jContext:
         return None
 
 
+class FakeSession:
+    """
+    No-op Neo4j session, usable as sync and async context manager.
+    """
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        return False
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        return False
+
+
 class DummyContext:
     neo4j: DummyNeo4jContext
     __env_vars: dict
@@ -180,6 +215,17 @@ class DummyContext:
         pass
 
 
+class RecordingContext(DummyContext):
+    """
+    Context test double with a :class:`RecordingReporter` and the given Neo4j (and SQL) context doubles.
+    """
+
+    def __init__(self, reporter: RecordingReporter | None = None, neo4j: Any = None, sql: Any = None):
+        self.reporter = reporter if reporter is not None else RecordingReporter()
+        self.neo4j = neo4j
+        self.sql = sql
+
+
 class DummyPredecessor:
     def __init__(self, batches):
         self.batches = batches
@@ -0,0 +1,68 @@
+import pytest
+
+from etl_lib.core.AdaptiveBatchSizeController import AdaptiveBatchSizeController
+
+
+def test_increases_additively_below_target():
+    controller = AdaptiveBatchSizeController(initial_batch_size=1000, target_latency_ms=100, increase_step=50)
+
+    assert controller.record(1000, 10) == 1050
+    assert controller.record(1050, 10) == 1100
+
+
+def test_decreases_multiplicatively_above_target():
+    controller = AdaptiveBatchSizeController(initial_batch_size=1000, target_latency_ms=100, decrease_factor=0.5)
+
+    assert controller.record(1000, 250) == 500
+    assert controller.record(500, 250) == 250
+
+
+def test_holds_within_tolerance():
+    controller = AdaptiveBatchSizeController(initial_batch_size=1000, target_latency_ms=100, tolerance=0.2)
+
+    assert controller.record(1000, 90) == 1000
+    assert controller.record(1000, 100) == 1000
+
+
+def test_partial_batch_does_not_increase():
+    controller = AdaptiveBatchSizeController(initial_batch_size=1000, target_latency_ms=100)
+
+    assert controller.record(10, 1) == 1000
+    # a slow partial batch still backs off
+    assert controller.record(10, 500) == 500
+
+
+def test_respects_bounds():
+    controller = AdaptiveBatchSizeController(initial_batch_size=150, target_latency_ms=100, min_batch_size=100,
+                                             max_batch_size=200, increase_step=100)
+
+    assert controller.record(150, 1) == 200
+    assert controller.record(200, 1) == 200
+    assert controller.record(200, 1000) == 100
+    assert controller.record(100, 1000) == 100
+
+
+def test_initial_size_is_clamped():
+    assert AdaptiveBatchSizeController(initial_batch_size=10, min_batch_size=100).batch_size == 100
+
+
+@pytest.mark.parametrize("kwargs", [
+    {"min_batch_size": 0},
+    {"min_batch_size": 10, "max_batch_size": 5},
+    {"target_latency_ms": 0},
+    {"decrease_factor": 1.0},
+    {"tolerance": 1.0},
+])
+def test_rejects_invalid_configuration(kwargs):
+    with pytest.raises(ValueError):
+        AdaptiveBatchSizeController(**kwargs)
+
+
+def test_limit_lowers_upper_bound():
+    controller = AdaptiveBatchSizeController(initial_batch_size=1000, target_latency_ms=100, min_batch_size=100,
+                                             increase_step=500)
+
+    assert controller.limit(400) == 400
+    assert controller.record(400, 1) == 400
+    assert controller.limit(10) == 100
+    assert controller.max_batch_size == 100
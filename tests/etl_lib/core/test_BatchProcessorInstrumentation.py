@@ -1,10 +1,16 @@
+import json
 from pathlib import Path
-from typing import Any
 
+import pytest
+from neo4j.exceptions import Neo4jError
+
+from etl_lib.core.AdaptiveBatchSizeController import AdaptiveBatchSizeController
 from etl_lib.core.BatchProcessor import BatchProcessor, BatchResults
 from etl_lib.core.ETLContext import QueryResult
 from etl_lib.core.ParallelBatchProcessor import ParallelBatchProcessor, ParallelBatchResult
 from etl_lib.core.SplittingBatchProcessor import SplittingBatchProcessor
+from etl_lib.core.TransactionSizeLimit import TransactionSizeLimit
+from etl_lib.core.utils import merge_summary
 from etl_lib.data_sink.CSVBatchSink import CSVBatchSink
 from etl_lib.data_sink.CypherBatchSink import CypherBatchSink
 from etl_lib.data_sink.SQLBatchSink import SQLBatchSink
@@ -12,33 +18,7 @@ from etl_lib.data_source.CSVBatchSource import CSVBatchSource
 from etl_lib.data_source.CypherBatchSource import CypherBatchSource
 from etl_lib.data_source.ParquetBatchSource import ParquetBatchSource
 from etl_lib.data_source.SQLBatchSource import SQLBatchSource
-
-
-class RecordingReporter:
-    """
-    Reporter test double that stores instrumentation events.
-    """
-
-    def __init__(self):
-        """
-        Creates a new recording reporter.
-        """
-        self.events = []
-
-    def instrument(self, task, event_type: str, payload: dict) -> None:
-        """
-        Stores one instrumentation event.
-
-        Args:
-            task: Task associated with the event.
-            event_type: Event type.
-            payload: Event payload.
-        """
-        self.events.append({
-            "task": task,
-            "event_type": event_type,
-            "payload": payload,
-        })
+from etl_lib.test_utils.utils import FakeSession, RecordingContext, RecordingReporter
 
 
 class TaskStub:
@@ -66,23 +46,6 @@ class TaskStub:
         return self._name
 
 
-class ContextStub:
-    """
-    Minimal context-like object for batch processor tests.
-    """
-
-    def __init__(self, reporter: RecordingReporter):
-        """
-        Creates a new context stub.
-
-        Args:
-            reporter: Reporter used by processors.
-        """
-        self.reporter = reporter
-        self.neo4j: Any = None
-        self.sql: Any = None
-
-
 class StaticPredecessor(BatchProcessor):
     """
     Predecessor that yields preconfigured batches.
@@ -143,7 +106,7 @@ def test_splitting_batch_processor_emits_splitter_instrumentation():
     Verifies that splitter flush instrumentation is emitted.
     """
     reporter = RecordingReporter()
-    context = ContextStub(reporter)
+    context = RecordingContext(reporter)
     task = TaskStub("splitter-task")
 
     predecessor = StaticPredecessor([
@@ -175,7 +138,7 @@ def test_parallel_batch_processor_emits_wave_and_bucket_instrumentation():
     Verifies that parallel processor emits per-wave and per-bucket instrumentation.
     """
     reporter = RecordingReporter()
-    context = ContextStub(reporter)
+    context = RecordingContext(reporter)
     task = TaskStub("parallel-task")
 
     wave = ParallelBatchResult(chunk=[[1, 2], [3]], statistics={}, batch_size=3)
@@ -204,18 +167,6 @@ def test_parallel_batch_processor_emits_wave_and_bucket_instrumentation():
     assert "dt_ms" in wave_payloads[0]
 
 
-class FakeNeo4jSession:
-    """
-    No-op Neo4j session context manager for tests.
-    """
-
-    def __enter__(self):
-        return self
-
-    def __exit__(self, exc_type, exc_val, exc_tb):
-        return False
-
-
 class FakeNeo4jContext:
     """
     Neo4j context test double for Cypher sink instrumentation tests.
@@ -225,7 +176,7 @@ class FakeNeo4jContext:
         """
         Returns a fake session.
         """
-        return FakeNeo4jSession()
+        return FakeSession()
 
     def query_database(self, session, query, **kwargs) -> QueryResult:
         """
@@ -237,10 +188,14 @@ class FakeNeo4jContext:
             kwargs: Query parameters.
 
         Returns:
-            Query result with `nodes_created` count.
+            Query result with `nodes_created` count, added to the `accumulator` instead if one is passed.
         """
-        batch = kwargs.get("batch", [])
-        return QueryResult(data=[], summary={"nodes_created": len(batch)})
+        summary = {"nodes_created": len(kwargs.get("batch", []))}
+        accumulator = kwargs.get("accumulator")
+        if accumulator is not None:
+            accumulator.add(summary)
+            return QueryResult(data=[], summary={})
+        return QueryResult(data=[], summary=summary)
 
 
 def test_cypher_batch_sink_emits_transaction_instrumentation():
@@ -250,7 +205,7 @@ def test_cypher_batch_sink_emits_transaction_instrumentation():
     reporter = RecordingReporter()
     task = TaskStub("cypher-sink-task")
 
-    context = ContextStub(reporter)
+    context = RecordingContext(reporter)
     context.neo4j = FakeNeo4jContext()
 
     predecessor = StaticPredecessor([
@@ -267,12 +222,109 @@ def test_cypher_batch_sink_emits_transaction_instrumentation():
     assert all("dt_ms" in payload for payload in payloads)
 
 
+class ScriptedController(AdaptiveBatchSizeController):
+    """
+    Controller test double that follows a fixed sequence of batch sizes.
+    """
+
+    def __init__(self, sizes: list[int]):
+        """
+        Creates a controller starting with the first of `sizes`.
+
+        Args:
+            sizes: Batch size to use before each transaction.
+        """
+        super().__init__(initial_batch_size=sizes[0], target_latency_ms=100, min_batch_size=1)
+        self._sizes = sizes[1:]
+
+    def record(self, rows: int, dt_ms: float) -> int:
+        if self._sizes:
+            self._batch_size = self._sizes.pop(0)
+        return self._batch_size
+
+
+def test_cypher_batch_sink_reslices_to_controller_batch_size():
+    """
+    Verifies that the sink writes transactions of the controller's size and carries rows over between batches.
+    """
+    reporter = RecordingReporter()
+    sent = []
+
+    class RecordingNeo4jContext(FakeNeo4jContext):
+        def query_database(self, session, query, **kwargs) -> QueryResult:
+            sent.append([row["i"] for row in kwargs["batch"]])
+            return super().query_database(session, query, **kwargs)
+
+    context = RecordingContext(reporter)
+    context.neo4j = RecordingNeo4jContext()
+    predecessor = StaticPredecessor([
+        BatchResults(chunk=[{"i": i} for i in range(0, 3)], statistics={"valid": 3}, batch_size=3),
+        BatchResults(chunk=[{"i": i} for i in range(3, 8)], statistics={"valid": 5}, batch_size=5),
+        BatchResults(chunk=[], statistics={"invalid": 2}, batch_size=0),
+    ])
+
+    sink = CypherBatchSink(context=context, task=TaskStub("cypher-sink-task"), predecessor=predecessor,
+                           query="RETURN 1", batch_size_controller=ScriptedController([2, 4, 4]))
+    results = list(sink.get_batch(10))
+
+    assert sent == [[0, 1], [2, 3, 4, 5], [6, 7]]
+    assert [r.batch_size for r in results] == [2, 4, 2]
+    assert results[0].statistics == {"valid": 3, "nodes_created": 2}
+    assert results[1].statistics == {"valid": 5, "nodes_created": 4}
+    assert results[2].statistics == {"invalid": 2, "nodes_created": 2}
+
+    adjusted = _event_payloads(reporter.events, "batch_size_adjusted")
+    assert [(p["previous_batch_size"], p["batch_size"]) for p in adjusted] == [(2, 4)]
+    assert adjusted[0]["rows"] == 2
+    assert adjusted[0]["target_latency_ms"] == 100
+    assert [p["rows"] for p in _event_payloads(reporter.events, "cypher_tx_done")] == [2, 4, 2]
+
+
+def test_cypher_batch_sink_adaptive_keeps_trailing_statistics():
+    """
+    Verifies that statistics of batches without rows are not lost after the last transaction.
+    """
+    context = RecordingContext(RecordingReporter())
+    context.neo4j = FakeNeo4jContext()
+    predecessor = StaticPredecessor([
+        BatchResults(chunk=[{"i": 1}, {"i": 2}], statistics={"valid": 2}, batch_size=2),
+        BatchResults(chunk=[], statistics={"invalid": 1}, batch_size=0),
+    ])
+
+    sink = CypherBatchSink(context=context, task=None, predecessor=predecessor, query="RETURN 1",
+                           batch_size_controller=ScriptedController([2]))
+    results = list(sink.get_batch(10))
+
+    assert [r.statistics for r in results] == [{"valid": 2, "nodes_created": 2}, {"invalid": 1}]
+
+
+def test_parallel_batch_processor_merges_all_worker_batches():
+    """
+    Verifies that a worker yielding several batches for one bucket-batch is fully consumed.
+    """
+    context = RecordingContext(RecordingReporter())
+    context.neo4j = FakeNeo4jContext()
+    wave = ParallelBatchResult(chunk=[[{"i": 1}, {"i": 2}, {"i": 3}]], statistics={}, batch_size=3, claims=[(0,)])
+
+    processor = ParallelBatchProcessor(
+        context=context,
+        predecessor=StaticPredecessor([wave]),
+        worker_factory=lambda: CypherBatchSink(context, None, None, "RETURN 1",
+                                               batch_size_controller=ScriptedController([1])),
+        max_workers=1,
+    )
+    results = list(processor.get_batch(10))
+
+    assert results[0].batch_size == 3
+    assert results[0].statistics == {"nodes_created": 3}
+
+
 def test_csv_source_and_sink_emit_instrumentation(tmp_path: Path):
     """
     Verifies CSV source and CSV sink instrumentation events.
     """
     reporter = RecordingReporter()
-    context = ContextStub(reporter)
+    context = RecordingContext(reporter)
     task = TaskStub("csv-task")
 
     source_file = tmp_path / "source.csv"
@@ -391,7 +443,7 @@ def test_sql_source_emits_instrumentation():
     Verifies SQL source emits one instrumentation event per emitted batch.
     """
     reporter = RecordingReporter()
-    context = ContextStub(reporter)
+    context = RecordingContext(reporter)
     context.sql = type("Sql", (), {"engine": FakeSqlEngine([{"id": 1}, {"id": 2}, {"id": 3}])})()
     task = TaskStub("sql-source-task")
 
@@ -410,7 +462,7 @@ def test_sql_sink_emits_instrumentation():
     Verifies SQL sink emits one instrumentation event per written batch.
     """
     reporter = RecordingReporter()
-    context = ContextStub(reporter)
+    context = RecordingContext(reporter)
     context.sql = type("Sql", (), {"engine": FakeSqlEngine([])})()
     task = TaskStub("sql-sink-task")
 
@@ -536,7 +588,7 @@ def test_cypher_source_emits_instrumentation():
     Verifies Cypher source emits one instrumentation event per emitted batch.
     """
     reporter = RecordingReporter()
-    context = ContextStub(reporter)
+    context = RecordingContext(reporter)
     context.neo4j = FakeCypherContext([{"i": 1}, {"i": 2}, {"i": 3}])
     task = TaskStub("cypher-source-task")
 
@@ -588,7 +640,7 @@ def test_parquet_source_emits_instrumentation(monkeypatch, tmp_path: Path):
     monkeypatch.setattr("etl_lib.data_source.ParquetBatchSource.pq", FakePq)
 
     reporter = RecordingReporter()
-    context = ContextStub(reporter)
+    context = RecordingContext(reporter)
     task = TaskStub("parquet-source-task")
 
     source = ParquetBatchSource(file=tmp_path / "in.parquet", context=context, task=task)
@@ -599,3 +651,318 @@ def test_parquet_source_emits_instrumentation(monkeypatch, tmp_path: Path):
     assert len(payloads) == 2
     assert [payload["rows"] for payload in payloads] == [2, 1]
     assert all("dt_ms" in payload for payload in payloads)
+
+
+def test_cypher_batch_sink_converts_columnar_chunks_to_rows():
+    """
+    Verifies that Cypher sink sends columnar chunks as list of dicts.
+    """
+    pa = pytest.importorskip("pyarrow")
+    sent = []
+
+    class RecordingNeo4jContext(FakeNeo4jContext):
+        def query_database(self, session, query, **kwargs) -> QueryResult:
+            sent.append(kwargs["batch"])
+            return super().query_database(session, query, **kwargs)
+
+    context = RecordingContext(RecordingReporter())
+    context.neo4j = RecordingNeo4jContext()
+    batch = pa.RecordBatch.from_pylist([{"i": 1, "_row": 0}, {"i": 2, "_row": 1}])
+    predecessor = StaticPredecessor([BatchResults(chunk=batch, statistics={}, batch_size=2)])
+
+    sink = CypherBatchSink(context=context, task=TaskStub("cypher-sink-task"), predecessor=predecessor,
+                           query="RETURN 1")
+    results = list(sink.get_batch(10))
+
+    assert sent == [[{"i": 1, "_row": 0}, {"i": 2, "_row": 1}]]
+    assert results[0].statistics == {"nodes_created": 2}
+
+
+def test_stats_only_drops_chunks_through_parallel_processor():
+    """
+    Verifies that a stats-only request reaches the sinks run by the parallel processor and no rows are retained.
+    """
+    context = RecordingContext(RecordingReporter())
+    context.neo4j = FakeNeo4jContext()
+    waves = [
+        ParallelBatchResult(chunk=[[{"i": 1}, {"i": 2}], [{"i": 3}]], statistics={}, batch_size=3,
+                            claims=[(0,), (1,)]),
+        ParallelBatchResult(chunk=[[{"i": 4}]], statistics={"read": 4}, batch_size=1, claims=[(0,)]),
+    ]
+    processor = ParallelBatchProcessor(
+        context=context,
+        predecessor=StaticPredecessor(waves),
+        worker_factory=lambda: CypherBatchSink(context, None, None, "RETURN 1"),
+        max_workers=2,
+    )
+    processor.request_stats_only()
+    results = list(processor.get_batch(10))
+
+    assert all(r.chunk == [] for r in results)
+    assert sum(r.batch_size for r in results) == 4
+    assert merge_summary(results[0].statistics, results[1].statistics) == {"nodes_created": 4, "read": 4}
+
+
+def test_cypher_batch_sink_stats_only():
+    """
+    Verifies that the Cypher sink yields statistics without rows after a stats-only request.
+    """
+    context = RecordingContext(RecordingReporter())
+    context.neo4j = FakeNeo4jContext()
+    predecessor = StaticPredecessor([BatchResults(chunk=[{"i": 1}, {"i": 2}], statistics={}, batch_size=2)])
+
+    sink = CypherBatchSink(context=context, task=None, predecessor=predecessor, query="RETURN 1")
+    sink.request_stats_only()
+    results = list(sink.get_batch(10))
+
+    assert [(r.chunk, r.batch_size, r.statistics) for r in results] == [([], 2, {"nodes_created": 2})]
+
+
+def test_cypher_batch_sink_prunes_unused_columns():
+    """
+    Verifies that only the columns read by the query are sent, while the yielded batches keep all columns.
+    """
+    sent = []
+
+    class RecordingNeo4jContext(FakeNeo4jContext):
+        def query_database(self, session, query, **kwargs) -> QueryResult:
+            sent.append((query, kwargs["batch"]))
+            return super().query_database(session, query, **kwargs)
+
+    context = RecordingContext(RecordingReporter())
+    context.neo4j = RecordingNeo4jContext()
+    rows = [{"id": 1, "name": "a", "unused": "x", "_row": 0}, {"id": 2, "name": "b", "unused": "y", "_row": 1}]
+    query = "UNWIND $batch AS row MERGE (n:N {id: row.id}) SET n.name = row.name"
+
+    sink = CypherBatchSink(context=context, task=None, predecessor=StaticPredecessor(
+        [BatchResults(chunk=rows, statistics={}, batch_size=2)]), query=query, prune_columns=True)
+    results = list(sink.get_batch(10))
+
+    assert sent == [(query, [{"id": 1, "name": "a"}, {"id": 2, "name": "b"}])]
+    assert results[0].chunk == rows
+
+    sent.clear()
+    sink = CypherBatchSink(context=context, task=None, predecessor=StaticPredecessor(
+        [BatchResults(chunk=rows, statistics={}, batch_size=2)]), query=query, columns=["name"], columnar_batch=True)
+    list(sink.get_batch(10))
+
+    assert sent == [("UNWIND $batch AS __values WITH *, {name: __values[0]} AS row "
+                     "MERGE (n:N {id: row.id}) SET n.name = row.name", [("a",), ("b",)])]
+
+
+def test_cypher_batch_sink_does_not_fetch_records_and_passes_single_transaction():
+    """
+    Verifies that the sink asks for counters only and hands query lists over as one transaction if requested.
+    """
+    calls = []
+
+    class RecordingNeo4jContext(FakeNeo4jContext):
+        def query_database(self, session, query, **kwargs) -> QueryResult:
+            calls.append((query, kwargs["fetch_records"], kwargs["single_transaction"]))
+            return super().query_database(session, query, **kwargs)
+
+    context = RecordingContext(RecordingReporter())
+    context.neo4j = RecordingNeo4jContext()
+    queries = ["UNWIND $batch AS row CREATE (:A {id: row.a})", "UNWIND $batch AS row CREATE (:B {id: row.b})"]
+
+    sink = CypherBatchSink(context=context, task=None, predecessor=StaticPredecessor(
+        [BatchResults(chunk=[{"a": 1, "b": 2, "c": 3}], statistics={}, batch_size=1)]), query=queries,
+        single_transaction=True, prune_columns=True, columnar_batch=True)
+    list(sink.get_batch(10))
+
+    assert calls == [([
+        "UNWIND $batch AS __values WITH *, {a: __values[0], b: __values[1]} AS row CREATE (:A {id: row.a})",
+        "UNWIND $batch AS __values WITH *, {a: __values[0], b: __values[1]} AS row CREATE (:B {id: row.b})",
+    ], False, True)]
+
+
+class OversizedNeo4jContext(FakeNeo4jContext):
+    """
+    Neo4j context test double failing transactions of more than `max_rows` rows with a memory error.
+    """
+
+    def __init__(self, max_rows: int):
+        self.max_rows = max_rows
+        self.sent = []
+
+    def query_database(self, session, query, **kwargs) -> QueryResult:
+        rows = [row["i"] for row in kwargs["batch"]]
+        if len(rows) > self.max_rows:
+            raise Neo4jError._hydrate_neo4j(code="Neo.TransientError.General.MemoryPoolOutOfMemoryError",
+                                            message="transaction too large")
+        self.sent.append(rows)
+        return super().query_database(session, query, **kwargs)
+
+
+def test_cypher_batch_sink_splits_oversized_transactions_and_keeps_ceiling():
+    """
+    Verifies that a batch failing with a memory error is written in halves and later batches respect the ceiling.
+    """
+    reporter = RecordingReporter()
+    context = RecordingContext(reporter)
+    context.neo4j = OversizedNeo4jContext(max_rows=2)
+    predecessor = StaticPredecessor([
+        BatchResults(chunk=[{"i": i} for i in range(0, 5)], statistics={"valid": 5}, batch_size=5),
+        BatchResults(chunk=[{"i": i} for i in range(5, 10)], statistics={"valid": 5}, batch_size=5),
+    ])
+    size_limit = TransactionSizeLimit()
+
+    sink = CypherBatchSink(context=context, task=TaskStub("cypher-sink-task"), predecessor=predecessor,
+                           query="RETURN 1", size_limit=size_limit)
+    results = list(sink.get_batch(10))
+
+    assert context.neo4j.sent == [[0, 1], [2], [3, 4], [5, 6], [7, 8], [9]]
+    assert results[0].statistics == {"valid": 5, "nodes_created": 5, "tx_splits": 2}
+    assert results[1].statistics == {"valid": 5, "nodes_created": 5}
+    assert size_limit.rows == 2
+    splits = _event_payloads(reporter.events, "batch_split")
+    assert [(p["rows"], p["batch_size"]) for p in splits] == [(5, 3), (3, 2)]
+    assert splits[0]["error"] == "Neo.TransientError.General.MemoryPoolOutOfMemoryError"
+
+
+def test_cypher_batch_sink_writes_rest_of_split_batch_within_lowered_ceiling():
+    """
+    Verifies that the second half of a split batch is written in parts of the ceiling lowered while writing the first
+    half, instead of failing and being split again.
+    """
+    reporter = RecordingReporter()
+    context = RecordingContext(reporter)
+    context.neo4j = OversizedNeo4jContext(max_rows=2)
+    predecessor = StaticPredecessor([BatchResults(chunk=[{"i": i} for i in range(8)], statistics={}, batch_size=8)])
+
+    sink = CypherBatchSink(context=context, task=TaskStub("cypher-sink-task"), predecessor=predecessor,
+                           query="RETURN 1")
+    results = list(sink.get_batch(10))
+
+    assert context.neo4j.sent == [[0, 1], [2, 3], [4, 5], [6, 7]]
+    assert results[0].statistics == {"nodes_created": 8, "tx_splits": 2}
+    splits = _event_payloads(reporter.events, "batch_split")
+    assert [(p["rows"], p["batch_size"]) for p in splits] == [(8, 4), (4, 2)]
+
+
+def test_cypher_batch_sink_raises_when_min_rows_is_reached():
+    """
+    Verifies that a batch is not split below the minimum size and the error is raised.
+    """
+    context = RecordingContext(RecordingReporter())
+    context.neo4j = OversizedNeo4jContext(max_rows=1)
+    predecessor = StaticPredecessor([BatchResults(chunk=[{"i": i} for i in range(4)], statistics={}, batch_size=4)])
+
+    sink = CypherBatchSink(context=context, task=None, predecessor=predecessor, query="RETURN 1",
+                           size_limit=TransactionSizeLimit(min_rows=2))
+
+    with pytest.raises(Neo4jError):
+        list(sink.get_batch(10))
+    assert context.neo4j.sent == []
+
+
+class ConstraintNeo4jContext(FakeNeo4jContext):
+    """
+    Neo4j context test double failing transactions containing one of the `bad` rows with a constraint violation.
+    """
+
+    def __init__(self, bad: set, code: str = "Neo.ClientError.Schema.ConstraintValidationFailed"):
+        self.bad = bad
+        self.code = code
+        self.sent = []
+
+    def query_database(self, session, query, **kwargs) -> QueryResult:
+        rows = [row["i"] for row in kwargs["batch"]]
+        if self.bad.intersection(rows):
+            raise Neo4jError._hydrate_neo4j(code=self.code, message="already exists")
+        self.sent.append(rows)
+        return super().query_database(session, query, **kwargs)
+
+
+def test_cypher_batch_sink_dead_letters_failing_rows(tmp_path: Path):
+    """
+    Verifies that rows failing with a non-transient error are isolated and written to the dead letter file.
+    """
+    reporter = RecordingReporter()
+    context = RecordingContext(reporter)
+    context.neo4j = ConstraintNeo4jContext(bad={2, 5})
+    dead_letter_file = tmp_path / "dead.jsonl"
+    predecessor = StaticPredecessor([
+        BatchResults(chunk=[{"i": i} for i in range(0, 6)], statistics={"valid": 6}, batch_size=6),
+        BatchResults(chunk=[{"i": i} for i in range(6, 8)], statistics={"valid": 2}, batch_size=2),
+    ])
+
+    sink = CypherBatchSink(context=context, task=TaskStub("cypher-sink-task"), predecessor=predecessor,
+                           query="RETURN 1", dead_letter_file=dead_letter_file)
+    results = list(sink.get_batch(10))
+
+    assert sorted(i for rows in context.neo4j.sent for i in rows) == [0, 1, 3, 4, 6, 7]
+    assert results[0].statistics == {"valid": 6, "nodes_created": 4, "dead_lettered_rows": 2}
+    assert results[1].statistics == {"valid": 2, "nodes_created": 2}
+    entries = [json.loads(line) for line in dead_letter_file.read_text().splitlines()]
+    assert [entry["row"] for entry in entries] == [{"i": 2}, {"i": 5}]
+    assert entries[0]["error"] == {"code": "Neo.ClientError.Schema.ConstraintValidationFailed",
+                                   "message": "already exists"}
+    assert len(_event_payloads(reporter.events, "dead_lettered")) == 2
+
+
+@pytest.mark.parametrize("code", [
+    "Neo.ClientError.Statement.SyntaxError",
+    "Neo.ClientError.Statement.ParameterMissing",
+    "Neo.ClientError.Security.Forbidden",
+])
+def test_cypher_batch_sink_raises_statement_errors_with_dead_letter_file(tmp_path: Path, code: str):
+    """
+    Verifies that errors of the statement itself are raised at once instead of being bisected and dead-lettered.
+    """
+    attempts = []
+
+    class FailingNeo4jContext(FakeNeo4jContext):
+        def query_database(self, session, query, **kwargs) -> QueryResult:
+            attempts.append(len(kwargs["batch"]))
+            raise Neo4jError._hydrate_neo4j(code=code, message="broken query")
+
+    context = RecordingContext(RecordingReporter())
+    context.neo4j = FailingNeo4jContext()
+    predecessor = StaticPredecessor([BatchResults(chunk=[{"i": i} for i in range(8)], statistics={}, batch_size=8)])
+
+    sink = CypherBatchSink(context=context, task=None, predecessor=predecessor, query="RETURN 1",
+                           dead_letter_file=tmp_path / "dead.jsonl")
+
+    with pytest.raises(Neo4jError) as raised:
+        list(sink.get_batch(10))
+    assert raised.value.code == code
+    assert attempts == [8]
+    assert not (tmp_path / "dead.jsonl").exists()
+
+
+def test_cypher_batch_sink_dead_letters_single_failing_row(tmp_path: Path):
+    """
+    Verifies that a batch of one row failing on a constraint is dead-lettered instead of failing the task.
+    """
+    context = RecordingContext(RecordingReporter())
+    context.neo4j = ConstraintNeo4jContext(bad={0})
+    dead_letter_file = tmp_path / "dead.jsonl"
+    predecessor = StaticPredecessor([
+        BatchResults(chunk=[{"i": 0}], statistics={}, batch_size=1),
+        BatchResults(chunk=[{"i": 1}], statistics={}, batch_size=1),
+    ])
+
+    sink = CypherBatchSink(context=context, task=None, predecessor=predecessor, query="RETURN 1",
+                           dead_letter_file=dead_letter_file)
+    results = list(sink.get_batch(10))
+
+    assert [r.statistics for r in results] == [{"dead_lettered_rows": 1}, {"nodes_created": 1}]
+    assert context.neo4j.sent == [[1]]
+    assert [json.loads(line)["row"] for line in dead_letter_file.read_text().splitlines()] == [{"i": 0}]
+
+
+def test_cypher_batch_sink_raises_transient_errors_with_dead_letter_file(tmp_path: Path):
+    """
+    Verifies that transient errors are not dead-lettered.
+    """
+    context = RecordingContext(RecordingReporter())
+    context.neo4j = ConstraintNeo4jContext(bad={1}, code="Neo.TransientError.Transaction.DeadlockDetected")
+    predecessor = StaticPredecessor([BatchResults(chunk=[{"i": 0}, {"i": 1}], statistics={}, batch_size=2)])
+
+    sink = CypherBatchSink(context=context, task=None, predecessor=predecessor, query="RETURN 1",
+                           dead_letter_file=tmp_path / "dead.jsonl")
+
+    with pytest.raises(Neo4jError):
+        list(sink.get_batch(10))
+    assert not (tmp_path / "dead.jsonl").exists()
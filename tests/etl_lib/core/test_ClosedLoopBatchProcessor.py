@@ -60,3 +60,16 @@ class TestGetBatch:
         proc = _make_processor(batches)
         result = next(proc.get_batch(100))
         assert result.statistics == {"rows": 3}
+
+    def test_requests_stats_only_from_predecessor(self):
+        class Predecessor(DummyPredecessor):
+            stats_only = False
+
+            def request_stats_only(self):
+                self.stats_only = True
+
+        predecessor = Predecessor([BatchResults(chunk=[1], statistics={"rows": 1}, batch_size=1)])
+        proc = ClosedLoopBatchProcessor(DummyContext(), task=None, predecessor=predecessor)
+
+        assert next(proc.get_batch(100)).statistics == {"rows": 1}
+        assert predecessor.stats_only
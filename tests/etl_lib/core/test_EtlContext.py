@@ -1,3 +1,4 @@
+import asyncio
 import json
 import time
 import urllib.parse
@@ -5,6 +6,7 @@ from unittest.mock import MagicMock, call, patch
 
 import pytest
 from etl_lib.core.ETLContext import QueryResult, append_results, _fetch_oauth2_token, Neo4jContext
+from etl_lib.core.StatsAccumulator import StatsAccumulator
 from etl_lib.test_utils.utils import MockETLContext
 from neo4j.exceptions import Neo4jError
 
@@ -247,3 +249,200 @@ def test_gds_context_creation(etl_context: MockETLContext):
         assert etl_context.neo4j.gds is not None
     else:
         pytest.skip("Graph Data Science not available, skipping test")
+
+
+class _RetryingSession:
+    """Session double whose execute_write runs the transaction function `attempts` times, like driver retries."""
+
+    def __init__(self, attempts):
+        self.attempts = attempts
+
+    def execute_write(self, fn, *args):
+        tx = MagicMock()
+        tx.run.return_value.__iter__.return_value = iter([])
+        result = None
+        for _ in range(self.attempts):
+            result = fn(tx, *args)
+        return result
+
+
+@pytest.mark.parametrize("attempts, expected", [(1, None), (3, 2)])
+def test_query_database_reports_driver_retries(attempts, expected):
+    with patch("etl_lib.core.ETLContext.GraphDatabase") as mock_gdb:
+        mock_gdb.driver.return_value = _make_driver_mock()
+        ctx = Neo4jContext(_BASIC_ENV)
+
+    result = ctx.query_database(_RetryingSession(attempts), "RETURN 1")
+
+    assert result.summary.get("tx_retries") == expected
+
+
+def test_async_driver_uses_same_uri_and_credentials():
+    with patch("etl_lib.core.ETLContext.GraphDatabase") as mock_gdb:
+        mock_gdb.driver.return_value = _make_driver_mock()
+        ctx = Neo4jContext({**_BASIC_ENV, "NEO4J_DRIVER_MAX_CONNECTION_POOL_SIZE": "7"})
+
+    with patch("etl_lib.core.ETLContext.AsyncGraphDatabase") as mock_async_gdb:
+        ctx.async_driver()
+
+    args, kwargs = mock_async_gdb.driver.call_args
+    assert kwargs["uri"] == ctx.uri
+    assert kwargs["auth"] == ("neo4j", "secret")
+    assert kwargs["max_connection_pool_size"] == 7
+
+
+def test_async_driver_token_auth_fetches_token_off_the_loop():
+    with patch("etl_lib.core.ETLContext.GraphDatabase") as mock_gdb, \
+         patch("etl_lib.core.ETLContext._fetch_oauth2_token", return_value=(3600, "tok-abc")) as mock_fetch:
+        mock_gdb.driver.return_value = _make_driver_mock()
+        ctx = Neo4jContext(_TOKEN_ENV)
+
+        with patch("etl_lib.core.ETLContext.AsyncGraphDatabase") as mock_async_gdb:
+            ctx.async_driver()
+        manager = mock_async_gdb.driver.call_args.kwargs["auth"]
+        auth = asyncio.run(manager.get_auth())
+
+    assert auth.credentials == "tok-abc"
+    mock_fetch.assert_called_with("https://idp.example.com/token", "my-client", "my-secret", "neo4j/.default")
+
+
+class _AsyncRetryingSession:
+    """Async session double whose execute_write runs the transaction function `attempts` times."""
+
+    def __init__(self, attempts):
+        self.attempts = attempts
+
+    async def execute_write(self, fn, *args):
+        class _Result:
+            def __aiter__(self):
+                return self
+
+            async def __anext__(self):
+                raise StopAsyncIteration
+
+            async def consume(self):
+                return MagicMock()
+
+        class _Tx:
+            async def run(self, query, **params):
+                return _Result()
+
+        result = None
+        for _ in range(self.attempts):
+            result = await fn(_Tx(), *args)
+        return result
+
+
+@pytest.mark.parametrize("attempts, expected", [(1, None), (2, 1)])
+def test_query_database_async_reports_driver_retries(attempts, expected):
+    with patch("etl_lib.core.ETLContext.GraphDatabase") as mock_gdb:
+        mock_gdb.driver.return_value = _make_driver_mock()
+        ctx = Neo4jContext(_BASIC_ENV)
+
+    result = asyncio.run(ctx.query_database_async(_AsyncRetryingSession(attempts), "RETURN 1"))
+
+    assert result.data == []
+    assert result.summary.get("tx_retries") == expected
+
+
+class _Counters:
+    def __init__(self, **values):
+        for name in ("constraints_added", "constraints_removed", "indexes_added", "indexes_removed", "labels_added",
+                     "labels_removed", "nodes_created", "nodes_deleted", "properties_set", "relationships_created",
+                     "relationships_deleted"):
+            setattr(self, name, values.get(name, 0))
+
+
+class _RecordingSession:
+    """Session double counting transactions and recording the queries run in each of them."""
+
+    def __init__(self, records):
+        self.records = records
+        self.transactions = []
+        self.iterated = 0
+
+    def execute_write(self, fn, *args):
+        session = self
+        queries = []
+        self.transactions.append(queries)
+
+        class _Result:
+            def __init__(self, query):
+                self.query = query
+
+            def __iter__(self):
+                session.iterated += 1
+                return iter(session.records)
+
+            def consume(self):
+                summary = MagicMock()
+                summary.counters = _Counters(nodes_created=1, relationships_created=1 if "REL" in self.query else 0)
+                return summary
+
+        tx = MagicMock()
+        tx.run.side_effect = lambda query, **params: queries.append((query, params)) or _Result(query)
+        return fn(tx, *args)
+
+
+def test_query_database_single_transaction_runs_all_queries_in_one_transaction():
+    with patch("etl_lib.core.ETLContext.GraphDatabase") as mock_gdb:
+        mock_gdb.driver.return_value = _make_driver_mock()
+        ctx = Neo4jContext(_BASIC_ENV)
+    session = _RecordingSession(records=[{"x": 1}])
+
+    result = ctx.query_database(session, ["CREATE NODES", "CREATE REL"], single_transaction=True, batch=[1])
+
+    assert session.transactions == [[("CREATE NODES", {"batch": [1]}), ("CREATE REL", {"batch": [1]})]]
+    assert result.summary["nodes_created"] == 2
+    assert result.summary["relationships_created"] == 1
+    assert result.data == [{"x": 1}, {"x": 1}]
+
+    ctx.query_database(session, ["CREATE NODES", "CREATE REL"], batch=[1])
+    assert len(session.transactions) == 3
+
+
+def test_query_database_without_fetching_records():
+    with patch("etl_lib.core.ETLContext.GraphDatabase") as mock_gdb:
+        mock_gdb.driver.return_value = _make_driver_mock()
+        ctx = Neo4jContext(_BASIC_ENV)
+    session = _RecordingSession(records=[{"x": 1}])
+
+    result = ctx.query_database(session, "CREATE NODES", fetch_records=False)
+
+    assert session.iterated == 0
+    assert result.data == []
+    assert result.summary["nodes_created"] == 1
+
+
+def test_query_database_adds_counters_to_accumulator():
+    with patch("etl_lib.core.ETLContext.GraphDatabase") as mock_gdb:
+        mock_gdb.driver.return_value = _make_driver_mock()
+        ctx = Neo4jContext(_BASIC_ENV)
+    session = _RecordingSession(records=[])
+    accumulator = StatsAccumulator({"rows": 2})
+
+    result = ctx.query_database(session, ["CREATE NODES", "CREATE REL"], accumulator=accumulator, batch=[1])
+
+    assert result.summary == {}
+    assert accumulator["rows"] == 2
+    assert accumulator["nodes_created"] == 2
+    assert accumulator["relationships_created"] == 1
+    assert session.transactions == [[("CREATE NODES", {"batch": [1]})], [("CREATE REL", {"batch": [1]})]]
+
+
+def test_query_database_auto_commit_runs_on_session():
+    with patch("etl_lib.core.ETLContext.GraphDatabase") as mock_gdb:
+        mock_gdb.driver.return_value = _make_driver_mock()
+        ctx = Neo4jContext(_BASIC_ENV)
+    session = MagicMock()
+    result_mock = MagicMock()
+    result_mock.__iter__.return_value = iter([{"committed": True}])
+    result_mock.consume.return_value.counters = _Counters(nodes_created=3)
+    session.run.return_value = result_mock
+
+    result = ctx.query_database_auto_commit(session, "UNWIND $batch AS row CALL { ... }", batch=[1, 2, 3])
+
+    session.run.assert_called_once_with("UNWIND $batch AS row CALL { ... }", batch=[1, 2, 3])
+    session.execute_write.assert_not_called()
+    assert result.data == [{"committed": True}]
+    assert result.summary["nodes_created"] == 3
@@ -0,0 +1,136 @@
+import threading
+import time
+from typing import Generator
+
+import pyarrow as pa
+import pytest
+
+import etl_lib.core.KeySplittingBatchProcessor as key_splitting_module
+from etl_lib.core.BatchProcessor import BatchProcessor, BatchResults
+from etl_lib.core.KeySplittingBatchProcessor import KeySplittingBatchProcessor, key_hash_extractor
+from etl_lib.core.ParallelBatchProcessor import ParallelBatchProcessor
+
+
+class ChunkedPredecessor(BatchProcessor):
+    def __init__(self, chunks, statistics=None):
+        super().__init__(context=None, task=None, predecessor=None)
+        self._chunks = chunks
+        self._statistics = statistics or {}
+
+    def get_batch(self, max_batch_size: int):
+        for chunk in self._chunks:
+            yield BatchResults(chunk=chunk, statistics=self._statistics, batch_size=len(chunk))
+
+
+def _lane_of(extractor, key):
+    return extractor({"id": key})
+
+
+@pytest.mark.parametrize("use_numpy", [True, False])
+def test_key_hash_extractor_batch_matches_scalar(monkeypatch, use_numpy):
+    if not use_numpy:
+        monkeypatch.setattr(key_splitting_module, "np", None)
+    extractor = key_hash_extractor(lanes=7)
+    rows = [{"id": v} for v in [0, 1, 2, -5, 2 ** 70, "a", "b", "a", "node-42"]]
+
+    lanes = [int(lane) for lane in extractor.extract_many(rows)]
+
+    assert lanes == [extractor(row) for row in rows]
+    assert all(0 <= lane < 7 for lane in lanes)
+    assert lanes[5] == lanes[7]
+
+
+@pytest.mark.parametrize("use_numpy", [True, False])
+@pytest.mark.parametrize("step", [1, 5, 10, 1024])
+def test_key_hash_extractor_spreads_strided_keys_over_all_lanes(monkeypatch, use_numpy, step):
+    if not use_numpy:
+        monkeypatch.setattr(key_splitting_module, "np", None)
+    extractor = key_hash_extractor(lanes=10)
+    rows = [{"id": v} for v in range(0, 1000 * step, step)]
+
+    counts = [0] * 10
+    for lane in extractor.extract_many(rows):
+        counts[int(lane)] += 1
+
+    assert all(count > 50 for count in counts), counts
+    assert {extractor(row) for row in rows} == set(range(10))
+
+
+def test_key_hash_extractor_missing_key():
+    with pytest.raises(KeyError):
+        key_hash_extractor(key="uuid")({"id": 1})
+
+
+def test_lanes_mismatch_raises():
+    with pytest.raises(ValueError):
+        KeySplittingBatchProcessor(context=None, lanes=4, key_extractor=key_hash_extractor(lanes=5))
+
+
+def test_rows_of_a_key_share_a_lane_and_full_lanes_are_emitted_first():
+    extractor = key_hash_extractor(lanes=4)
+    rows = [{"id": i % 10, "i": i} for i in range(100)]
+    splitter = KeySplittingBatchProcessor(context=None, lanes=None, key_extractor=extractor,
+                                          predecessor=ChunkedPredecessor([rows[:50], rows[50:]], {"read": 50}))
+
+    outs = list(splitter.get_batch(8))
+
+    seen = {}
+    for br in outs:
+        assert len(br.claims) == len(br.chunk)
+        lanes = [claims[0][1] for claims in br.claims]
+        assert len(lanes) == len(set(lanes))
+        for lane, batch in zip(lanes, br.chunk):
+            assert 0 < len(batch) <= 8
+            for row in batch:
+                assert seen.setdefault(row["id"], lane) == lane == _lane_of(extractor, row["id"])
+    emitted = [row["i"] for br in outs for batch in br.chunk for row in batch]
+    assert sorted(emitted) == list(range(100))
+    # rows of one key keep their order
+    assert [i for i in emitted if i % 10 == 3] == list(range(3, 100, 10))
+    assert all(br.statistics == {} for br in outs[:-1])
+    assert outs[-1].statistics == {"read": 100}
+
+
+def test_columnar_chunks_are_split_into_columnar_lane_batches():
+    chunk = pa.RecordBatch.from_pylist([{"id": f"n{i % 5}", "i": i} for i in range(40)])
+    splitter = KeySplittingBatchProcessor(context=None, lanes=3, key_extractor=key_hash_extractor(lanes=3),
+                                          predecessor=ChunkedPredecessor([chunk]))
+
+    outs = list(splitter.get_batch(100))
+
+    assert len(outs) == 1
+    assert all(isinstance(batch, (pa.RecordBatch, pa.Table)) for batch in outs[0].chunk)
+    assert sorted(i for batch in outs[0].chunk for i in batch.column("i").to_pylist()) == list(range(40))
+
+
+def test_slow_lane_does_not_hold_back_other_lanes():
+    extractor = key_hash_extractor(lanes=2)
+    slow_key = next(k for k in range(100) if extractor({"id": k}) == 0)
+    fast_keys = [k for k in range(100) if extractor({"id": k}) == 1][:6]
+    rows = [{"id": slow_key}] * 2 + [{"id": k} for k in fast_keys]
+    finished = []
+    lock = threading.Lock()
+
+    class RecordingWorker(BatchProcessor):
+        def __init__(self):
+            super().__init__(context=None, task=None, predecessor=None)
+
+        def get_batch(self, max_batch_size: int) -> Generator[BatchResults, None, None]:
+            upstream = next(self.predecessor.get_batch(max_batch_size))
+            if upstream.chunk[0]["id"] == slow_key:
+                time.sleep(0.3)
+            with lock:
+                finished.append(upstream.chunk[0]["id"] == slow_key)
+            yield BatchResults(chunk=upstream.chunk, statistics={"written": len(upstream.chunk)},
+                               batch_size=len(upstream.chunk))
+
+    splitter = KeySplittingBatchProcessor(context=None, lanes=2, key_extractor=extractor,
+                                          predecessor=ChunkedPredecessor([rows[i:i + 2] for i in range(0, 8, 2)]))
+    pbp = ParallelBatchProcessor(context=None, predecessor=splitter, worker_factory=RecordingWorker, max_workers=2,
+                                 prefetch=4)
+
+    outs = list(pbp.get_batch(2))
+
+    assert sum(out.statistics.get("written", 0) for out in outs) == 8
+    # the three batches of the fast lane were written while the slow lane was still busy
+    assert finished == [False, False, False, True]
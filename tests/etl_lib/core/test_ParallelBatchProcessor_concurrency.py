@@ -3,6 +3,7 @@ import time
 from typing import Generator, List
 
 import pytest
+from neo4j.exceptions import Neo4jError
 
 from etl_lib.core.BatchProcessor import BatchProcessor, BatchResults
 from etl_lib.core.ParallelBatchProcessor import ParallelBatchProcessor, ParallelBatchResult
@@ -187,3 +188,295 @@ def test_splitter_and_parallel_processor_end_to_end_without_neo4j():
     assert sorted(processed) == [1, 2, 3, 4]
     assert out.statistics.get("processed") == 4
     assert tracker.max_active == 2
+
+
+class MultiWavePredecessor(BatchProcessor):
+    def __init__(self, waves: List[ParallelBatchResult]):
+        super().__init__(context=None, task=None, predecessor=None)
+        self._waves = waves
+
+    def get_batch(self, max_batch_size: int) -> Generator[BatchResults, None, None]:
+        yield from self._waves
+
+
+class TimelineWorker(BatchProcessor):
+    """
+    Sleeps for the duration encoded in the bucket items and records start/end times per bucket.
+    """
+
+    def __init__(self, timeline: dict, lock: threading.Lock):
+        super().__init__(context=None, task=None, predecessor=None)
+        self._timeline = timeline
+        self._lock = lock
+
+    def get_batch(self, max_batch_size: int) -> Generator[BatchResults, None, None]:
+        upstream = next(self.predecessor.get_batch(max_batch_size))
+        name, sleep_s = upstream.chunk[0]
+        start = time.perf_counter()
+        time.sleep(sleep_s)
+        with self._lock:
+            self._timeline[name] = (start, time.perf_counter())
+        yield BatchResults(chunk=upstream.chunk, statistics={"processed": 1}, batch_size=1)
+
+
+def test_buckets_of_next_wave_start_before_slow_bucket_finishes():
+    timeline = {}
+    lock = threading.Lock()
+
+    wave1 = ParallelBatchResult(
+        chunk=[[("slow", 0.4)], [("fast", 0.01)]],
+        statistics={},
+        batch_size=2,
+        claims=[(("row", 0), ("col", 0)), (("row", 1), ("col", 1))],
+    )
+    wave2 = ParallelBatchResult(
+        chunk=[[("independent", 0.01)], [("conflicting", 0.01)]],
+        statistics={"upstream": 1},
+        batch_size=2,
+        claims=[(("row", 1), ("col", 2)), (("row", 2), ("col", 0))],
+    )
+
+    pbp = ParallelBatchProcessor(
+        context=None,
+        task=None,
+        predecessor=MultiWavePredecessor([wave1, wave2]),
+        worker_factory=lambda: TimelineWorker(timeline, lock),
+        max_workers=3,
+        prefetch=2,
+    )
+
+    outs = list(pbp.get_batch(999))
+
+    assert len(outs) == 2
+    assert sum(out.statistics["processed"] for out in outs) == 4
+    assert sum(out.statistics.get("upstream", 0) for out in outs) == 1
+    # no barrier: the independent bucket of wave 2 does not wait for the slow bucket of wave 1
+    assert timeline["independent"][0] < timeline["slow"][1]
+    # shares col 0 with the slow bucket, so it must wait for it
+    assert timeline["conflicting"][0] >= timeline["slow"][1]
+
+
+def test_waves_without_claims_are_processed_with_barrier():
+    timeline = {}
+    lock = threading.Lock()
+
+    wave1 = ParallelBatchResult(chunk=[[("slow", 0.2)], [("fast", 0.01)]], statistics={}, batch_size=2)
+    wave2 = ParallelBatchResult(chunk=[[("next", 0.01)]], statistics={}, batch_size=1)
+
+    pbp = ParallelBatchProcessor(
+        context=None,
+        task=None,
+        predecessor=MultiWavePredecessor([wave1, wave2]),
+        worker_factory=lambda: TimelineWorker(timeline, lock),
+        max_workers=4,
+        prefetch=2,
+    )
+
+    outs = list(pbp.get_batch(999))
+
+    assert [out.batch_size for out in outs] == [2, 1]
+    assert timeline["next"][0] >= timeline["slow"][1]
+
+
+def test_empty_wave_is_passed_through():
+    pbp = ParallelBatchProcessor(
+        context=None,
+        task=None,
+        predecessor=MultiWavePredecessor([ParallelBatchResult(chunk=[], statistics={"a": 1}, batch_size=0)]),
+        worker_factory=lambda: TrackingWorker(ConcurrencyTracker(), threading.Barrier(1)),
+        max_workers=2,
+        prefetch=1,
+    )
+
+    outs = list(pbp.get_batch(10))
+    assert len(outs) == 1
+    assert outs[0].statistics == {"a": 1}
+    assert outs[0].batch_size == 0
+
+
+class _EventContext:
+    """
+    Context with a reporter collecting instrumentation events.
+    """
+
+    def __init__(self):
+        self.events = []
+        self.reporter = self
+
+    def instrument(self, task, event_type, payload):
+        self.events.append((event_type, payload))
+
+
+class FlakyWorker(BatchProcessor):
+    """
+    Fails the first `failures[name]` attempts of each bucket with a deadlock, then passes the items through.
+    """
+
+    def __init__(self, failures: dict, attempts: dict, lock: threading.Lock):
+        super().__init__(context=None, task=None, predecessor=None)
+        self._failures = failures
+        self._attempts = attempts
+        self._lock = lock
+
+    def get_batch(self, max_batch_size: int) -> Generator[BatchResults, None, None]:
+        upstream = next(self.predecessor.get_batch(max_batch_size))
+        name = upstream.chunk[0]
+        with self._lock:
+            self._attempts[name] = self._attempts.get(name, 0) + 1
+            attempt = self._attempts[name]
+        if attempt <= self._failures.get(name, 0):
+            raise Neo4jError._hydrate_neo4j(code="Neo.TransientError.Transaction.DeadlockDetected", message="deadlock")
+        yield BatchResults(chunk=upstream.chunk, statistics={"processed": 1}, batch_size=1)
+
+
+def _flaky_pbp(context, waves, failures, attempts, **kwargs) -> ParallelBatchProcessor:
+    lock = threading.Lock()
+    return ParallelBatchProcessor(
+        context=context,
+        task=object(),
+        predecessor=MultiWavePredecessor(waves),
+        worker_factory=lambda: FlakyWorker(failures, attempts, lock),
+        max_workers=2,
+        prefetch=2,
+        retry_backoff_s=0.001,
+        **kwargs,
+    )
+
+
+def test_transient_bucket_errors_are_retried_in_place():
+    context = _EventContext()
+    attempts = {}
+    wave = ParallelBatchResult(chunk=[["a"], ["b"]], statistics={}, batch_size=2)
+
+    outs = list(_flaky_pbp(context, [wave], {"a": 2}, attempts, retry_attempts=2).get_batch(10))
+
+    assert attempts == {"a": 3, "b": 1}
+    assert outs[0].statistics == {"processed": 2, "bucket_retries": 2}
+    retries = [p for e, p in context.events if e == "bucket_retry"]
+    assert [p["attempt"] for p in retries] == [1, 2]
+    assert all(p["error"] == "Neo.TransientError.Transaction.DeadlockDetected" and p["backoff_ms"] > 0
+               for p in retries)
+
+
+def test_bucket_is_requeued_after_retries_in_place():
+    context = _EventContext()
+    attempts = {}
+    wave1 = ParallelBatchResult(chunk=[["a"], ["b"]], statistics={}, batch_size=2,
+                                claims=[(("row", 0),), (("row", 1),)])
+    wave2 = ParallelBatchResult(chunk=[["c"]], statistics={}, batch_size=1, claims=[(("row", 2),)])
+
+    outs = list(_flaky_pbp(context, [wave1, wave2], {"a": 3}, attempts, retry_attempts=1,
+                           max_requeues=1).get_batch(10))
+
+    assert attempts == {"a": 4, "b": 1, "c": 1}
+    statistics = {k: sum(out.statistics.get(k, 0) for out in outs) for k in ("processed", "bucket_requeues")}
+    assert statistics == {"processed": 3, "bucket_requeues": 1}
+    assert [p["attempt"] for e, p in context.events if e == "bucket_requeued"] == [1]
+
+
+def test_requeued_bucket_runs_before_later_buckets_sharing_its_claims():
+    attempts = {}
+    order = []
+    lock = threading.Lock()
+
+    class RecordingWorker(FlakyWorker):
+        """
+        Records the order in which buckets succeed, the first attempt of `a` fails after the later waves arrived.
+        """
+
+        def get_batch(self, max_batch_size: int) -> Generator[BatchResults, None, None]:
+            if next(self.predecessor.get_batch(max_batch_size)).chunk == ["a"] and "a" not in attempts:
+                time.sleep(0.2)
+            for out in super().get_batch(max_batch_size):
+                with lock:
+                    order.append(out.chunk[0])
+                yield out
+
+    waves = [
+        ParallelBatchResult(chunk=[["a"], ["b"]], statistics={}, batch_size=2, claims=[(("row", 0),), (("row", 1),)]),
+        ParallelBatchResult(chunk=[["c"]], statistics={}, batch_size=1, claims=[(("row", 0),)]),
+        ParallelBatchResult(chunk=[["d"]], statistics={}, batch_size=1, claims=[(("row", 0),)]),
+    ]
+    pbp = ParallelBatchProcessor(
+        context=_EventContext(),
+        task=object(),
+        predecessor=MultiWavePredecessor(waves),
+        worker_factory=lambda: RecordingWorker({"a": 1}, attempts, lock),
+        max_workers=2,
+        prefetch=2,
+        retry_attempts=0,
+        max_requeues=1,
+    )
+
+    list(pbp.get_batch(10))
+
+    assert attempts["a"] == 2
+    assert [name for name in order if name != "b"] == ["a", "c", "d"]
+
+
+def test_partially_committed_bucket_is_not_written_twice_by_default():
+    committed = []
+    lock = threading.Lock()
+
+    class PartialCommitWorker(BatchProcessor):
+        """
+        Commits the first half of its bucket-batch in one transaction, then fails the second with a deadlock.
+        """
+
+        def __init__(self):
+            super().__init__(context=None, task=None, predecessor=None)
+
+        def get_batch(self, max_batch_size: int) -> Generator[BatchResults, None, None]:
+            rows = next(self.predecessor.get_batch(max_batch_size)).chunk
+            with lock:
+                committed.extend(rows[:len(rows) // 2])
+            raise Neo4jError._hydrate_neo4j(code="Neo.TransientError.Transaction.DeadlockDetected", message="deadlock")
+            yield
+
+    wave = ParallelBatchResult(chunk=[[1, 2, 3, 4]], statistics={}, batch_size=4)
+    pbp = ParallelBatchProcessor(context=None, predecessor=MultiWavePredecessor([wave]),
+                                 worker_factory=PartialCommitWorker, max_workers=2)
+
+    with pytest.raises(Neo4jError):
+        list(pbp.get_batch(10))
+    assert committed == [1, 2]
+
+
+def test_bucket_errors_are_raised_beyond_requeues():
+    attempts = {}
+    wave = ParallelBatchResult(chunk=[["a"]], statistics={}, batch_size=1)
+    pbp = _flaky_pbp(_EventContext(), [wave], {"a": 10}, attempts, retry_attempts=1, max_requeues=1)
+
+    with pytest.raises(Neo4jError):
+        list(pbp.get_batch(10))
+    assert attempts == {"a": 4}
+
+
+def test_lock_conflicts_are_reported_to_the_splitter():
+    from etl_lib.core.SplittingBatchProcessor import SplittingBatchProcessor, tuple_id_extractor
+
+    class RetryingWorker(BatchProcessor):
+        """
+        Reports one transaction retry per item of bucket (1, 1).
+        """
+
+        def __init__(self):
+            super().__init__(context=None, task=None, predecessor=None)
+
+        def get_batch(self, max_batch_size: int) -> Generator[BatchResults, None, None]:
+            upstream = next(self.predecessor.get_batch(max_batch_size))
+            retries = sum(1 for item in upstream.chunk if item == ("a1", "b1"))
+            yield BatchResults(chunk=upstream.chunk, statistics={"tx_retries": retries}, batch_size=len(upstream.chunk))
+
+    items = [("a1", "b1")] * 5 + [("a0", "b2")] * 5
+    splitter = SplittingBatchProcessor(context=None, table_size=3, id_extractor=tuple_id_extractor(3),
+                                       predecessor=ListSource(items, chunk_size=10), contention_threshold=2)
+    reported = []
+    splitter.report_contention = lambda: reported.append(splitter.contention_heat_map())
+    pbp = ParallelBatchProcessor(context=None, predecessor=splitter, worker_factory=RetryingWorker, max_workers=2,
+                                 prefetch=1)
+
+    outs = list(pbp.get_batch(2))
+
+    assert sum(out.batch_size for out in outs) == 10
+    assert reported == [[[0, 0, 0], [0, 5, 0], [0, 0, 0]]]
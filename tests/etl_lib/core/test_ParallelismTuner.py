@@ -0,0 +1,180 @@
+import logging
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+from etl_lib.core.BatchProcessor import BatchProcessor, BatchResults
+from etl_lib.core.InstrumentationWriter import CsvInstrumentationWriter
+from etl_lib.core.ParallelBatchProcessor import ParallelBatchProcessor, ParallelBatchResult
+from etl_lib.core.ParallelismTuner import (ParallelismTuner, autotune_parallel_load, best_from_instrumentation)
+from etl_lib.test_utils.utils import DummyContext, DummyPredecessor
+
+
+def _calibrate(tuner, rates, retries=None, waves=100):
+    """
+    Feed `tuner` waves of 100 rows finishing at the rate (rows/s) given per worker count.
+    """
+    now = 0.0
+    tuner.record(100, now=now)
+    for _ in range(waves):
+        if tuner.settled:
+            break
+        workers = tuner.workers
+        now += 100 / rates[workers]
+        tuner.record(100, (retries or {}).get(workers, 0), now=now)
+    return tuner
+
+
+def test_tuner_settles_on_fastest_candidate():
+    tuner = _calibrate(ParallelismTuner([1, 2, 4, 8], waves_per_trial=2), {1: 100, 2: 200, 4: 400, 8: 300})
+
+    assert tuner.settled
+    assert tuner.workers == 4
+    # 8 workers were slower, so nothing beyond was tried
+    assert [t.workers for t in tuner.trials] == [1, 2, 4, 8]
+
+
+def test_tuner_stops_early_when_throughput_drops():
+    tuner = _calibrate(ParallelismTuner([1, 2, 4, 8], waves_per_trial=2), {1: 100, 2: 50, 4: 400, 8: 800})
+
+    assert tuner.workers == 1
+    assert [t.workers for t in tuner.trials] == [1, 2]
+
+
+def test_tuner_prefers_fewer_retries_within_tolerance():
+    tuner = _calibrate(ParallelismTuner([2, 4], waves_per_trial=2, tolerance=0.1), {2: 100, 4: 105},
+                       retries={4: 5})
+
+    assert tuner.workers == 2
+
+
+def test_tuner_skips_wave_after_switch():
+    tuner = ParallelismTuner([1, 2], waves_per_trial=1)
+    tuner.record(100, now=0.0)
+    assert tuner.record(100, now=1.0).workers == 1
+    assert tuner.record(100, now=2.0) is None
+    assert tuner.record(100, now=2.5).workers == 2
+    assert tuner.settled and tuner.workers == 2
+
+
+@pytest.mark.parametrize("table_size, max_workers, expected", [
+    (8, None, [2, 4, 6, 8]),
+    (2, None, [1, 2]),
+    (8, 4, [2, 4, 6]),
+    (8, 8, [6, 8]),
+])
+def test_around_candidates(table_size, max_workers, expected):
+    assert ParallelismTuner.around(table_size, max_workers).candidates == expected
+
+
+def _write_history(path: Path, runs):
+    writer = CsvInstrumentationWriter(path)
+    for task_uuid, table_size, waves in runs:
+        writer.write({"ts": "2026-01-01T00:00:00+00:00", "event_type": "splitter_flush", "task_uuid": task_uuid,
+                      "task_name": "LoadTask", "table_size": table_size})
+        for second, rows, max_workers in waves:
+            writer.write({"ts": f"2026-01-01T00:00:{second:02d}+00:00", "event_type": "parallel_wave_done",
+                          "task_uuid": task_uuid, "task_name": "LoadTask", "rows": rows,
+                          "max_workers": max_workers})
+
+
+def test_best_from_instrumentation(tmp_path):
+    path = tmp_path / "instrumentation.csv"
+    _write_history(path, [
+        ("run-1", 10, [(0, 100, 4), (1, 100, 4), (2, 100, 4), (3, 500, 8), (4, 500, 8), (5, 500, 8)]),
+        ("run-2", 20, [(0, 100, 10), (10, 100, 10), (20, 100, 10)]),
+    ])
+
+    assert best_from_instrumentation(path, "LoadTask") == (10, 8, 500.0)
+    assert best_from_instrumentation(path, "LoadTask", table_size=20) == (20, 10, 10.0)
+    assert best_from_instrumentation(path, "OtherTask") is None
+    assert best_from_instrumentation(tmp_path / "missing.csv", "LoadTask") is None
+
+
+class _NamedTask:
+    logger = logging.getLogger(__name__)
+
+    def task_name(self):
+        return "LoadTask"
+
+
+def test_autotune_parallel_load_uses_history(tmp_path):
+    path = tmp_path / "instrumentation.csv"
+    _write_history(path, [
+        ("run-1", 8, [(0, 100, 4), (1, 100, 4), (2, 100, 4)]),
+        ("run-2", 10, [(0, 900, 5), (1, 900, 5), (2, 900, 5)]),
+    ])
+    context = DummyContext()
+    context.env = lambda key: str(path) if key == "ETL_LIB_INSTRUMENT_CSV_PATH" else None
+
+    tuner, best_table_size = autotune_parallel_load(context, _NamedTask(), 8)
+
+    assert tuner.candidates == [2, 4, 6]
+    assert best_table_size == 10
+
+
+class _RecordingReporter:
+    def __init__(self):
+        self.events = []
+
+    def instrument(self, task, event_type, payload):
+        self.events.append((event_type, payload))
+
+
+class _CountingWorker(BatchProcessor):
+    lock = threading.Lock()
+    running = 0
+    peak = 0
+
+    def get_batch(self, max_batch_size: int):
+        cls = _CountingWorker
+        with cls.lock:
+            cls.running += 1
+            cls.peak = max(cls.peak, cls.running)
+        time.sleep(0.01)
+        with cls.lock:
+            cls.running -= 1
+        batch = next(self.predecessor.get_batch(max_batch_size))
+        yield BatchResults(chunk=batch.chunk, statistics={"tx_retries": 1}, batch_size=len(batch.chunk))
+
+
+def test_parallel_batch_processor_applies_tuner():
+    waves = [
+        ParallelBatchResult(chunk=[[i] for i in range(4)], statistics={}, batch_size=4,
+                            claims=[(("w", n, i),) for i in range(4)])
+        for n in range(6)
+    ]
+    context = DummyContext()
+    context.reporter = _RecordingReporter()
+    tuner = ParallelismTuner([1], waves_per_trial=1)
+    _CountingWorker.peak = 0
+
+    processor = ParallelBatchProcessor(context, lambda: _CountingWorker(context), task=object(),
+                                       predecessor=DummyPredecessor(waves), max_workers=4, tuner=tuner)
+    results = list(processor.get_batch(10))
+
+    assert sum(r.batch_size for r in results) == 24
+    assert _CountingWorker.peak == 1
+    assert all(p["max_workers"] == 1 for e, p in context.reporter.events if e == "parallel_wave_done")
+
+
+def test_parallel_batch_processor_reports_trials():
+    waves = [ParallelBatchResult(chunk=[[n]], statistics={}, batch_size=1, claims=[(n,)]) for n in range(8)]
+    context = DummyContext()
+    context.reporter = _RecordingReporter()
+
+    processor = ParallelBatchProcessor(context, lambda: _CountingWorker(context), task=object(),
+                                       predecessor=DummyPredecessor(waves), max_workers=2,
+                                       tuner=ParallelismTuner([1, 2], waves_per_trial=2))
+    list(processor.get_batch(10))
+
+    trials = [p for e, p in context.reporter.events if e == "autotune_trial"]
+    assert trials and trials[0]["max_workers"] == 1
+    assert trials[0]["tx_retries"] == trials[0]["rows"] == 2
+
+
+def test_parallel_batch_processor_rejects_small_pool():
+    with pytest.raises(ValueError):
+        ParallelBatchProcessor(DummyContext(), lambda: None, max_workers=2, tuner=ParallelismTuner([4]))
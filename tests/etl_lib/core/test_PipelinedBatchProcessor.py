@@ -0,0 +1,125 @@
+import threading
+import time
+
+import pytest
+
+from etl_lib.core.BatchProcessor import BatchProcessor, BatchResults
+from etl_lib.core.PipelinedBatchProcessor import PipelinedBatchProcessor
+from etl_lib.test_utils.utils import DummyContext
+
+
+class _RecordingReporter:
+    def __init__(self):
+        self.events = []
+
+    def instrument(self, task, event_type, payload):
+        self.events.append((event_type, payload))
+
+
+class _Source(BatchProcessor):
+    def __init__(self, batches, delay=0.0, fail_after=None):
+        super().__init__(context=None)
+        self.batches = batches
+        self.delay = delay
+        self.fail_after = fail_after
+        self.threads = set()
+        self.produced = 0
+        self.closed = False
+
+    def get_batch(self, max_batch_size):
+        try:
+            for i, chunk in enumerate(self.batches):
+                if self.fail_after is not None and i == self.fail_after:
+                    raise RuntimeError("source failed")
+                time.sleep(self.delay)
+                self.threads.add(threading.current_thread().name)
+                self.produced += 1
+                yield BatchResults(chunk=chunk, statistics={"read": len(chunk)}, batch_size=len(chunk))
+        finally:
+            self.closed = True
+
+
+def _context():
+    context = DummyContext()
+    context.reporter = _RecordingReporter()
+    return context
+
+
+def test_passes_batches_in_order_from_another_thread():
+    source = _Source([[i, i + 1] for i in range(0, 20, 2)])
+    sut = PipelinedBatchProcessor(_context(), task=object(), predecessor=source, queue_size=2)
+
+    results = list(sut.get_batch(2))
+
+    assert [r.chunk for r in results] == source.batches
+    assert [r.statistics for r in results] == [{"read": 2}] * 10
+    assert source.threads == {"pipeline-_Source"}
+
+
+def test_overlaps_producer_and_consumer():
+    source = _Source([[i] for i in range(5)], delay=0.02)
+    sut = PipelinedBatchProcessor(_context(), predecessor=source, queue_size=4)
+
+    start = time.perf_counter()
+    for _ in sut.get_batch(1):
+        time.sleep(0.02)
+    elapsed = time.perf_counter() - start
+
+    # sequential would take 5 * (0.02 + 0.02)
+    assert elapsed < 0.17
+
+
+def test_reports_queue_depth_and_blocked_time():
+    context = _context()
+    source = _Source([[i] for i in range(4)])
+    sut = PipelinedBatchProcessor(context, task=object(), predecessor=source, queue_size=1, name="csv")
+
+    for _ in sut.get_batch(1):
+        time.sleep(0.02)
+
+    events = [p for e, p in context.reporter.events if e == "pipeline_batch"]
+    assert len(events) == 4
+    assert all(p["stage"] == "csv" and p["rows"] == 1 for p in events)
+    assert all(0 <= p["queue_depth"] <= 1 for p in events)
+    # a slow consumer keeps the producer waiting for room in the queue
+    assert sum(p["producer_blocked_ms"] for p in events) >= 20
+    assert all("consumer_blocked_ms" in p for p in events)
+
+
+def test_reraises_upstream_errors():
+    source = _Source([[1], [2], [3]], fail_after=2)
+    sut = PipelinedBatchProcessor(_context(), predecessor=source)
+
+    received = []
+    with pytest.raises(RuntimeError, match="source failed"):
+        for batch in sut.get_batch(1):
+            received.append(batch.chunk)
+
+    assert received == [[1], [2]]
+
+
+def test_stops_producer_when_consumer_stops_early():
+    source = _Source([[i] for i in range(100)])
+    sut = PipelinedBatchProcessor(_context(), predecessor=source, queue_size=2)
+
+    gen = sut.get_batch(1)
+    assert next(gen).chunk == [0]
+    gen.close()
+
+    assert source.closed
+    assert source.produced < 10
+
+
+def test_rejects_invalid_queue_size():
+    with pytest.raises(ValueError):
+        PipelinedBatchProcessor(_context(), predecessor=_Source([]), queue_size=0)
+
+
+def test_forwards_stats_only_request():
+    source = _Source([[1]])
+    sut = PipelinedBatchProcessor(_context(), predecessor=source)
+
+    sut.request_stats_only()
+
+    assert sut.stats_only and source.stats_only
+
@@ -0,0 +1,137 @@
+import functools
+import os
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Generator
+
+import pytest
+
+from etl_lib.core.BatchProcessor import BatchProcessor, BatchResults
+from etl_lib.core.ProcessPoolBatchProcessor import ProcessPoolBatchProcessor, ordered_map
+from etl_lib.core.SharedMemoryTransport import SharedMemoryTransport
+from etl_lib.test_utils.utils import DummyContext
+
+
+class ListPredecessor(BatchProcessor):
+
+    def __init__(self, batches):
+        super().__init__(None, None)
+        self.batches = batches
+
+    def get_batch(self, max_batch_size: int) -> Generator[BatchResults, None, None]:
+        for chunk in self.batches:
+            yield BatchResults(chunk=chunk, statistics={"rows_read": len(chunk)}, batch_size=len(chunk))
+
+
+def square_odd_rows(factor, chunk):
+    # uneven runtimes, so that results complete out of order
+    time.sleep(random.random() / 100)
+    rows = [{"_row": row["_row"], "value": row["_row"] ** 2 * factor, "pid": os.getpid()}
+            for row in chunk if row["_row"] % 2]
+    return BatchResults(chunk=rows, statistics={"odd_rows": len(rows)}, batch_size=len(chunk))
+
+
+def square_rows_columnar(factor, chunk):
+    import pyarrow.compute as pc
+    values = pc.multiply(pc.multiply(chunk.column("_row"), chunk.column("_row")), factor)
+    return BatchResults(chunk=chunk.append_column("value", values), statistics={}, batch_size=len(chunk))
+
+
+def fail_on_third(chunk):
+    if chunk[0]["_row"] == 20:
+        raise ValueError("boom")
+    return BatchResults(chunk=chunk, statistics={}, batch_size=len(chunk))
+
+
+def test_ordered_map_keeps_order_and_bounds_in_flight():
+    in_flight = []
+    consumed = []
+
+    def items():
+        for i in range(50):
+            consumed.append(i)
+            in_flight.append(len(consumed) - len(results))
+            yield i
+
+    def work(i):
+        time.sleep(random.random() / 200)
+        return i * 2
+
+    results = []
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        for item, result, _ in ordered_map(pool, work, items(), 3):
+            results.append(result)
+            assert result == item * 2
+
+    assert results == [i * 2 for i in range(50)]
+    assert max(in_flight) <= 3
+
+
+def test_process_pool_keeps_order_and_merges_statistics():
+    batches = [[{"_row": i} for i in range(start, start + 10)] for start in range(0, 100, 10)]
+    processor = ProcessPoolBatchProcessor(
+        DummyContext(),
+        fn=functools.partial(square_odd_rows, 3),
+        predecessor=ListPredecessor(batches),
+        processes=3,
+    )
+
+    results = list(processor.get_batch(10))
+
+    assert [row["_row"] for result in results for row in result.chunk] == list(range(1, 100, 2))
+    assert all(row["value"] == row["_row"] ** 2 * 3 for result in results for row in result.chunk)
+    assert all(row["pid"] != os.getpid() for result in results for row in result.chunk)
+    assert all(result.statistics == {"rows_read": 10, "odd_rows": 5} for result in results)
+    assert [result.batch_size for result in results] == [10] * 10
+
+
+def test_process_pool_raises_worker_errors():
+    batches = [[{"_row": i} for i in range(start, start + 10)] for start in range(0, 100, 10)]
+    processor = ProcessPoolBatchProcessor(DummyContext(), fn=fail_on_third, predecessor=ListPredecessor(batches),
+                                          processes=2)
+
+    received = []
+    with pytest.raises(ValueError, match="boom"):
+        for result in processor.get_batch(10):
+            received.append(result.chunk[0]["_row"])
+    assert received == [0, 10]
+
+
+def _shm_blocks():
+    return set(os.listdir("/dev/shm")) if os.path.isdir("/dev/shm") else set()
+
+
+@pytest.mark.parametrize("columnar", [False, True])
+def test_process_pool_with_shared_memory_transport(columnar):
+    pa = pytest.importorskip("pyarrow")
+    before = _shm_blocks()
+    batches = [[{"_row": i} for i in range(start, start + 10)] for start in range(0, 100, 10)]
+    if columnar:
+        batches = [pa.RecordBatch.from_pylist(batch) for batch in batches]
+    processor = ProcessPoolBatchProcessor(
+        DummyContext(),
+        fn=functools.partial(square_rows_columnar if columnar else square_odd_rows, 3),
+        predecessor=ListPredecessor(batches),
+        processes=2,
+        transport=SharedMemoryTransport(),
+    )
+
+    results = list(processor.get_batch(10))
+
+    rows = [row for result in results for row in (result.chunk.to_pylist() if columnar else result.chunk)]
+    expected = range(100) if columnar else range(1, 100, 2)
+    assert [row["_row"] for row in rows] == list(expected)
+    assert all(row["value"] == row["_row"] ** 2 * 3 for row in rows)
+    assert _shm_blocks() == before
+
+
+def test_shared_memory_blocks_are_released_on_worker_errors():
+    before = _shm_blocks()
+    batches = [[{"_row": i} for i in range(start, start + 10)] for start in range(0, 100, 10)]
+    processor = ProcessPoolBatchProcessor(DummyContext(), fn=fail_on_third, predecessor=ListPredecessor(batches),
+                                          processes=2, transport=SharedMemoryTransport())
+
+    with pytest.raises(ValueError, match="boom"):
+        list(processor.get_batch(10))
+    assert _shm_blocks() == before
@@ -0,0 +1,39 @@
+import random
+from collections import Counter
+
+import pytest
+
+from etl_lib.core.SpaceSaving import SpaceSaving
+
+
+def test_counts_exactly_below_capacity():
+    sketch = SpaceSaving(capacity=4)
+    for key in "abacab":
+        sketch.add(key)
+    sketch.add("c", 3)
+
+    assert sketch.total == 9
+    assert [(key, count) for key, count, _ in sketch.top()] == [("c", 4), ("a", 3), ("b", 2)]
+    assert sketch.estimate("a") == (3, 0)
+    assert sketch.estimate("z") == (0, 0)
+
+
+def test_bounds_hold_and_heavy_hitters_are_kept():
+    rng = random.Random(7)
+    stream = ["hot"] * 2000 + ["warm"] * 800 + [f"cold{rng.randrange(5000)}" for _ in range(7200)]
+    rng.shuffle(stream)
+    sketch = SpaceSaving(capacity=20)
+    for key in stream:
+        sketch.add(key)
+
+    actual = Counter(stream)
+    assert len(sketch) == 20
+    for key, count, error in sketch.top():
+        assert count - error <= actual[key] <= count
+    assert [key for key, _, _ in sketch.top(2)] == ["hot", "warm"]
+    assert sketch.guaranteed("hot") > 0.1 * sketch.total
+
+
+def test_rejects_invalid_capacity():
+    with pytest.raises(ValueError):
+        SpaceSaving(capacity=0)
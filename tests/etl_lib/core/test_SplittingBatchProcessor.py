@@ -4,9 +4,15 @@ from typing import Any, Dict, List, Tuple
 
 import pytest
 
+import etl_lib.core._bucketing as bucketing_module
+import etl_lib.core.SplittingBatchProcessor as splitting_module
+
+from etl_lib.core._bucketing import BucketQueue
 from etl_lib.core.BatchProcessor import BatchProcessor, BatchResults
 from etl_lib.core.SplittingBatchProcessor import (
     SplittingBatchProcessor,
+    _max_weight_assignment,
+    canonical_int_or_str_id_extractor,
     canonical_integer_id_extractor,
     dict_id_extractor,
     tuple_id_extractor,
@@ -164,7 +170,7 @@ def test_select_wave_picks_non_overlapping_buckets_and_is_deterministic_for_equa
 
     for r in range(3):
         for c in range(3):
-            proc.buffer[r][c] = [(r, c)]
+            proc._add_to_bucket(r, c, [(r, c)])
 
     wave = proc._select_wave(min_bucket_len=1)
     assert wave == [(0, 0), (1, 1), (2, 2)]
@@ -459,3 +465,384 @@ def test_order_agnostic_correctness_randomized_inputs_multiset_preserved_and_non
                 all_emitted.extend(bucket_batch)
 
         assert Counter(all_emitted) == Counter(items)
+
+
+def test_bucket_index_stays_consistent_with_buffer():
+    table_size = 6
+    splitter = SplittingBatchProcessor(
+        context=None,
+        task=None,
+        predecessor=DummyPredecessor([]),
+        table_size=table_size,
+        id_extractor=lambda rc: rc,
+    )
+    thresholds = (3, 7, 20)
+    splitter._track_thresholds(thresholds)
+
+    rng = random.Random(11)
+    for _ in range(500):
+        r, c = rng.randrange(table_size), rng.randrange(table_size)
+        if rng.random() < 0.6:
+            splitter._add_to_bucket(r, c, [(r, c)] * rng.randint(1, 5))
+        else:
+            splitter._take_from_bucket(r, c, rng.randint(1, 8))
+
+        sizes = {(r, c): len(splitter.buffer[r][c]) for r in range(table_size) for c in range(table_size)}
+        assert splitter._buffered == sum(sizes.values())
+        for t in (1, *thresholds, 5):
+            assert splitter._buckets_at_least(t) == {k for k, n in sizes.items() if n >= t}
+        hottest = splitter._find_hottest_bucket(threshold=7)
+        expected = max(((n, -k[0], -k[1]) for k, n in sizes.items() if n >= 7), default=None)
+        assert (hottest is None) == (expected is None)
+        if hottest is not None:
+            assert (hottest[2], -hottest[0], -hottest[1]) == expected
+
+
+def test_bucket_queue_is_fifo_across_chunks():
+    q = BucketQueue()
+    q.extend([0, 1, 2])
+    q.extend([])
+    q.extend([3, 4])
+    q.extend([5, 6, 7, 8])
+    assert len(q) == 9
+    assert list(q) == list(range(9))
+
+    assert q.take(2) == [0, 1]
+    assert q.take(3) == [2, 3, 4]
+    assert len(q) == 4
+    assert list(q) == [5, 6, 7, 8]
+    assert q.take(1) == [5]
+    assert q.take(10) == [6, 7, 8]
+    assert len(q) == 0
+    assert q.take(3) == []
+
+
+def test_matching_scheduler_moves_more_rows_than_greedy():
+    splitter = SplittingBatchProcessor(
+        context=None,
+        task=None,
+        predecessor=DummyPredecessor([]),
+        table_size=2,
+        id_extractor=lambda rc: rc,
+        scheduler="matching",
+    )
+    for (r, c), n in {(0, 0): 10, (0, 1): 9, (1, 0): 9, (1, 1): 1}.items():
+        splitter._add_to_bucket(r, c, [(r, c)] * n)
+
+    assert splitter._select_wave_greedy(min_bucket_len=1) == [(0, 0), (1, 1)]
+    wave = splitter._select_wave(min_bucket_len=1, max_bucket_len=100)
+    assert sorted(wave) == [(0, 1), (1, 0)]
+
+    # the cap limits what a bucket contributes, greedy is used when it moves as many rows
+    wave = splitter._select_wave(min_bucket_len=1, max_bucket_len=1)
+    assert wave == [(0, 0), (1, 1)]
+
+    with pytest.raises(ValueError):
+        SplittingBatchProcessor(
+            context=None, task=None, predecessor=DummyPredecessor([]), table_size=2,
+            id_extractor=lambda rc: rc, scheduler="optimal",
+        )
+
+
+def test_max_weight_assignment_matches_brute_force():
+    from itertools import permutations
+
+    rng = random.Random(5)
+    for _ in range(50):
+        n = rng.randint(1, 4)
+        m = rng.randint(n, 5)
+        weights = [[rng.choice([0, 0, rng.randint(1, 20)]) for _ in range(m)] for _ in range(n)]
+        assignment = _max_weight_assignment(weights)
+        assert len(set(assignment)) == n
+        best = max(sum(weights[i][j] for i, j in enumerate(p)) for p in permutations(range(m), n))
+        assert sum(weights[i][j] for i, j in enumerate(assignment)) == best
+
+
+@pytest.mark.parametrize("monopartite", [False, True])
+def test_matching_scheduler_preserves_rows_and_non_overlap(monopartite):
+    if monopartite:
+        table_size = 5
+        id_extractor = canonical_integer_id_extractor(table_size=table_size, start_key="s", end_key="e")
+    else:
+        table_size = 10
+        id_extractor = dict_id_extractor(table_size=table_size, start_key="s", end_key="e")
+
+    rng = random.Random(3)
+    items = [{"s": rng.randrange(40), "e": rng.randrange(40), "i": i} for i in range(600)]
+    splitter = SplittingBatchProcessor(
+        context=None,
+        task=None,
+        predecessor=MultiBatchPredecessor([(items[i:i + 50], {}) for i in range(0, len(items), 50)]),
+        table_size=table_size,
+        id_extractor=id_extractor,
+        scheduler="matching",
+    )
+
+    seen = []
+    for br in splitter.get_batch(max_batch_size=8):
+        if monopartite:
+            _assert_wave_non_overlap_monopartite(br, lambda item: tuple(sorted(id_extractor(item))))
+        else:
+            _assert_wave_non_overlap_bipartite(br, id_extractor)
+        seen.extend(item["i"] for bucket in br.chunk for item in bucket)
+    assert sorted(seen) == list(range(len(items)))
+
+
+def test_bucket_queue_keeps_fifo_order_when_spilled(tmp_path):
+    q = BucketQueue()
+    q.extend(list(range(5)))
+    assert q.take(2) == [0, 1]
+    assert q.spill(str(tmp_path / "a")) == 3
+    assert q.in_memory == 0
+    q.extend([5, 6])
+    assert q.take(1) == [2]
+    assert q.spill(str(tmp_path / "b")) == 4
+    q.extend([7])
+    assert len(q) == 5
+    assert q.in_memory == 1
+    assert list(q) == [3, 4, 5, 6, 7]
+    assert q.take(4) == [3, 4, 5, 6]
+    assert q.take(10) == [7]
+    assert len(q) == 0 and q.in_memory == 0
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_memory_budget_spills_without_changing_the_schedule(tmp_path):
+    table_size = 4
+    rng = random.Random(17)
+    items = [{"start": rng.randrange(400), "end": rng.randrange(400), "i": i} for i in range(3000)]
+    batches = [(items[i:i + 100], {"rows": 100}) for i in range(0, len(items), 100)]
+
+    def run(**kwargs):
+        spills = []
+        splitter = SplittingBatchProcessor(
+            context=None,
+            task=None,
+            predecessor=MultiBatchPredecessor(batches),
+            table_size=table_size,
+            id_extractor=canonical_integer_id_extractor(table_size=table_size),
+            burst_multiplier=50,
+            **kwargs,
+        )
+        splitter._instrument = lambda event_type, payload: spills.append(payload)
+        out = []
+        for br in splitter.get_batch(max_batch_size=40):
+            out.append(([[item["i"] for item in bucket] for bucket in br.chunk], br.claims, br.statistics))
+        return splitter, out, spills
+
+    _, expected, _ = run()
+    splitter, actual, spills = run(memory_budget_rows=200, spill_dir=str(tmp_path))
+    assert actual == expected
+    assert [p for p in spills if "memory_budget_rows" in p]
+    assert splitter._spill_path is None
+    assert list(tmp_path.iterdir()) == []
+
+
+@pytest.mark.parametrize("use_numpy", [True, False])
+def test_extract_many_matches_scalar_extractors(monkeypatch, use_numpy):
+    if not use_numpy:
+        monkeypatch.setattr(splitting_module, "np", None)
+        monkeypatch.setattr(bucketing_module, "np", None)
+    elif splitting_module.np is None:
+        pytest.skip("numpy not installed")
+
+    rng = random.Random(23)
+    ints = [rng.choice([rng.randrange(10 ** 6), -rng.randrange(10 ** 6), rng.randrange(2 ** 70)]) for _ in range(300)]
+    names = [f"node-{rng.randrange(50)}" for _ in range(300)]
+    int_rows = [{"start": a, "end": b} for a, b in zip(ints, reversed(ints))]
+    mixed_rows = [{"start": a, "end": b} for a, b in zip(ints, names)]
+
+    digits = [str(abs(v)) for v in ints]
+    cases = [
+        (tuple_id_extractor(), [(a, b) for a, b in zip(ints, names)]),
+        (tuple_id_extractor(), [(a, b) for a, b in zip(ints[:100], reversed(ints[:100]))]),
+        (tuple_id_extractor(), [(a, b) for a, b in zip(digits, names)]),
+        (dict_id_extractor(), mixed_rows),
+        (dict_id_extractor(), [{"start": a, "end": b} for a, b in zip(digits, ["x\u0663", "y7"] * 150)]),
+        (canonical_integer_id_extractor(table_size=7), int_rows),
+        (canonical_integer_id_extractor(table_size=7), int_rows[:10] + [{"start": 2 ** 70, "end": 1}]),
+        (canonical_int_or_str_id_extractor(table_size=13), mixed_rows),
+    ]
+    for extractor, chunk in cases:
+        rows, cols = extractor.extract_many(chunk)
+        assert [(int(r), int(c)) for r, c in zip(rows, cols)] == [extractor(item) for item in chunk]
+
+    with pytest.raises(KeyError):
+        dict_id_extractor().extract_many([{"start": 1}])
+    with pytest.raises(ValueError):
+        tuple_id_extractor().extract_many([("1", "2"), ("3", "x")])
+
+
+def test_dict_id_extractor_extract_many_on_columnar_chunks():
+    pa = pytest.importorskip("pyarrow")
+    rows = [{"start": i * 7 - 50, "end": f"n{i * 3}"} for i in range(100)]
+
+    rows_out, cols_out = dict_id_extractor().extract_many(pa.RecordBatch.from_pylist(rows))
+
+    assert [(int(r), int(c)) for r, c in zip(rows_out, cols_out)] == [dict_id_extractor()(row) for row in rows]
+
+
+@pytest.mark.parametrize("use_numpy", [True, False])
+def test_batch_scatter_emits_same_waves_as_per_item_extraction(monkeypatch, use_numpy):
+    if not use_numpy:
+        monkeypatch.setattr(splitting_module, "np", None)
+        monkeypatch.setattr(bucketing_module, "np", None)
+    elif splitting_module.np is None:
+        pytest.skip("numpy not installed")
+
+    rng = random.Random(29)
+    items = [{"start": f"n{rng.randrange(300)}", "end": rng.randrange(300), "i": i} for i in range(2000)]
+    batches = [(items[i:i + 128], {}) for i in range(0, len(items), 128)]
+    extractor = canonical_int_or_str_id_extractor(table_size=6)
+
+    def run(id_extractor):
+        splitter = SplittingBatchProcessor(
+            context=None,
+            task=None,
+            predecessor=MultiBatchPredecessor(batches),
+            table_size=6,
+            id_extractor=id_extractor,
+        )
+        return [
+            ([[item["i"] for item in bucket] for bucket in br.chunk], br.claims)
+            for br in splitter.get_batch(max_batch_size=30)
+        ]
+
+    def per_item(item):
+        return extractor(item)
+
+    per_item.table_size = 6
+    per_item.monopartite = True
+    assert run(extractor) == run(per_item)
+
+
+@pytest.mark.parametrize("use_numpy", [True, False])
+def test_columnar_chunks_are_split_into_columnar_bucket_batches(monkeypatch, tmp_path, use_numpy):
+    pa = pytest.importorskip("pyarrow")
+    if not use_numpy:
+        monkeypatch.setattr(splitting_module, "np", None)
+        monkeypatch.setattr(bucketing_module, "np", None)
+    elif splitting_module.np is None:
+        pytest.skip("numpy not installed")
+
+    rng = random.Random(31)
+    items = [{"start": rng.randrange(500), "end": rng.randrange(500), "i": i} for i in range(1500)]
+    row_batches = [(items[i:i + 100], {}) for i in range(0, len(items), 100)]
+    arrow_batches = [(pa.RecordBatch.from_pylist(chunk), stats) for chunk, stats in row_batches]
+
+    def run(batches, **kwargs):
+        splitter = SplittingBatchProcessor(
+            context=None,
+            task=None,
+            predecessor=MultiBatchPredecessor(batches),
+            table_size=5,
+            id_extractor=canonical_integer_id_extractor(table_size=5),
+            **kwargs,
+        )
+        out = []
+        for br in splitter.get_batch(max_batch_size=25):
+            out.append(([[row["i"] for row in (b.to_pylist() if hasattr(b, "to_pylist") else b)] for b in br.chunk],
+                        br.claims, br.batch_size))
+            if batches is arrow_batches:
+                assert all(isinstance(b, (pa.RecordBatch, pa.Table)) for b in br.chunk)
+        return out
+
+    expected = run(row_batches)
+    assert run(arrow_batches) == expected
+    assert run(arrow_batches, memory_budget_rows=100, spill_dir=str(tmp_path)) == expected
+
+
+def test_contended_buckets_are_emitted_as_exclusive_waves():
+    items = [(f"a{r}", f"b{c}") for r, c in [(0, 1), (1, 0), (2, 2)] for _ in range(2)]
+    splitter = SplittingBatchProcessor(
+        context=None,
+        task=None,
+        predecessor=SingleBatchPredecessor(items),
+        table_size=3,
+        id_extractor=tuple_id_extractor(3),
+        contention_threshold=3,
+    )
+    splitter.record_contention(0, 1, 2)
+    splitter.record_contention(2, 2)
+    splitter.record_contention(0, 1)
+
+    outs = list(splitter.get_batch(2))
+
+    assert [(br.coordinates, br.claims is None) for br in outs] == [([(1, 0), (2, 2)], False), ([(0, 1)], True)]
+    assert outs[1].chunk == [[("a0", "b1"), ("a0", "b1")]]
+    assert splitter.contention_heat_map() == [[0, 3, 0], [0, 0, 0], [0, 0, 1]]
+
+
+def test_report_contention_writes_heat_map(tmp_path):
+    contention_file = tmp_path / "contention.csv"
+    splitter = SplittingBatchProcessor(context=None, table_size=2, id_extractor=tuple_id_extractor(2),
+                                       contention_file=contention_file)
+
+    splitter.report_contention()
+    assert not contention_file.exists()
+
+    splitter.record_contention(1, 0, 4)
+    splitter.report_contention()
+    assert contention_file.read_text().splitlines() == ["row,0,1", "0,0,0", "1,4,0"]
+
+
+def test_hot_key_rows_are_written_through_a_serial_lane():
+    hot_rows = [("a1", f"b{c}") for _ in range(2) for c in range(3)]
+    splitter = SplittingBatchProcessor(
+        context=None,
+        table_size=3,
+        id_extractor=tuple_id_extractor(3),
+        predecessor=SingleBatchPredecessor(hot_rows + [("a0", "b0"), ("a2", "b2")]),
+        hot_key_share=0.5,
+    )
+
+    outs = list(splitter.get_batch(2))
+
+    hot = ("hot", "row", "a1")
+    assert [br.claims for br in outs[:3]] == [
+        [(hot, ("col", 0), ("row", 1))],
+        [(hot, ("col", 1))],
+        [(hot, ("col", 2))],
+    ]
+    assert [br.chunk for br in outs[:3]] == [[[("a1", f"b{c}")] * 2] for c in range(3)]
+    assert outs[3].coordinates == [(0, 0), (2, 2)]
+    assert outs[3].statistics == {"hot_keys": 1, "hot_lane_rows": 6}
+
+
+def test_hot_key_lanes_claim_the_grid_slot_until_earlier_rows_are_emitted():
+    splitter = SplittingBatchProcessor(
+        context=None,
+        table_size=10,
+        id_extractor=tuple_id_extractor(10),
+        predecessor=MultiBatchPredecessor([
+            ([("a1", "b0"), ("a2", "b2")], None),
+            ([("a1", f"b{i}1") for i in range(4)], None),
+        ]),
+        hot_key_share=0.5,
+    )
+
+    outs = list(splitter.get_batch(4))
+
+    assert outs[0].claims == [(("hot", "row", "a1"), ("col", 1), ("row", 1))]
+    assert outs[1].chunk == [[("a1", "b0")], [("a2", "b2")]]
+    assert len(outs) == 2
+
+
+def test_monopartite_hot_key_lanes_preserve_rows_and_non_overlap():
+    rng = random.Random(3)
+    rows = [{"start": 7 if rng.random() < 0.5 else rng.randrange(100), "end": rng.randrange(100), "i": i}
+            for i in range(2000)]
+    extractor = canonical_integer_id_extractor(table_size=5)
+    splitter = SplittingBatchProcessor(context=None, table_size=5, id_extractor=extractor,
+                                       predecessor=DummyPredecessor(rows), hot_key_share=0.2)
+
+    outs = list(splitter.get_batch(25))
+
+    assert sorted(row["i"] for br in outs for bucket in br.chunk for row in bucket) == list(range(2000))
+    for br in outs:
+        claims = [claim for bucket_claims in br.claims for claim in bucket_claims]
+        assert len(claims) == len(set(claims))
+    lane_rows = [row for br in outs if br.coordinates is None for bucket in br.chunk for row in bucket]
+    assert lane_rows and all(7 in (row["start"], row["end"]) for row in lane_rows)
+    assert outs[-1].statistics["hot_keys"] == 1
+    assert outs[-1].statistics["hot_lane_rows"] == len(lane_rows)
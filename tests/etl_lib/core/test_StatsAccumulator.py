@@ -0,0 +1,76 @@
+import random
+import threading
+from types import SimpleNamespace
+
+from etl_lib.core.StatsAccumulator import NEO4J_COUNTERS, StatsAccumulator
+from etl_lib.core.utils import merge_summary
+
+
+def test_matches_merge_summary():
+    rng = random.Random(7)
+    keys = list(NEO4J_COUNTERS) + ["valid_rows", "invalid_rows", "csv_lines_read"]
+    batches = [{k: rng.randint(0, 5) for k in rng.sample(keys, rng.randint(0, len(keys)))} for _ in range(200)]
+
+    expected = {}
+    accumulator = StatsAccumulator()
+    for stats in batches:
+        expected = merge_summary(expected, stats)
+        accumulator.add(stats)
+
+    assert accumulator.to_dict() == expected
+
+
+def test_only_reports_keys_that_were_added():
+    accumulator = StatsAccumulator({"nodes_created": 0, "rows": 2})
+
+    assert accumulator.to_dict() == {"nodes_created": 0, "rows": 2}
+    assert accumulator.get("nodes_deleted", None) is None
+    assert accumulator.get("rows") == 2
+    assert not StatsAccumulator()
+    assert accumulator
+
+
+def test_add_counters_and_increment():
+    counters = SimpleNamespace(**{name: 1 for name in NEO4J_COUNTERS})
+    accumulator = StatsAccumulator().add_counters(counters).add_counters(counters)
+    accumulator.increment("nodes_created", 3).increment("tx_retries")
+
+    result = accumulator.to_dict()
+    assert result["nodes_created"] == 5
+    assert result["relationships_deleted"] == 2
+    assert result["tx_retries"] == 1
+    assert len(result) == len(NEO4J_COUNTERS) + 1
+
+
+def test_add_accepts_accumulator_and_none():
+    accumulator = StatsAccumulator({"rows": 1})
+    accumulator.add(StatsAccumulator({"rows": 2, "nodes_created": 1})).add(None)
+
+    assert accumulator.to_dict() == {"rows": 3, "nodes_created": 1}
+
+
+def test_is_read_only_mapping_of_current_sums():
+    accumulator = StatsAccumulator({"rows": 1})
+    view = accumulator
+    accumulator.add({"rows": 2, "nodes_created": 1})
+
+    assert view["rows"] == 3
+    assert dict(view) == {"rows": 3, "nodes_created": 1}
+    assert len(view) == 2
+    assert view == {"rows": 3, "nodes_created": 1}
+
+
+def test_thread_safe():
+    accumulator = StatsAccumulator()
+
+    def work():
+        for _ in range(2000):
+            accumulator.add({"nodes_created": 1, "rows": 1})
+
+    threads = [threading.Thread(target=work) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert accumulator.to_dict() == {"nodes_created": 16000, "rows": 16000}
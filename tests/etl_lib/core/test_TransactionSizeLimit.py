@@ -0,0 +1,38 @@
+import pytest
+from neo4j.exceptions import Neo4jError
+
+from etl_lib.core.TransactionSizeLimit import TransactionSizeLimit, is_transaction_size_error
+
+
+@pytest.mark.parametrize("code, expected", [
+    ("Neo.TransientError.General.MemoryPoolOutOfMemoryError", True),
+    ("Neo.TransientError.General.TransactionMemoryLimit", True),
+    ("Neo.ClientError.Transaction.TransactionTimedOut", True),
+    ("Neo.TransientError.Transaction.DeadlockDetected", False),
+    ("Neo.ClientError.Schema.ConstraintValidationFailed", False),
+])
+def test_is_transaction_size_error(code, expected):
+    assert is_transaction_size_error(Neo4jError._hydrate_neo4j(code=code, message="failed")) is expected
+
+
+def test_is_transaction_size_error_ignores_other_exceptions():
+    assert not is_transaction_size_error(MemoryError())
+
+
+def test_split_lowers_ceiling_down_to_min_rows():
+    limit = TransactionSizeLimit(min_rows=10)
+    assert limit.rows is None
+
+    assert limit.split(101) == 51
+    assert limit.rows == 51
+    # a larger batch failing elsewhere does not raise the ceiling again, and is retried in parts of the ceiling
+    assert limit.split(1000) == 51
+    assert limit.rows == 51
+    assert limit.split(15) == 10
+    assert limit.split(10) is None
+    assert limit.rows == 10
+
+
+def test_rejects_invalid_min_rows():
+    with pytest.raises(ValueError):
+        TransactionSizeLimit(min_rows=0)
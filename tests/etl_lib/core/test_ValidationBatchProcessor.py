@@ -3,6 +3,8 @@ from typing import Generator
 
 import json
 
+import pytest
+
 from pydantic import BaseModel, field_validator, Field
 
 from etl_lib.core.BatchProcessor import BatchProcessor, BatchResults
@@ -82,3 +84,53 @@ def test_invalid_batch(tmp_path):
             errors.append(json.loads(line))
     assert len(errors) == 1
     assert errors[0]["errors"][0]["type"] == "int_parsing"
+
+
+def test_columnar_batch_is_validated_as_rows(tmp_path):
+    pa = pytest.importorskip("pyarrow")
+    test_data = DataGenerator(data=pa.RecordBatch.from_pylist([
+        {"field1": 1, "field2": 2.5, "field3": "Valid"},
+        {"field1": 2, "field2": 3.5, "field3": "Invalid1"},
+    ]))
+    processor = WrapperValidationBatchProcessor(test_data, tmp_path)
+
+    result = next(processor.get_batch(2))
+
+    assert result.statistics["valid_rows"] == 1
+    assert result.statistics["invalid_rows"] == 1
+    assert result.chunk[0]["field1"] == 1
+    with open(tmp_path / "invalid_rows.log") as f:
+        assert json.loads(f.readline())["row"]["field3"] == "Invalid1"
+
+
+class MultiBatchGenerator(BatchProcessor):
+
+    def __init__(self, batches):
+        super().__init__(None, None)
+        self.batches = batches
+
+    def get_batch(self, batch_size: int) -> Generator[BatchResults, None, None]:
+        for batch in self.batches:
+            yield BatchResults(batch, statistics={"rows_read": len(batch)}, batch_size=len(batch))
+
+
+def test_validation_in_worker_processes_matches_sequential_validation(tmp_path):
+    batches = [
+        [{"field1": i, "field2": i / 2, "field3": "Valid" if i % 3 else f"Invalid{i}", "_row": i}
+         for i in range(start, start + 20)]
+        for start in range(0, 200, 20)
+    ]
+
+    def run(name, **kwargs):
+        error_file = tmp_path / f"{name}.log"
+        processor = ValidationBatchProcessor(DummyContext(), None, MultiBatchGenerator(batches), RowModel, error_file,
+                                             **kwargs)
+        results = [(result.chunk, result.statistics, result.batch_size) for result in processor.get_batch(20)]
+        return results, error_file.read_text()
+
+    expected_results, expected_errors = run("sequential")
+    results, errors = run("processes", processes=3)
+
+    assert results == expected_results
+    assert errors == expected_errors
+    assert [json.loads(line)["row"]["_row"] for line in errors.splitlines()] == list(range(0, 200, 3))
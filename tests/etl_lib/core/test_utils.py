@@ -0,0 +1,128 @@
+import pyarrow as pa
+import pytest
+
+from etl_lib.core.utils import (columnar_unwind_query, encode_columnar, in_transactions_query, project_columns,
+                                 referenced_columns)
+
+
+def test_encode_columnar_uniform_rows():
+    keys, values = encode_columnar([{"id": 1, "name": "a", "_row": 0}, {"id": 2, "name": "b", "_row": 1}])
+
+    assert keys == ["id", "name", "_row"]
+    assert values == [(1, "a", 0), (2, "b", 1)]
+
+
+def test_encode_columnar_single_column_and_empty():
+    assert encode_columnar([{"id": 1}, {"id": 2}]) == (["id"], [(1,), (2,)])
+    assert encode_columnar([]) == ([], [])
+
+
+def test_encode_columnar_fills_missing_keys_with_none():
+    keys, values = encode_columnar([{"id": 1}, {"name": "b", "id": 2}])
+
+    assert keys == ["id", "name"]
+    assert values == [(1, None), (2, "b")]
+
+
+def test_encode_columnar_arrow_batch():
+    batch = pa.RecordBatch.from_pylist([{"id": 1, "name": "a"}, {"id": 2, "name": None}])
+
+    assert encode_columnar(batch) == (["id", "name"], [(1, "a"), (2, None)])
+
+
+def test_columnar_unwind_query_rebuilds_row_map():
+    query = "MATCH (g:Graph)\nunwind  $batch as r\nMERGE (n:Node {id: r.id}) SET n += r"
+
+    rewritten = columnar_unwind_query(query, ("id", "weird`name"))
+
+    assert rewritten == ("MATCH (g:Graph)\nUNWIND $batch AS __values WITH *, "
+                         "{id: __values[0], `weird``name`: __values[1]} AS r\nMERGE (n:Node {id: r.id}) SET n += r")
+
+
+def test_columnar_unwind_query_requires_unwind_batch():
+    with pytest.raises(ValueError):
+        columnar_unwind_query("UNWIND $rows AS row CREATE (n)", ("id",))
+
+
+def test_columnar_unwind_query_rejects_other_batch_uses():
+    with pytest.raises(ValueError):
+        columnar_unwind_query("UNWIND $batch AS row MERGE (n:N {id: row.id}) SET n.total = size($batch)", ("id",))
+
+
+def test_referenced_columns_ignores_batch_in_strings_and_batch_size():
+    query = "UNWIND $batch AS row // not $batch\nMERGE (n:N {id: row.id}) SET n.note = '$batch', n.size = $batch_size"
+
+    assert referenced_columns(query) == ["id"]
+
+
+def test_referenced_columns_finds_property_access():
+    query = """
+    UNWIND $batch AS row // row.commented
+    MATCH (a:A {id: row.from}), (b:B {id: row . to})
+    MERGE (a)-[r:R]->(b)
+    SET r.weight = row.`the weight`, r.note = 'row.quoted', r.id = row.from
+    """
+
+    assert referenced_columns(query) == ["from", "to", "the weight"]
+
+
+@pytest.mark.parametrize("query", [
+    "UNWIND $batch AS row MERGE (n:N {id: row.id}) SET n += row",
+    "UNWIND $batch AS row MERGE (n:N {id: row['id']})",
+    "UNWIND $batch AS row WITH row AS r MERGE (n:N {id: r.id})",
+    "UNWIND $batch AS row MERGE (n:N {id: row.id}) SET n += `row`",
+    "UNWIND $batch AS `row` MERGE (n:N {id: `row`.id})",
+    "MERGE (n:N {id: $id})",
+    "UNWIND $batch AS row MERGE (n:N {id: row.id}) WITH count(*) AS c UNWIND $batch AS r SET c.name = r.name",
+    "UNWIND $batch AS row MERGE (n:N {id: row.id}) SET n.total = size($batch)",
+    "UNWIND $batch AS row MERGE (n:N {id: row.id}) SET n.first = $batch[0].name",
+])
+def test_referenced_columns_none_if_undetermined(query):
+    assert referenced_columns(query) is None
+
+
+def test_referenced_columns_is_case_sensitive():
+    query = "UNWIND $batch AS row WITH row.id AS id, row.name AS Row MERGE (n:N {id: id}) SET n.name = Row"
+
+    assert referenced_columns(query) == ["id", "name"]
+
+
+def test_project_columns():
+    rows = [{"id": 1, "name": "a", "_row": 0}, {"id": 2, "_row": 1}]
+
+    assert project_columns(rows, ["name", "id", "missing"]) == [{"name": "a", "id": 1}, {"id": 2}]
+    batch = project_columns(pa.RecordBatch.from_pylist(rows), ["id", "missing"])
+    assert batch.schema.names == ["id"]
+
+
+def test_in_transactions_query_reports_status():
+    query = "// load nodes\nUNWIND $batch AS row\nMERGE (n:N {id: row.id})\n"
+
+    assert in_transactions_query(query, 500, concurrency=4, on_error="continue") == (
+        "UNWIND $batch AS row\n"
+        "CALL {\n"
+        "  WITH row\n"
+        "MERGE (n:N {id: row.id})\n"
+        "} IN 4 CONCURRENT TRANSACTIONS OF 500 ROWS\n"
+        "ON ERROR CONTINUE\n"
+        "REPORT STATUS AS __status\n"
+        "RETURN __status.transactionId AS transactionId, __status.started AS started, "
+        "__status.committed AS committed, __status.errorMessage AS errorMessage, count(*) AS rows")
+
+
+def test_in_transactions_query_on_error_fail_returns_nothing():
+    rewritten = in_transactions_query("UNWIND $batch AS r CREATE (n:N) SET n = r", 100, on_error="FAIL")
+
+    assert rewritten == ("UNWIND $batch AS r\nCALL {\n  WITH r\nCREATE (n:N) SET n = r\n"
+                         "} IN TRANSACTIONS OF 100 ROWS\nON ERROR FAIL")
+
+
+@pytest.mark.parametrize("query, rows, on_error", [
+    ("MATCH (g:G) UNWIND $batch AS row CREATE (n)", 100, "CONTINUE"),
+    ("UNWIND $rows AS row CREATE (n)", 100, "CONTINUE"),
+    ("UNWIND $batch AS row CREATE (n)", 0, "CONTINUE"),
+    ("UNWIND $batch AS row CREATE (n)", 100, "RETRY"),
+])
+def test_in_transactions_query_rejects_invalid_input(query, rows, on_error):
+    with pytest.raises(ValueError):
+        in_transactions_query(query, rows, on_error=on_error)
@@ -0,0 +1,108 @@
+import asyncio
+
+import pytest
+
+from etl_lib.core.BatchProcessor import BatchResults
+from etl_lib.core.ClosedLoopBatchProcessor import ClosedLoopBatchProcessor
+from etl_lib.core.ETLContext import QueryResult
+from etl_lib.data_sink.AsyncCypherBatchSink import AsyncCypherBatchSink
+from etl_lib.test_utils.utils import DummyPredecessor, FakeSession, RecordingContext
+
+
+class _FakeAsyncDriver:
+    def __init__(self):
+        self.closed = False
+
+    async def close(self):
+        self.closed = True
+
+
+class _FakeAsyncNeo4j:
+    """
+    Async half of a Neo4jContext, with transactions that take `delays[i]` seconds for the i-th batch.
+    """
+
+    def __init__(self, delays=None, fail_on=None):
+        self.delays = delays or {}
+        self.fail_on = fail_on
+        self.driver = None
+        self.active = 0
+        self.peak = 0
+        self.cancelled = 0
+
+    def async_driver(self):
+        self.driver = _FakeAsyncDriver()
+        return self.driver
+
+    def async_session(self, driver):
+        assert driver is self.driver
+        return FakeSession()
+
+    async def query_database_async(self, session, query, **kwargs):
+        batch = kwargs["batch"]
+        first = batch[0]
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        try:
+            await asyncio.sleep(self.delays.get(first, 0.01))
+            if first == self.fail_on:
+                raise RuntimeError("write failed")
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        finally:
+            self.active -= 1
+        return QueryResult(data=[], summary={"nodes_created": len(batch)})
+
+
+def _batches(count, size=2):
+    return [BatchResults(chunk=[i * size + j for j in range(size)], statistics={"read": size}, batch_size=size)
+            for i in range(count)]
+
+
+def test_yields_in_order_with_bounded_concurrency():
+    # the first transaction is the slowest, later ones finish first but must not be yielded first
+    neo4j = _FakeAsyncNeo4j(delays={0: 0.1})
+    context = RecordingContext(neo4j=neo4j)
+    sut = AsyncCypherBatchSink(context, object(), DummyPredecessor(_batches(8)), "q", max_in_flight=3)
+
+    results = list(sut.get_batch(2))
+
+    assert [r.chunk[0] for r in results] == [0, 2, 4, 6, 8, 10, 12, 14]
+    assert all(r.statistics == {"read": 2, "nodes_created": 2} for r in results)
+    assert 1 < neo4j.peak <= 3
+    assert neo4j.driver.closed
+    in_flight = [e["payload"]["in_flight"] for e in context.reporter.events if e["event_type"] == "cypher_tx_done"]
+    assert len(in_flight) == 8 and max(in_flight) == 3
+
+
+def test_failed_transaction_is_raised_and_pending_ones_cancelled():
+    neo4j = _FakeAsyncNeo4j(delays={4: 1.0, 6: 1.0}, fail_on=2)
+    sut = AsyncCypherBatchSink(RecordingContext(neo4j=neo4j), None, DummyPredecessor(_batches(4)), "q", max_in_flight=4)
+
+    results = sut.get_batch(2)
+    assert next(results).chunk == [0, 1]
+    with pytest.raises(RuntimeError, match="write failed"):
+        next(results)
+
+    assert neo4j.cancelled == 2
+    assert neo4j.active == 0
+    assert neo4j.driver.closed
+
+
+def test_closed_loop_gets_statistics_only():
+    neo4j = _FakeAsyncNeo4j()
+    context = RecordingContext(neo4j=neo4j)
+    sut = AsyncCypherBatchSink(context, None, DummyPredecessor(_batches(5)), "q", max_in_flight=2)
+    end = ClosedLoopBatchProcessor(context, None, sut)
+
+    result = next(end.get_batch(2))
+
+    assert result.statistics == {"read": 10, "nodes_created": 10}
+    assert sut.stats_only
+
+
+def test_rejects_invalid_max_in_flight():
+    with pytest.raises(ValueError):
+        AsyncCypherBatchSink(RecordingContext(neo4j=_FakeAsyncNeo4j()), None, DummyPredecessor([]), "q",
+                             max_in_flight=0)
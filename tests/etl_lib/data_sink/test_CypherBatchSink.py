@@ -97,3 +97,46 @@ def test_cypher_batch_sink_with_parameters(etl_context):
                      'properties_set': 6,
                      'relationships_created': 0,
                      'relationships_deleted': 0}]
+
+
+def test_cypher_batch_sink_columnar_batch(etl_context):
+    query = """
+    UNWIND $batch AS row
+    CREATE (n:TestNode {i: row.i, `odd name`: row.`odd name`})
+    """
+
+    predecessor = DummyPredecessor([
+        BatchResults(chunk=[{"i": 1, "odd name": "a"}, {"i": 2, "odd name": "b"}], statistics={}, batch_size=2),
+        BatchResults(chunk=[{"i": 3}], statistics={}, batch_size=1),
+    ])
+
+    sut = CypherBatchSink(context=etl_context, task=None, predecessor=predecessor, query=query, columnar_batch=True)
+    statistics = [result.statistics for result in sut.get_batch(max_batch_size=2)]
+
+    assert [s["nodes_created"] for s in statistics] == [2, 1]
+    with etl_context.neo4j.session() as session:
+        result = etl_context.neo4j.query_database(
+            session, "MATCH (n:TestNode) RETURN n.i AS i, n.`odd name` AS name ORDER BY i")
+    assert [(r["i"], r["name"]) for r in result.data] == [(1, "a"), (2, "b"), (3, None)]
+
+
+def test_cypher_batch_sink_single_transaction(etl_context):
+    queries = [
+        "UNWIND $batch AS row MERGE (:TestNode {i: row.from})",
+        "UNWIND $batch AS row MERGE (:TestNode {i: row.to})",
+        """UNWIND $batch AS row
+        MATCH (a:TestNode {i: row.from}), (b:TestNode {i: row.to})
+        CREATE (a)-[:TEST_REL]->(b)""",
+    ]
+
+    predecessor = DummyPredecessor([
+        BatchResults(chunk=[{"from": 1, "to": 2}, {"from": 2, "to": 3}], statistics={}, batch_size=2),
+    ])
+
+    sut = CypherBatchSink(context=etl_context, task=None, predecessor=predecessor, query=queries,
+                          single_transaction=True)
+    statistics = [result.statistics for result in sut.get_batch(max_batch_size=2)]
+
+    assert len(statistics) == 1
+    assert statistics[0]["nodes_created"] == 3
+    assert statistics[0]["relationships_created"] == 2
@@ -0,0 +1,72 @@
+import pytest
+
+from etl_lib.core.BatchProcessor import BatchResults
+from etl_lib.core.ClosedLoopBatchProcessor import ClosedLoopBatchProcessor
+from etl_lib.core.ETLContext import QueryResult
+from etl_lib.data_sink.CypherInTransactionsBatchSink import CypherInTransactionsBatchSink
+from etl_lib.test_utils.utils import DummyPredecessor, FakeSession, RecordingContext
+
+QUERY = "UNWIND $batch AS row MERGE (n:N {id: row.id})"
+
+
+class _FakeNeo4j:
+    """
+    Runs `CALL { } IN TRANSACTIONS` queries by returning the given status records for each batch.
+    """
+
+    def __init__(self, status=None):
+        self.status = status or []
+        self.queries = []
+
+    def session(self):
+        return FakeSession()
+
+    def query_database_auto_commit(self, session, query, **kwargs):
+        self.queries.append((query, kwargs))
+        return QueryResult(data=self.status, summary={"nodes_created": len(kwargs["batch"])})
+
+
+def _status(transaction_id, rows, committed=True, started=True, error=None):
+    return {"transactionId": transaction_id, "started": started, "committed": committed, "errorMessage": error,
+            "rows": rows}
+
+
+def test_wraps_query_and_counts_inner_transactions():
+    neo4j = _FakeNeo4j([_status("tx-1", 2), _status("tx-2", 2, committed=False, error="constraint violated"),
+                        _status(None, 1, committed=False, started=False)])
+    context = RecordingContext(neo4j=neo4j)
+    batch = BatchResults(chunk=[{"id": i, "unused": i} for i in range(5)], statistics={"read": 5}, batch_size=5)
+    sut = CypherInTransactionsBatchSink(context, object(), DummyPredecessor([batch]), QUERY,
+                                        rows_per_transaction=2, concurrency=3, on_error="BREAK", prune_columns=True,
+                                        label="N")
+
+    result = next(sut.get_batch(5))
+
+    query, kwargs = neo4j.queries[0]
+    assert "} IN 3 CONCURRENT TRANSACTIONS OF 2 ROWS\nON ERROR BREAK" in query
+    assert kwargs == {"batch": [{"id": i} for i in range(5)], "label": "N"}
+    assert result.statistics == {"read": 5, "nodes_created": 5, "inner_transactions": 2,
+                                 "inner_transactions_failed": 1, "rows_failed": 2, "rows_skipped": 1}
+    assert result.chunk == batch.chunk
+    events = {e["event_type"]: e["payload"] for e in context.reporter.events}
+    assert events["in_transactions_error"] == {"rows": 2, "error": "constraint violated"}
+    assert events["cypher_tx_done"]["inner_transactions"] == 2
+
+
+def test_on_error_fail_has_no_status_statistics():
+    neo4j = _FakeNeo4j()
+    context = RecordingContext(neo4j=neo4j)
+    batches = [BatchResults(chunk=[{"id": i}], statistics={}, batch_size=1) for i in range(3)]
+    sut = CypherInTransactionsBatchSink(context, None, DummyPredecessor(batches), QUERY, on_error="FAIL")
+    end = ClosedLoopBatchProcessor(context, None, sut)
+
+    result = next(end.get_batch(1))
+
+    assert result.statistics == {"nodes_created": 3}
+    assert "REPORT STATUS" not in neo4j.queries[0][0]
+
+
+@pytest.mark.parametrize("query", [["UNWIND $batch AS row CREATE (n)"], "CREATE (n)"])
+def test_rejects_queries_that_can_not_be_wrapped(query):
+    with pytest.raises(ValueError):
+        CypherInTransactionsBatchSink(RecordingContext(neo4j=_FakeNeo4j()), None, DummyPredecessor([]), query)
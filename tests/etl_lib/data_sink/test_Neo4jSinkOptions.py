@@ -0,0 +1,52 @@
+import pytest
+
+from etl_lib.core.AdaptiveBatchSizeController import AdaptiveBatchSizeController
+from etl_lib.data_sink.AsyncCypherBatchSink import AsyncCypherBatchSink
+from etl_lib.data_sink.CypherBatchSink import CypherBatchSink
+from etl_lib.data_sink.CypherInTransactionsBatchSink import CypherInTransactionsBatchSink
+from etl_lib.data_sink.Neo4jSinkOptions import Neo4jSinkOptions
+from etl_lib.task.data_loading.SQLLoad2Neo4jTask import SQLLoad2Neo4jTask
+from etl_lib.test_utils.utils import DummyPredecessor, RecordingContext
+
+QUERY = "UNWIND $batch AS row MERGE (n:N {id: row.id})"
+
+
+@pytest.mark.parametrize("options, sink_type", [
+    ({}, CypherBatchSink),
+    ({"dead_letter_file": "dead.ndjson"}, CypherBatchSink),
+    ({"max_in_flight": 4}, AsyncCypherBatchSink),
+    ({"rows_per_transaction": 100, "concurrent_transactions": 2}, CypherInTransactionsBatchSink),
+])
+def test_selects_sink(options, sink_type):
+    sink = Neo4jSinkOptions(**options).sink(RecordingContext(), object(), DummyPredecessor([]), QUERY)
+
+    assert type(sink) is sink_type
+
+
+@pytest.mark.parametrize("options", [
+    {"max_in_flight": 2, "batch_size_controller": AdaptiveBatchSizeController(1000)},
+    {"rows_per_transaction": 100, "max_in_flight": 2},
+    {"rows_per_transaction": 100, "batch_size_controller": AdaptiveBatchSizeController(1000)},
+    {"dead_letter_file": "dead.ndjson", "max_in_flight": 2},
+    {"dead_letter_file": "dead.ndjson", "rows_per_transaction": 100},
+])
+def test_rejects_unsupported_combinations(options):
+    with pytest.raises(ValueError):
+        Neo4jSinkOptions(**options)
+
+
+class _SQLTask(SQLLoad2Neo4jTask):
+    def _sql_query(self) -> str:
+        return "SELECT id FROM n"
+
+    def _cypher_query(self) -> str:
+        return QUERY
+
+
+def test_task_validates_before_it_is_configured():
+    task = _SQLTask.__new__(_SQLTask)
+
+    with pytest.raises(ValueError):
+        task.__init__(RecordingContext(), max_in_flight=2, rows_per_transaction=100)
+
+    assert vars(task) == {}
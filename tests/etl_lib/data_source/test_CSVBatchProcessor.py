@@ -81,3 +81,30 @@ def test_csv_batch_processor_batching(tmp_path: Path, batch_size):
     all_rows = [row for batch in all_batches for row in batch.chunk]
     assert len(all_rows) == total_rows, f"Expected {total_rows} rows processed, got {len(all_rows)}"
     assert [row["_row"] for row in all_rows] == list(range(total_rows)), "Row indices mismatch"
+
+
+@pytest.mark.parametrize("csv_file, csv_reader_options", TEST_FILES)
+def test_csv_batch_processor_columns(csv_file, csv_reader_options):
+    """Only the requested columns are read, `_row` only if requested."""
+    processor = CSVBatchSource(csv_file=csv_file, context=DummyContext(), columns=["float", "string", "missing"],
+                               **csv_reader_options)
+
+    batches = list(processor.get_batch(2))
+
+    assert [row for batch in batches for row in batch.chunk] == [
+        {"float": row["float"], "string": row["string"]} for row in EXPECTED_DATA]
+    assert [batch.statistics for batch in batches] == [{"csv_lines_read": 2}, {"csv_lines_read": 1}]
+
+    processor = CSVBatchSource(csv_file=csv_file, context=DummyContext(), columns=["integer", "_row"],
+                               **csv_reader_options)
+    rows = [row for batch in processor.get_batch(5) for row in batch.chunk]
+    assert rows == [{"integer": row["integer"], "_row": idx} for idx, row in enumerate(EXPECTED_DATA)]
+
+
+def test_csv_batch_processor_columns_empty_values(tmp_path: Path):
+    csv_path = tmp_path / "short.csv"
+    csv_path.write_text("a,b,c\n1,,3\n\n4,5\n")
+
+    processor = CSVBatchSource(csv_file=csv_path, context=DummyContext(), columns=["b", "c"])
+
+    assert next(processor.get_batch(10)).chunk == [{"b": None, "c": "3"}, {"b": "5", "c": None}]
@@ -51,3 +51,40 @@ def test_parquet_get_total_rows(tmp_path):
 def test_parquet_missing_file():
     with pytest.raises(FileNotFoundError):
         ParquetBatchSource.get_total_rows(Path("non_existent.parquet"))
+
+
+def test_parquet_batch_source_columnar(tmp_path):
+    parquet_file = tmp_path / "test_columnar.parquet"
+    data = {
+        "col1": list(range(10)),
+        "col2": [f"val_{i}" for i in range(10)]
+    }
+    _write_parquet(parquet_file, data)
+
+    source = ParquetBatchSource(DummyContext(), file=parquet_file, columnar=True)
+    batches = list(source.get_batch(max_batch_size=4))
+
+    assert [len(batch.chunk) for batch in batches] == [4, 4, 2]
+    assert all(isinstance(batch.chunk, pa.RecordBatch) for batch in batches)
+    assert [batch.statistics["parquet_rows_read"] for batch in batches] == [4, 4, 2]
+
+    rows = [row for batch in batches for row in batch.chunk.to_pylist()]
+    assert rows == [{"col1": i, "col2": f"val_{i}", "_row": i} for i in range(10)]
+
+
+@pytest.mark.parametrize("columnar", [False, True])
+def test_parquet_batch_source_columns(tmp_path, columnar):
+    parquet_file = tmp_path / "test_columns.parquet"
+    _write_parquet(parquet_file, {"col1": list(range(4)), "col2": [f"val_{i}" for i in range(4)], "col3": [0.5] * 4})
+
+    source = ParquetBatchSource(DummyContext(), file=parquet_file, columnar=columnar, columns=["col2", "not_there"])
+    batches = list(source.get_batch(max_batch_size=3))
+    rows = [row for batch in batches for row in (batch.chunk.to_pylist() if columnar else batch.chunk)]
+
+    assert rows == [{"col2": f"val_{i}"} for i in range(4)]
+    assert [batch.statistics["parquet_rows_read"] for batch in batches] == [3, 1]
+
+    source = ParquetBatchSource(DummyContext(), file=parquet_file, columnar=columnar, columns=["_row", "col1"])
+    rows = [row for batch in source.get_batch(max_batch_size=3)
+            for row in (batch.chunk.to_pylist() if columnar else batch.chunk)]
+    assert [(row["col1"], row["_row"]) for row in rows] == [(i, i) for i in range(4)]
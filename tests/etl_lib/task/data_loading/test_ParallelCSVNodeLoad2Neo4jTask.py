@@ -0,0 +1,56 @@
+import csv
+from pathlib import Path
+
+from pydantic import BaseModel
+
+from etl_lib.task.data_loading.ParallelCSVNodeLoad2Neo4jTask import ParallelCSVNodeLoad2Neo4jTask
+
+
+class _NodeRow(BaseModel):
+    id: int
+    name: str
+
+
+class _CSVNodeTask(ParallelCSVNodeLoad2Neo4jTask):
+
+    def _query(self):
+        return """
+        UNWIND $batch AS row
+        MERGE (n:TestNode {id: row.id})
+        SET n.name = row.name
+        """
+
+
+def _write_csv(path: Path, rows: list[dict]):
+    with path.open("w", newline="") as f:
+        w = csv.DictWriter(f, fieldnames=["id", "name"])
+        w.writeheader()
+        for r in rows:
+            w.writerow(r)
+
+
+def test_parallel_csv_node_load(etl_context, tmp_path):
+    # every id appears twice, the second row wins as rows of one id are written in order
+    rows = [{"id": i % 50, "name": f"name {i}"} for i in range(100)]
+    csv_file = tmp_path / "nodes.csv"
+    _write_csv(csv_file, rows)
+
+    task = _CSVNodeTask(etl_context,
+                        file=csv_file,
+                        model=_NodeRow,
+                        error_file=tmp_path / "invalid.ndjson",
+                        lanes=4,
+                        batch_size=10,
+                        prefetch=2)
+
+    etl_context.reporter.register_tasks(task)
+    result = task.execute()
+
+    assert result.success is True
+    assert result.summary["nodes_created"] == 50
+    assert result.summary["valid_rows"] == 100
+
+    with etl_context.neo4j.session() as sess:
+        records = sess.run("MATCH (n:TestNode) RETURN n.id AS id, n.name AS name")
+        names = {rec["id"]: rec["name"] for rec in records}
+    assert names == {i: f"name {i + 50}" for i in range(50)}